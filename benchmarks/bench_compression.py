@@ -0,0 +1,67 @@
+"""Compare response size and CPU cost of the supported compression codecs.
+
+Usage: python benchmarks/bench_compression.py [--sizes 1000 10000]
+Prints one JSON object per (catalog size, encoding) on stdout.
+"""
+
+import argparse
+import json
+import time
+
+from catalog import generate_catalog
+
+from sftrails.api.compression import COMPRESSORS, CachedResponse
+from sftrails.api.schemas import TrailListResponse
+from sftrails.api.serializers import trail_to_response
+from sftrails.models import Trail
+
+
+def bench(size: int, repeat: int) -> list[dict]:
+    trails = [Trail.from_dict(t) for t in generate_catalog(size)]
+    body = TrailListResponse(
+        trails=[trail_to_response(t) for t in trails], total=len(trails)
+    ).model_dump_json().encode()
+
+    results = []
+    for encoding, compress in COMPRESSORS.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            compressed = compress(body)
+        compress_ms = (time.perf_counter() - start) * 1000 / repeat
+
+        # Cost of serving the precompressed variant on a cache hit
+        cached = CachedResponse(200, [], body)
+        cached.encoded(encoding)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            cached.encoded(encoding)
+        cached_ms = (time.perf_counter() - start) * 1000 / repeat
+
+        results.append(
+            {
+                "benchmark": "compression",
+                "trails": size,
+                "encoding": encoding,
+                "raw_bytes": len(body),
+                "compressed_bytes": len(compressed),
+                "ratio": round(len(body) / len(compressed), 2),
+                "compress_ms": round(compress_ms, 3),
+                "cached_ms": round(cached_ms, 6),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for result in bench(size, args.repeat):
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
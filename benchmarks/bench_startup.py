@@ -0,0 +1,151 @@
+"""Measure import time and time-to-first-response in fresh interpreters.
+
+Usage: python benchmarks/bench_startup.py [--sizes 1000 10000] [--repeat 5]
+Prints one JSON object per benchmark on stdout. Every sample runs in a new
+process so module caches from earlier samples do not hide import costs.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from catalog import generate_catalog
+
+# Modules whose presence after ``import sftrails`` means a lazy import broke
+HEAVY_MODULES = ("httpx", "fastapi", "pydantic", "starlette")
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+# Drives the ASGI app directly so no HTTP client import is timed
+_FIRST_RESPONSE_SCRIPT = """
+import asyncio, json, os, time
+start = time.perf_counter()
+from sftrails.api.main import app
+imported = time.perf_counter()
+
+from sftrails.api import dependencies
+from sftrails.client import InMemoryTrailSource
+
+with open(os.environ["BENCH_CATALOG"]) as f:
+    dependencies.configure_data_source(InMemoryTrailSource(json.load(f)))
+
+async def get(path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    assert status == [200], (path, status)
+
+loaded = time.perf_counter()
+asyncio.run(get("/api/v1/trails"))
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_response_seconds": time.perf_counter() - loaded,
+    "finished_at": time.time(),
+}))
+"""
+
+
+def _run(script: str, env: dict | None = None) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, **(env or {})},
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def _record(name: str, size: int, durations: list[float], **extra) -> dict:
+    ms = sorted(d * 1000 for d in durations)
+    return {
+        "benchmark": name,
+        "trails": size,
+        "iterations": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        **extra,
+    }
+
+
+def bench_imports(repeat: int) -> list[dict]:
+    """Import time of the package, the service and the API app."""
+    results = []
+    for name, module in (
+        ("startup_import_package", "sftrails"),
+        ("startup_import_service", "sftrails.service"),
+        ("startup_import_app", "sftrails.api.main"),
+    ):
+        script = _IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+        samples = [_run(script) for _ in range(repeat)]
+        results.append(
+            _record(
+                name,
+                0,
+                [s["seconds"] for s in samples],
+                heavy_modules=samples[-1]["heavy_modules"],
+            )
+        )
+    return results
+
+
+def bench(size: int, repeat: int) -> list[dict]:
+    """Time from process start, and from app import, to the first response."""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(generate_catalog(size), f)
+    try:
+        first_response, cold_start = [], []
+        for _ in range(repeat):
+            spawned_at = time.time()
+            sample = _run(_FIRST_RESPONSE_SCRIPT, {"BENCH_CATALOG": f.name})
+            first_response.append(sample["first_response_seconds"])
+            cold_start.append(sample["finished_at"] - spawned_at)
+    finally:
+        os.unlink(f.name)
+    return [
+        _record("startup_first_response", size, first_response),
+        _record("startup_cold_start", size, cold_start),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for result in bench_imports(args.repeat):
+        print(json.dumps(result))
+    for size in args.sizes:
+        for result in bench(size, args.repeat):
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Synthetic trail catalog generator for benchmarks."""
+
+import random
+from datetime import datetime, timedelta
+
+PARKS = [
+    "Golden Gate National Recreation Area",
+    "Mount Tamalpais State Park",
+    "Golden Gate Park",
+    "McLaren Park",
+    "Mount Davidson Park",
+    "Presidio of San Francisco",
+    "Glen Canyon Park",
+    "Twin Peaks",
+    "Lands End",
+    "Point Reyes National Seashore",
+]
+
+STATUS_WEIGHTS = {"open": 70, "limited": 12, "closed": 15, "unknown": 3}
+CONDITION_WEIGHTS = {
+    "dry": 50,
+    "wet": 20,
+    "muddy": 18,
+    "icy": 4,
+    "snowy": 2,
+    "unknown": 6,
+}
+SUFFIXES = ["Loop", "Ridge", "Canyon", "Coastal", "Fire Road"]
+
+NOTES = [
+    "",
+    "",
+    "",
+    "Popular trail, expect crowds on weekends",
+    "Closed due to storm damage",
+    "Section closed for maintenance",
+    "Ice on north-facing sections",
+    "Beach access available",
+]
+
+
+def generate_catalog(size: int, seed: int = 42) -> list[dict]:
+    """Generate ``size`` raw trail dicts in the upstream feed format."""
+    rng = random.Random(seed)
+    statuses = rng.choices(
+        list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=size
+    )
+    conditions = rng.choices(
+        list(CONDITION_WEIGHTS), weights=list(CONDITION_WEIGHTS.values()), k=size
+    )
+    # A few big parks hold most trails, like the real feed
+    parks = rng.choices(
+        PARKS, weights=[1 / (i + 1) for i in range(len(PARKS))], k=size
+    )
+    base = datetime(2025, 1, 15, 12, 0, 0)
+
+    return [
+        {
+            "id": f"trail-{i:06d}",
+            "name": f"Trail {i} {rng.choice(SUFFIXES)}",
+            "park": parks[i],
+            "status": statuses[i],
+            "condition": conditions[i],
+            "length_miles": round(rng.lognormvariate(1.0, 0.6), 1),
+            "elevation_gain_ft": int(rng.lognormvariate(6.0, 0.8)),
+            "last_updated": (
+                base - timedelta(minutes=rng.randint(0, 60 * 24 * 14))
+            ).isoformat(),
+            "notes": rng.choice(NOTES),
+        }
+        for i in range(size)
+    ]
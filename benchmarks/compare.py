@@ -0,0 +1,58 @@
+"""Compare two benchmark result files produced by run.py.
+
+Usage: python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+Exits with status 1 if any benchmark's median slowed down by more than the
+threshold percentage.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict[tuple, dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {
+        (r["benchmark"], r["trails"], r.get("encoding")): r
+        for r in report["results"]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    parser.add_argument("--metric", default="median_ms")
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+
+    regressions = 0
+    print(
+        f"{'benchmark':<28}{'trails':>8}{'baseline':>12}{'candidate':>12}{'change':>9}"
+    )
+    for key in sorted(baseline.keys() & candidate.keys(), key=str):
+        name, trails, encoding = key
+        before = baseline[key].get(args.metric)
+        after = candidate[key].get(args.metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before * 100
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        label = f"{name}[{encoding}]" if encoding else name
+        print(
+            f"{label:<28}{trails:>8}{before:>12.3f}{after:>12.3f}"
+            f"{change:>+8.1f}%{flag}"
+        )
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
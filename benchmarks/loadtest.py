@@ -0,0 +1,164 @@
+"""Drive the API with concurrent clients against a mock upstream.
+
+Usage:
+    python benchmarks/loadtest.py --trails 20000 --latency-ms 50 \\
+        --clients 32 --duration 10 --refresh-interval 2
+
+The API runs in-process over ASGI with an HTTPTrailClient wired to
+MockUpstream, so upstream latency, error rate and payload size are under
+test control. Prints a JSON report with p50/p95/p99 latency per endpoint and
+the number of upstream calls made, which shows how well caching absorbs load.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+from mock_upstream import MockUpstream
+
+from sftrails.api import dependencies
+from sftrails.api.main import app
+from sftrails.client import HTTPTrailClient
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_stats(durations: list[float]) -> dict:
+    ms = sorted(d * 1000 for d in durations)
+    return {
+        "requests": len(ms),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+    }
+
+
+def build_scenarios(trails: int, miss_rate: float, rng: random.Random) -> dict:
+    """Request generators keyed by scenario name, with relative weights."""
+
+    def detail() -> str:
+        if rng.random() < miss_rate:
+            # Unknown id falls through the cache to the upstream
+            return f"/api/v1/trails/missing-{rng.randrange(1_000_000)}"
+        return f"/api/v1/trails/trail-{rng.randrange(trails):06d}"
+
+    return {
+        "list_open": (50, lambda: "/api/v1/trails?status=open"),
+        "list_fields": (
+            20,
+            lambda: "/api/v1/trails?fields=id,name,park,status,condition",
+        ),
+        "detail": (20, detail),
+        "summary": (10, lambda: "/api/v1/trails/summary"),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    upstream = MockUpstream(
+        catalog_size=args.trails,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+    )
+    source = HTTPTrailClient("http://upstream", transport=upstream.transport())
+    dependencies.configure_data_source(source)
+    service = dependencies.get_trail_service()
+
+    rng = random.Random(args.seed)
+    scenarios = build_scenarios(args.trails, args.miss_rate, rng)
+    names = list(scenarios)
+    weights = [scenarios[n][0] for n in names]
+
+    durations: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    deadline = time.perf_counter() + args.duration
+
+    # Unhandled upstream failures should surface as 500s, not abort the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    client = httpx.AsyncClient(transport=transport, base_url="http://api")
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            path = scenarios[name][1]()
+            start = time.perf_counter()
+            response = await client.get(path)
+            durations[name].append(time.perf_counter() - start)
+            statuses[name][response.status_code] += 1
+
+    async def refresher() -> None:
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(args.refresh_interval)
+            try:
+                await service.refresh()
+            except Exception:  # Injected upstream errors; keep serving
+                pass
+
+    start = time.perf_counter()
+    async with client:
+        tasks = [worker() for _ in range(args.clients)]
+        if args.refresh_interval:
+            tasks.append(refresher())
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await source.close()
+
+    all_durations = [d for values in durations.values() for d in values]
+    return {
+        "config": vars(args),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(all_durations) / elapsed, 1),
+        "overall": latency_stats(all_durations),
+        "endpoints": {
+            name: {
+                **latency_stats(values),
+                "status_codes": dict(statuses[name]),
+            }
+            for name, values in sorted(durations.items())
+        },
+        "upstream": {
+            "calls": dict(upstream.calls),
+            "injected_errors": upstream.errors,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trails", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between forced snapshot refreshes (0 disables)",
+    )
+    parser.add_argument(
+        "--miss-rate",
+        type=float,
+        default=0.05,
+        help="Fraction of detail requests for unknown ids",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Mock upstream trail API with tunable latency, errors and payload size.
+
+Use in-process through ``MockUpstream.transport()`` with HTTPTrailClient, or
+serve it over HTTP and point the API at it:
+
+    MOCK_UPSTREAM_TRAILS=50000 MOCK_UPSTREAM_LATENCY_MS=80 \\
+        uvicorn mock_upstream:app --app-dir benchmarks --port 9000
+    SFTRAILS_UPSTREAM_URL=http://localhost:9000 uvicorn sftrails.api.main:app
+"""
+
+import asyncio
+import json
+import os
+import random
+from collections import Counter
+
+import httpx
+from catalog import generate_catalog
+
+
+class MockUpstream:
+    """Fake upstream serving ``/trails`` and ``/trails/{id}``."""
+
+    def __init__(
+        self,
+        catalog_size: int = 1000,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 42,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls: Counter[str] = Counter()
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._trails = generate_catalog(catalog_size, seed=seed)
+        self._by_id = {t["id"]: t for t in self._trails}
+        # Encode once; payload cost is on the client side, not the mock
+        self._catalog_body = json.dumps(self._trails).encode()
+
+    async def _respond(self, path: str) -> tuple[int, bytes]:
+        """Produce the status and body for a request path."""
+        delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if path == "/trails":
+            self.calls["/trails"] += 1
+        else:
+            self.calls["/trails/{id}"] += 1
+
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            return 503, b'{"detail": "injected failure"}'
+        if path == "/trails":
+            return 200, self._catalog_body
+        trail = self._by_id.get(path.rsplit("/", 1)[-1])
+        if trail is None:
+            return 404, b'{"detail": "not found"}'
+        return 200, json.dumps(trail).encode()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """httpx transport handler."""
+        status, body = await self._respond(request.url.path)
+        return httpx.Response(
+            status, content=body, headers={"Content-Type": "application/json"}
+        )
+
+    def transport(self) -> httpx.MockTransport:
+        """Transport for an in-process HTTPTrailClient."""
+        return httpx.MockTransport(self.handle)
+
+    async def __call__(self, scope, receive, send) -> None:
+        """Minimal ASGI app so the mock can be served with uvicorn."""
+        if scope["type"] != "http":
+            return
+        status, body = await self._respond(scope["path"])
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+app = MockUpstream(
+    catalog_size=int(os.environ.get("MOCK_UPSTREAM_TRAILS", "1000")),
+    latency_ms=float(os.environ.get("MOCK_UPSTREAM_LATENCY_MS", "0")),
+    jitter_ms=float(os.environ.get("MOCK_UPSTREAM_JITTER_MS", "0")),
+    error_rate=float(os.environ.get("MOCK_UPSTREAM_ERROR_RATE", "0")),
+)
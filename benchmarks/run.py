@@ -0,0 +1,285 @@
+"""Benchmark suite for decoding, querying, serialization and API throughput.
+
+Usage:
+    python benchmarks/run.py --sizes 1000 10000 --output results.json
+    python benchmarks/compare.py baseline.json results.json
+
+Each benchmark is run against a synthetic catalog (see catalog.py) and
+reports timing statistics in milliseconds. Results are written as a JSON
+document tagged with the git commit so runs can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import httpx
+from bench_compression import bench as bench_compression
+from bench_startup import bench as bench_startup
+from bench_startup import bench_imports
+from catalog import PARKS, generate_catalog
+
+from sftrails.api import dependencies
+from sftrails.api.main import app
+from sftrails.api.routes.trails import get_status_summary
+from sftrails.api.schemas import TrailListResponse
+from sftrails.api.serializers import parse_fields, project_trail, trail_to_response
+from sftrails.client import InMemoryTrailSource
+from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.service import TrailService
+
+LIST_FIELDS = parse_fields("id,name,park,status,condition")
+
+
+def summarize(name: str, size: int, durations: list[float], **extra) -> dict:
+    """Build a result record from per-iteration durations in seconds."""
+    ms = sorted(d * 1000 for d in durations)
+    return {
+        "benchmark": name,
+        "trails": size,
+        "iterations": len(ms),
+        "min_ms": round(ms[0], 4),
+        "median_ms": round(statistics.median(ms), 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        **extra,
+    }
+
+
+def time_sync(fn: Callable[[], object], repeat: int) -> list[float]:
+    """Time a synchronous callable ``repeat`` times."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def time_async(
+    fn: Callable[[], Awaitable[object]], repeat: int
+) -> list[float]:
+    """Time an async callable ``repeat`` times."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def bench_service(raw: list[dict], repeat: int) -> list[dict]:
+    """Decode, refresh, filter/search, summary and ingest benchmarks."""
+    size = len(raw)
+    results = [
+        summarize(
+            "decode",
+            size,
+            time_sync(lambda: [Trail.from_dict(t) for t in raw], repeat),
+        )
+    ]
+
+    service = TrailService(InMemoryTrailSource(raw))
+    durations = await time_async(service.refresh, repeat)
+    results.append(summarize("refresh", size, durations))
+
+    queries = {
+        "search_status": dict(status=TrailStatus.OPEN),
+        "search_park": dict(park=PARKS[3]),
+        "search_combined": dict(
+            status=TrailStatus.OPEN,
+            condition=TrailCondition.DRY,
+            max_length_miles=5.0,
+        ),
+        "search_multi_negated": dict(
+            status=[TrailStatus.OPEN, TrailStatus.LIMITED],
+            exclude_condition=[TrailCondition.MUDDY, TrailCondition.ICY],
+            exclude_park=PARKS[0],
+        ),
+    }
+    for name, kwargs in queries.items():
+        durations = await time_async(lambda: service.search_trails(**kwargs), repeat)
+        results.append(summarize(name, size, durations))
+
+    durations = await time_async(lambda: get_status_summary(service=service), repeat)
+    results.append(summarize("summary", size, durations))
+
+    # The ranking is built with the snapshot; each call slices it
+    durations = await time_async(lambda: service.get_recommended_trails(10), repeat)
+    results.append(summarize("recommended_top10", size, durations))
+
+    # Alternate two batches so every iteration changes every trail
+    original = await service.get_all_trails()
+    batches = [
+        [replace(t, status=TrailStatus.CLOSED, notes="ingest") for t in original],
+        original,
+    ]
+    iteration = iter(range(repeat))
+    durations = await time_async(
+        lambda: service.apply_updates(batches[next(iteration) % 2]), repeat
+    )
+    results.append(
+        summarize(
+            "apply_updates",
+            size,
+            durations,
+            updates_per_second=round(size / statistics.median(durations)),
+        )
+    )
+    return results
+
+
+async def bench_serialization(raw: list[dict], repeat: int) -> list[dict]:
+    """Full pydantic serialization versus sparse field projection."""
+    size = len(raw)
+    trails = [Trail.from_dict(t) for t in raw]
+
+    def full() -> bytes:
+        return TrailListResponse(
+            trails=[trail_to_response(t) for t in trails], total=len(trails)
+        ).model_dump_json().encode()
+
+    def projected() -> bytes:
+        return json.dumps(
+            {"trails": [project_trail(t, LIST_FIELDS) for t in trails]}
+        ).encode()
+
+    return [
+        summarize(
+            "serialize_full", size, time_sync(full, repeat), bytes=len(full())
+        ),
+        summarize(
+            "serialize_fields",
+            size,
+            time_sync(projected, repeat),
+            bytes=len(projected()),
+        ),
+    ]
+
+
+async def bench_asgi(raw: list[dict], requests: int, concurrency: int) -> list[dict]:
+    """End-to-end throughput through the FastAPI app over ASGI."""
+    size = len(raw)
+    dependencies.configure_data_source(InMemoryTrailSource(raw))
+    await dependencies.get_trail_service().get_all_trails()
+
+    scenarios = {
+        "asgi_list_cached": lambda i: "/api/v1/trails?status=open",
+        # A unique ignored parameter defeats the response cache
+        "asgi_list_uncached": lambda i: f"/api/v1/trails?status=open&_={i}",
+        "asgi_list_fields": lambda i: (
+            f"/api/v1/trails?status=open&fields=id,name,park,status&_={i}"
+        ),
+        "asgi_get_trail": lambda i: f"/api/v1/trails/trail-{i % size:06d}",
+        "asgi_summary": lambda i: f"/api/v1/trails/summary?_={i}",
+        "asgi_recommended": lambda i: f"/api/v1/trails/recommended?limit=10&_={i}",
+    }
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+        for name, path_for in scenarios.items():
+            queue = iter(range(requests))
+            durations: list[float] = []
+
+            async def worker() -> None:
+                for i in queue:
+                    start = time.perf_counter()
+                    response = await client.get(path_for(i))
+                    response.raise_for_status()
+                    durations.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            results.append(
+                summarize(
+                    name,
+                    size,
+                    durations,
+                    concurrency=concurrency,
+                    requests_per_second=round(requests / elapsed, 1),
+                )
+            )
+    return results
+
+
+def git_commit() -> str | None:
+    """Current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    results = []
+    if "startup" in args.groups:
+        results.extend(bench_imports(args.repeat))
+    for size in args.sizes:
+        raw = generate_catalog(size)
+        if "service" in args.groups:
+            results.extend(await bench_service(raw, args.repeat))
+        if "serialization" in args.groups:
+            results.extend(await bench_serialization(raw, args.repeat))
+        if "asgi" in args.groups:
+            results.extend(await bench_asgi(raw, args.requests, args.concurrency))
+        if "compression" in args.groups:
+            results.extend(bench_compression(size, args.repeat))
+        if "startup" in args.groups:
+            results.extend(bench_startup(size, args.repeat))
+        print(f"finished {size} trails", file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument(
+        "--groups",
+        nargs="+",
+        default=["service", "serialization", "asgi", "compression", "startup"],
+        choices=["service", "serialization", "asgi", "compression", "startup"],
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
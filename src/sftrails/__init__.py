@@ -1,7 +1,32 @@
 """SF Trails - Check trail status in San Francisco area parks."""
 
-from sftrails.models import Trail, TrailStatus, TrailCondition
-from sftrails.service import TrailService
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from sftrails.models import Trail, TrailCondition, TrailStatus
+    from sftrails.service import TrailService
 
 __version__ = "0.1.0"
 __all__ = ["Trail", "TrailStatus", "TrailCondition", "TrailService"]
+
+# Exports are imported on first access so ``import sftrails`` stays cheap
+_EXPORTS = {
+    "Trail": "sftrails.models",
+    "TrailStatus": "sftrails.models",
+    "TrailCondition": "sftrails.models",
+    "TrailService": "sftrails.service",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
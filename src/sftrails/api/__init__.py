@@ -1,5 +1,21 @@
 """SF Trails API package."""
 
-from sftrails.api.main import app
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from sftrails.api.main import app
 
 __all__ = ["app"]
+
+
+def __getattr__(name: str) -> Any:
+    # Building the app imports FastAPI and every route, so only do it when
+    # ``app`` is used rather than for any import from ``sftrails.api``
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return importlib.import_module("sftrails.api.main").app
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,304 @@
+"""Response compression with per-snapshot cached variants."""
+
+import gzip
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from sftrails.metrics import REGISTRY
+from sftrails.timing import annotate, timed
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+RESPONSE_CACHE_REQUESTS = REGISTRY.counter(
+    "sftrails_response_cache_requests_total",
+    "Cached response lookups by result",
+    labels=("result",),
+)
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0 keeps output deterministic so cached variants are reproducible
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+# Server preference order: best ratio first among the codecs available
+COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = zstandard.ZstdCompressor(level=10).compress
+if brotli is not None:
+    COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=5)
+COMPRESSORS["gzip"] = _gzip
+
+
+def negotiate_encoding(
+    accept_encoding: str, supported: Iterable[str] = COMPRESSORS
+) -> str | None:
+    """Pick the preferred supported encoding from an Accept-Encoding header.
+
+    ``supported`` lists the candidate encodings in server preference order.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CachedResponse:
+    """A fully buffered response plus its lazily computed compressed variants."""
+
+    def __init__(
+        self,
+        status: int,
+        headers: list[tuple[bytes, bytes]],
+        body: bytes,
+        route: object | None = None,
+    ) -> None:
+        self.status = status
+        self.route = route  # Matched route, restored into the scope on hits
+        self.headers = [
+            (k, v) for k, v in headers if k.lower() != b"content-length"
+        ]
+        self.body = body
+        self.variants: dict[str, bytes] = {}
+        self.size = len(body)  # Bytes held, body and variants
+        # Told how many bytes each new variant adds; set by ResponseCache
+        self.on_grow: Callable[[int], None] | None = None
+
+    def encoded(self, encoding: str) -> bytes:
+        """Get the body in an encoding, compressing it on first use."""
+        variant = self.variants.get(encoding)
+        if variant is None:
+            with timed("compress"):
+                variant = COMPRESSORS[encoding](self.body)
+            self.variants[encoding] = variant
+            self.size += len(variant)
+            if self.on_grow is not None:
+                self.on_grow(len(variant))
+        return variant
+
+    async def send(
+        self, send: Send, encoding: str | None, minimum_size: int = 0
+    ) -> None:
+        """Send the response, compressed with ``encoding`` when worthwhile."""
+        headers = MutableHeaders(raw=list(self.headers))
+        body = self.body
+        if encoding is not None and len(body) >= minimum_size:
+            body = self.encoded(encoding)
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+        headers["Content-Length"] = str(len(body))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": headers.raw,
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+class ResponseCache:
+    """LRU cache of responses tagged with the snapshot version that built them.
+
+    Bounded both by entry count and by ``max_bytes``, counting each body and
+    its compressed variants. Responses larger than ``max_entry_bytes`` are
+    not stored, so one large body cannot flush the rest of the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int = 8 * 1024 * 1024,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[tuple, tuple[int, CachedResponse]] = (
+            OrderedDict()
+        )
+        self.size = 0  # Bytes held by cached responses
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple, version: int) -> CachedResponse | None:
+        """Get a cached response if it was built from ``version``."""
+        item = self._entries.get(key)
+        if item is None or item[0] != version:
+            if item is not None:
+                self._remove(key)
+            self.misses += 1
+            RESPONSE_CACHE_REQUESTS.inc(result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        RESPONSE_CACHE_REQUESTS.inc(result="hit")
+        return item[1]
+
+    def put(self, key: tuple, version: int, response: CachedResponse) -> None:
+        """Store a response for a snapshot version, evicting the oldest entries.
+
+        Responses over ``max_entry_bytes`` are ignored.
+        """
+        if key in self._entries:
+            self._remove(key)
+        if response.size > self.max_entry_bytes:
+            return
+        self._entries[key] = (version, response)
+        response.on_grow = self._grow
+        self._grow(response.size)
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        for _, response in self._entries.values():
+            response.on_grow = None
+        self._entries.clear()
+        self.size = 0
+
+    def _remove(self, key: tuple) -> None:
+        _, response = self._entries.pop(key)
+        response.on_grow = None
+        self.size -= response.size
+
+    def _grow(self, size: int) -> None:
+        self.size += size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+
+
+class CompressionMiddleware:
+    """Negotiate response compression and reuse compressed bytes per snapshot.
+
+    Responses to every method are compressed when the client accepts it.
+    Successful GET responses under ``cache_prefix`` are cached keyed by path,
+    query string and the snapshot version reported by ``version_provider``,
+    within the byte limits of ``ResponseCache``.
+    A repeated request for the same version is answered from the cache
+    without running the route, and each encoding is compressed at most
+    once per cached response. Responses marked ``Cache-Control: no-store``
+    are not cached. Streaming responses and responses that
+    already carry a Content-Encoding are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        version_provider: Callable[[], int],
+        minimum_size: int = 500,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int = 8 * 1024 * 1024,
+        cache_prefix: str = "/api/",
+    ) -> None:
+        self.app = app
+        self.version_provider = version_provider
+        self.minimum_size = minimum_size
+        self.cache_prefix = cache_prefix
+        self.cache = ResponseCache(max_entries, max_bytes, max_entry_bytes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        # Profiled requests must reach the handler and their output is per-call
+        cacheable = (
+            scope["method"] == "GET"
+            and scope["path"].startswith(self.cache_prefix)
+            and "x-profile" not in request_headers
+        )
+        key = (scope["path"], scope["query_string"])
+        version = self.version_provider()
+
+        if cacheable and version:
+            with timed("respcache"):
+                cached = self.cache.get(key, version)
+            annotate("respcache", "miss" if cached is None else "hit")
+            if cached is not None:
+                if cached.route is not None:
+                    scope["route"] = cached.route
+                await cached.send(send, encoding, self.minimum_size)
+                return
+
+        start: Message | None = None
+        body: list[bytes] = []
+        passthrough = False
+
+        async def capture(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or headers.get(
+                    "content-type", ""
+                ).startswith("text/event-stream"):
+                    passthrough = True
+                    await send(message)
+                return
+
+            more_body = message.get("more_body", False)
+            if more_body and not body:
+                # Streaming response: forward as-is rather than buffering it
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            body.append(message.get("body", b""))
+            if more_body:
+                return
+
+            response = CachedResponse(
+                start["status"], start["headers"], b"".join(body), scope.get("route")
+            )
+            if (
+                cacheable
+                and response.status == 200
+                and version
+                and version == self.version_provider()
+                and "no-store" not in Headers(raw=start["headers"]).get(
+                    "cache-control", ""
+                )
+            ):
+                self.cache.put(key, version, response)
+            await response.send(send, encoding, self.minimum_size)
+
+        await self.app(scope, receive, capture)
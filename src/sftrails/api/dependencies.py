@@ -1,9 +1,22 @@
 """FastAPI dependency injection for the API."""
 
+import os
+import secrets
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from sftrails.client import InMemoryTrailSource, TrailDataSource
-from sftrails.service import TrailService
+from fastapi import Header, HTTPException
+
+from sftrails.api.stream import ChangeBroadcaster
+from sftrails.client import HTTPTrailClient, InMemoryTrailSource, TrailDataSource
+from sftrails.history import HistoryStore
+from sftrails.refresher import BackgroundRefresher
+from sftrails.service import DEFAULT_STALL_BUDGET, TrailService
+
+# The shared cache is only imported when SFTRAILS_CACHE_URL configures one
+if TYPE_CHECKING:
+    from sftrails.cache import CacheBackend, InvalidationListener
 
 # Sample data for development - in production, use HTTPTrailClient
 _SAMPLE_TRAILS = [
@@ -17,6 +30,8 @@ _SAMPLE_TRAILS = [
         "elevation_gain_ft": 2200,
         "last_updated": "2025-01-15T10:30:00",
         "notes": "Popular trail, expect crowds on weekends",
+        "latitude": 37.8955,
+        "longitude": -122.537,
     },
     {
         "id": "trail-002",
@@ -28,6 +43,8 @@ _SAMPLE_TRAILS = [
         "elevation_gain_ft": 800,
         "last_updated": "2025-01-15T09:00:00",
         "notes": "",
+        "latitude": 37.788,
+        "longitude": -122.493,
     },
     {
         "id": "trail-003",
@@ -39,6 +56,8 @@ _SAMPLE_TRAILS = [
         "elevation_gain_ft": 1100,
         "last_updated": "2025-01-14T16:45:00",
         "notes": "Closed due to storm damage",
+        "latitude": 37.9038,
+        "longitude": -122.6045,
     },
     {
         "id": "trail-004",
@@ -50,6 +69,8 @@ _SAMPLE_TRAILS = [
         "elevation_gain_ft": 400,
         "last_updated": "2025-01-15T08:00:00",
         "notes": "Section near Mile Rock closed for maintenance",
+        "latitude": 37.78,
+        "longitude": -122.511,
     },
     {
         "id": "trail-005",
@@ -61,6 +82,8 @@ _SAMPLE_TRAILS = [
         "elevation_gain_ft": 300,
         "last_updated": "2025-01-15T07:30:00",
         "notes": "Ice on north-facing sections",
+        "latitude": 37.7382,
+        "longitude": -122.4541,
     },
     {
         "id": "trail-006",
@@ -72,6 +95,8 @@ _SAMPLE_TRAILS = [
         "elevation_gain_ft": 450,
         "last_updated": "2025-01-15T11:00:00",
         "notes": "",
+        "latitude": 37.7185,
+        "longitude": -122.419,
     },
     {
         "id": "trail-007",
@@ -83,16 +108,215 @@ _SAMPLE_TRAILS = [
         "elevation_gain_ft": 250,
         "last_updated": "2025-01-15T08:30:00",
         "notes": "Beach access available",
+        "latitude": 37.8606,
+        "longitude": -122.536,
     },
 ]
 
 
+_data_source_override: TrailDataSource | None = None
+
+
 @lru_cache
 def get_data_source() -> TrailDataSource:
-    """Get the trail data source (cached singleton)."""
-    return InMemoryTrailSource(_SAMPLE_TRAILS)
+    """Get the trail data source (cached singleton).
+
+    Uses an HTTPTrailClient when SFTRAILS_UPSTREAM_URL is set (with an
+    optional SFTRAILS_UPSTREAM_TIMEOUT in seconds), otherwise the bundled
+    sample trails. With a shared cache configured, catalogs are fetched
+    through it, and refetched from upstream once older than
+    SFTRAILS_CACHE_MAX_AGE seconds (default 30).
+    """
+    if _data_source_override is not None:
+        return _data_source_override
+
+    upstream_url = os.environ.get("SFTRAILS_UPSTREAM_URL")
+    if upstream_url:
+        timeout = float(os.environ.get("SFTRAILS_UPSTREAM_TIMEOUT", "30"))
+        source: TrailDataSource = HTTPTrailClient(upstream_url, timeout=timeout)
+    else:
+        source = InMemoryTrailSource(_SAMPLE_TRAILS)
+
+    cache = get_cache()
+    if cache is not None:
+        from sftrails.cache import CachedTrailSource
+
+        max_age = float(os.environ.get("SFTRAILS_CACHE_MAX_AGE", "30"))
+        source = CachedTrailSource(source, cache, max_age=max_age)
+    return source
+
+
+def configure_data_source(source: TrailDataSource | None) -> None:
+    """Replace the API's data source, resetting the shared service.
+
+    Pass None to go back to the environment-configured default. Intended for
+    tests, benchmarks and load tests that run the app against another source.
+    """
+    global _data_source_override
+    _data_source_override = source
+    get_cache.cache_clear()
+    get_data_source.cache_clear()
+    get_history_store.cache_clear()
+    get_trail_service.cache_clear()
+    get_change_broadcaster.cache_clear()
+
+
+@lru_cache
+def get_cache() -> "CacheBackend | None":
+    """Cache shared between instances, from SFTRAILS_CACHE_URL.
+
+    ``redis://host:port/db`` uses a Redis-protocol server behind an
+    in-process L1; ``memory://`` keeps it in the process. Unset disables
+    the shared cache.
+    """
+    url = os.environ.get("SFTRAILS_CACHE_URL")
+    if not url:
+        return None
+    from sftrails.cache import create_cache
+
+    return create_cache(url)
+
+
+@lru_cache
+def _executor(kind: str) -> Executor:
+    # Kept for the life of the process; a single worker builds one
+    # snapshot at a time
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="sftrails-build")
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=1)
+    raise ValueError(f"Unknown SFTRAILS_BUILD_EXECUTOR: {kind!r}")
+
+
+def build_executor() -> Executor | None:
+    """Executor for building snapshots, from SFTRAILS_BUILD_EXECUTOR.
+
+    ``thread`` or ``process`` builds in a pool; unset or ``inline`` builds
+    on the event loop within the stall budget.
+    """
+    kind = os.environ.get("SFTRAILS_BUILD_EXECUTOR", "").lower()
+    if kind in ("", "inline"):
+        return None
+    return _executor(kind)
+
+
+def stall_budget() -> float | None:
+    """Inline build stall budget, from SFTRAILS_STALL_BUDGET_MS.
+
+    ``none`` disables yielding during inline builds.
+    """
+    value = os.environ.get("SFTRAILS_STALL_BUDGET_MS")
+    if not value:
+        return DEFAULT_STALL_BUDGET
+    if value.lower() == "none":
+        return None
+    return float(value) / 1000
+
 
+def load_capacity() -> int:
+    """Concurrent request cost admitted at once, from SFTRAILS_LOAD_CAPACITY.
 
+    ``0`` disables load shedding.
+    """
+    return int(os.environ.get("SFTRAILS_LOAD_CAPACITY", "64"))
+
+
+@lru_cache
+def get_history_store() -> HistoryStore:
+    """Get the trail status history (cached singleton).
+
+    Stored in SFTRAILS_HISTORY_DIR when set, otherwise kept in memory.
+    """
+    return HistoryStore(os.environ.get("SFTRAILS_HISTORY_DIR") or None)
+
+
+@lru_cache
 def get_trail_service() -> TrailService:
-    """Get the trail service with injected data source."""
-    return TrailService(get_data_source())
+    """Get the trail service with injected data source (cached singleton).
+
+    The service is shared across requests so its snapshot, version and
+    change listeners persist for the lifetime of the process. Every change
+    set is recorded in the history store.
+    """
+    service = TrailService(
+        get_data_source(),
+        build_executor=build_executor(),
+        stall_budget=stall_budget(),
+    )
+    service.add_listener(get_history_store().record)
+    return service
+
+
+def create_refresher() -> BackgroundRefresher | None:
+    """Background refresher for the shared service, or None if disabled.
+
+    SFTRAILS_REFRESH_INTERVAL sets the base interval in seconds (default
+    60, 0 disables) and SFTRAILS_REFRESH_JITTER the jitter fraction
+    (default 0.1).
+    """
+    interval = float(os.environ.get("SFTRAILS_REFRESH_INTERVAL", "60"))
+    if interval <= 0:
+        return None
+    jitter = float(os.environ.get("SFTRAILS_REFRESH_JITTER", "0.1"))
+    return BackgroundRefresher(get_trail_service(), interval=interval, jitter=jitter)
+
+
+def create_invalidation_listener(
+    refresher: BackgroundRefresher | None,
+) -> "InvalidationListener | None":
+    """Refresh when another instance caches a new catalog, if sharing one."""
+    if _data_source_override is None and get_cache() is None:
+        return None
+    from sftrails.cache import CachedTrailSource, InvalidationListener
+
+    source = get_data_source()
+    if not isinstance(source, CachedTrailSource):
+        return None
+    on_invalidate = (
+        refresher.refresh_once if refresher is not None else get_trail_service().refresh
+    )
+    return InvalidationListener(source, on_invalidate)
+
+
+@lru_cache
+def get_change_broadcaster() -> ChangeBroadcaster:
+    """Get the change broadcaster subscribed to the trail service."""
+    service = get_trail_service()
+    broadcaster = ChangeBroadcaster(version=service.version)
+    service.add_listener(broadcaster.publish)
+    return broadcaster
+
+
+def admin_token() -> str | None:
+    """Token guarding admin endpoints, from SFTRAILS_ADMIN_TOKEN.
+
+    Admin features are disabled when the variable is unset or empty.
+    """
+    return os.environ.get("SFTRAILS_ADMIN_TOKEN") or None
+
+
+def is_admin_authorized(authorization: str | None) -> bool:
+    """Check an ``Authorization: Bearer <token>`` header value."""
+    token = admin_token()
+    if token is None or not authorization:
+        return False
+    scheme, _, credentials = authorization.partition(" ")
+    return scheme.lower() == "bearer" and secrets.compare_digest(
+        credentials.strip().encode(), token.encode()
+    )
+
+
+def require_admin(authorization: str | None = Header(default=None)) -> None:
+    """Reject requests without a valid admin token.
+
+    Responds 404 while admin features are disabled so the endpoints are not
+    discoverable, and 401 for a missing or wrong token.
+    """
+    if admin_token() is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_authorized(authorization):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,97 @@
+"""Streaming encoders for full-catalog exports."""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Iterable, Iterator
+
+from sftrails.models import Trail
+
+EXPORT_FIELDS = (
+    "id",
+    "name",
+    "park",
+    "status",
+    "condition",
+    "length_miles",
+    "elevation_gain_ft",
+    "last_updated",
+    "notes",
+    "is_accessible",
+    "is_safe_for_hiking",
+    "latitude",
+    "longitude",
+)
+
+# Rows per chunk: large enough to avoid tiny socket writes, small enough
+# that only a bounded slice of the catalog is encoded at any one time.
+DEFAULT_CHUNK_SIZE = 500
+
+
+def trail_to_record(trail: Trail) -> dict:
+    """Convert a trail to an export record matching TrailResponse fields."""
+    record = trail.to_dict()
+    record["is_accessible"] = trail.is_accessible()
+    record["is_safe_for_hiking"] = trail.is_safe_for_hiking()
+    return record
+
+
+def _batched(trails: Iterable[Trail], size: int) -> Iterator[list[Trail]]:
+    """Split trails into lists of at most ``size`` items."""
+    batch: list[Trail] = []
+    for trail in trails:
+        batch.append(trail)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_ndjson(
+    trails: Iterable[Trail], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Encode trails as newline-delimited JSON, one chunk per batch."""
+    for batch in _batched(trails, chunk_size):
+        yield "".join(
+            json.dumps(trail_to_record(t), separators=(",", ":")) + "\n"
+            for t in batch
+        ).encode()
+
+
+def iter_csv(
+    trails: Iterable[Trail], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Encode trails as CSV with a header row, one chunk per batch."""
+    buffer = io.StringIO()
+    # Geometry is a nested list and is only included in NDJSON exports
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in _batched(trails, chunk_size):
+        writer.writerows(trail_to_record(t) for t in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a chunk stream incrementally into a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def aiter_chunks(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """Adapt a chunk iterator for StreamingResponse.
+
+    Each chunk is awaited by the ASGI server before the next is encoded,
+    so a slow consumer throttles encoding instead of buffering output.
+    """
+    for chunk in chunks:
+        yield chunk
@@ -0,0 +1,226 @@
+"""Concurrency limiting and load shedding weighted by route cost."""
+
+import asyncio
+import itertools
+import re
+from dataclasses import dataclass, field
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from sftrails.metrics import REGISTRY
+from sftrails.timing import timed
+
+SHED_REQUESTS = REGISTRY.counter(
+    "sftrails_shed_requests_total",
+    "Requests rejected with 503 by load shedding",
+    labels=("route_class", "reason"),
+)
+IN_FLIGHT_COST = REGISTRY.gauge(
+    "sftrails_load_in_flight_cost", "Total cost of requests being handled"
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "sftrails_load_queue_depth", "Requests waiting for capacity"
+)
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    """A group of routes with the same cost weight."""
+
+    name: str
+    cost: int
+
+
+CHEAP = RouteClass("cheap", 1)
+STANDARD = RouteClass("standard", 4)
+EXPENSIVE = RouteClass("expensive", 16)
+
+# First match wins; None exempts a route from limiting. Health and metrics
+# must answer during overload, and streams and profiles are long-lived by
+# design so they would hold capacity indefinitely.
+ROUTE_CLASSES: tuple[tuple[re.Pattern[str], RouteClass | None], ...] = tuple(
+    (re.compile(pattern), route_class)
+    for pattern, route_class in (
+        (r"^/(health|metrics)?$", None),
+        (r"^/admin/profile$", None),
+        (r"^/api/v1/trails/stream$", None),
+        (r"^/api/v1/trails(/search|/export)?$", EXPENSIVE),
+        (r"^/api/v1/query$", EXPENSIVE),
+        (r"^/api/v1/trails/(summary|recommended|nearby|changes)$", STANDARD),
+        (r"^/api/v1/trails/[^/]+$", CHEAP),
+        (r"^/api/v1/parks/[^/]+$", CHEAP),
+        (r"^/api/", STANDARD),
+    )
+)
+
+
+def classify(
+    path: str,
+    routes: tuple[tuple[re.Pattern[str], RouteClass | None], ...] = ROUTE_CLASSES,
+) -> RouteClass | None:
+    """Route class for a request path, or None if it is not limited."""
+    for pattern, route_class in routes:
+        if pattern.match(path):
+            return route_class
+    return None
+
+
+class LoadShedError(Exception):
+    """Raised when a request is rejected instead of queued or served."""
+
+    def __init__(self, reason: str) -> None:
+        self.reason = reason
+        super().__init__(f"Request shed: {reason}")
+
+
+@dataclass
+class _Waiter:
+    cost: int
+    seq: int
+    future: asyncio.Future[None]
+    timer: asyncio.TimerHandle | None = field(default=None)
+
+    @property
+    def priority(self) -> tuple[int, int]:
+        return self.cost, self.seq
+
+
+class ConcurrencyLimiter:
+    """Admit requests while their total cost fits within ``capacity``.
+
+    Requests that do not fit wait in a queue served cheapest first, then
+    in arrival order. When ``max_queue`` requests are already waiting, a
+    new request displaces the most expensive waiter if it is cheaper, and
+    is rejected otherwise. Waiters still queued after ``max_wait`` seconds
+    are rejected too.
+    """
+
+    def __init__(self, capacity: int, max_queue: int, max_wait: float) -> None:
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0  # Total cost of admitted requests
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for capacity."""
+        return len(self._waiters)
+
+    async def acquire(self, cost: int) -> None:
+        """Wait until ``cost`` fits; raises LoadShedError if shed instead.
+
+        Costs above the capacity are treated as the whole capacity.
+        """
+        cost = min(cost, self.capacity)
+        if len(self._waiters) >= self.max_queue:
+            victim = max(self._waiters, key=lambda w: w.priority, default=None)
+            if victim is None or victim.cost <= cost:
+                raise LoadShedError("queue_full")
+            self._drop(victim, LoadShedError("displaced"))
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(cost, next(self._seq), loop.create_future())
+        self._waiters.append(waiter)
+        self._wake()
+        if waiter.future.done():
+            return
+
+        waiter.timer = loop.call_later(
+            self.max_wait, self._drop, waiter, LoadShedError("timeout")
+        )
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                if waiter.future.exception() is None:
+                    self.release(cost)  # Admitted just as we were cancelled
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._wake()
+            raise
+
+    def release(self, cost: int) -> None:
+        """Return an admitted request's cost and admit waiters that now fit."""
+        self.in_flight -= min(cost, self.capacity)
+        self._wake()
+
+    def _drop(self, waiter: _Waiter, error: LoadShedError) -> None:
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            if waiter.timer is not None:
+                waiter.timer.cancel()
+            if not waiter.future.done():
+                waiter.future.set_exception(error)
+            self._wake()
+
+    def _wake(self) -> None:
+        # The cheapest waiter goes first, so once it does not fit none do
+        while self._waiters:
+            waiter = min(self._waiters, key=lambda w: w.priority)
+            if self.in_flight + waiter.cost > self.capacity:
+                break
+            self._waiters.remove(waiter)
+            if waiter.timer is not None:
+                waiter.timer.cancel()
+            if waiter.future.done():
+                continue  # Cancelled by its request
+            self.in_flight += waiter.cost
+            waiter.future.set_result(None)
+
+
+class LoadSheddingMiddleware:
+    """Limit concurrent work by route cost and shed load with 503s.
+
+    Each request is classified by path (see ``ROUTE_CLASSES``) and holds
+    its class's cost in a ConcurrencyLimiter until its response is sent, so
+    cheap lookups keep being served while expensive full-catalog requests
+    queue or are shed. Shed requests get ``503 Service Unavailable`` with
+    ``Retry-After``. Time spent queued is reported as the ``queue`` phase.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        capacity: int = 64,
+        max_queue: int = 128,
+        max_wait: float = 2.0,
+        retry_after: int = 1,
+        routes: tuple[tuple[re.Pattern[str], RouteClass | None], ...] = (
+            ROUTE_CLASSES
+        ),
+    ) -> None:
+        self.app = app
+        self.limiter = ConcurrencyLimiter(capacity, max_queue, max_wait)
+        self.retry_after = retry_after
+        self.routes = routes
+        IN_FLIGHT_COST.set_function(lambda: self.limiter.in_flight)
+        QUEUE_DEPTH.set_function(lambda: self.limiter.queue_depth)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route_class = (
+            classify(scope["path"], self.routes) if scope["type"] == "http" else None
+        )
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with timed("queue"):
+                await self.limiter.acquire(route_class.cost)
+        except LoadShedError as e:
+            SHED_REQUESTS.inc(route_class=route_class.name, reason=e.reason)
+            response = JSONResponse(
+                {"detail": "Server is overloaded; retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(route_class.cost)
@@ -1,10 +1,58 @@
 """FastAPI application for SF Trails API."""
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from sftrails.api.compression import CompressionMiddleware
+from sftrails.api.dependencies import (
+    create_invalidation_listener,
+    create_refresher,
+    get_history_store,
+    get_trail_service,
+    load_capacity,
+)
+from sftrails.api.limits import LoadSheddingMiddleware
+from sftrails.api.metrics import MetricsMiddleware
+from sftrails.api.profiling import ProfilingMiddleware
+from sftrails.api.routes.admin import ingest_router, router as admin_router
 from sftrails.api.routes.health import router as health_router
+from sftrails.api.routes.metrics import router as metrics_router
+from sftrails.api.routes.query import router as query_router
 from sftrails.api.routes.trails import parks_router, router as trails_router
+from sftrails.api.timing import ServerTimingMiddleware
+from sftrails.api.tracing import TracingMiddleware
+
+FRONTEND_ORIGINS = [
+    "http://localhost:3000",  # Next.js dev server
+    "http://127.0.0.1:3000",
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Load the snapshot before serving and keep it fresh in the background.
+
+    With a shared cache, catalogs cached by other instances are picked up
+    as soon as they are announced.
+    """
+    refresher = create_refresher()
+    if refresher is not None:
+        await refresher.start()
+    listener = create_invalidation_listener(refresher)
+    if listener is not None:
+        await listener.start()
+    try:
+        yield
+    finally:
+        if listener is not None:
+            await listener.stop()
+        if refresher is not None:
+            await refresher.stop()
+        await get_history_store().flush()
+
 
 app = FastAPI(
     title="SF Trails API",
@@ -12,24 +60,52 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+)
+
+# Innermost so X-Profile samples cover the route handler, not other middleware
+app.add_middleware(ProfilingMiddleware)
+
+# Inside compression so cached responses are served without taking capacity,
+# and inside Server-Timing so time spent queued is reported
+if load_capacity():
+    app.add_middleware(LoadSheddingMiddleware, capacity=load_capacity())
+
+# Compress responses, reusing compressed bytes for the same snapshot version.
+# Registered before CORS so CORS headers are applied per request on top.
+app.add_middleware(
+    CompressionMiddleware,
+    version_provider=lambda: get_trail_service().version,
+)
+
+# Outside compression so cache hits and compression time are reported too
+app.add_middleware(
+    ServerTimingMiddleware, timing_allow_origin=", ".join(FRONTEND_ORIGINS)
 )
 
 # Configure CORS for frontend access
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # Next.js dev server
-        "http://127.0.0.1:3000",
-    ],
+    allow_origins=FRONTEND_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Root span per request; no-op unless a recording tracer is installed
+app.add_middleware(TracingMiddleware)
+
+# Outermost so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(trails_router)
 app.include_router(parks_router)
+app.include_router(query_router)
+app.include_router(admin_router)
+app.include_router(ingest_router)
 
 
 @app.get("/")
@@ -0,0 +1,56 @@
+"""Request metrics middleware."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from sftrails.metrics import REGISTRY
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "sftrails_http_request_seconds",
+    "HTTP request latency by route",
+    labels=("method", "route", "status"),
+)
+REQUESTS_IN_PROGRESS = REGISTRY.gauge(
+    "sftrails_http_requests_in_progress", "HTTP requests currently being handled"
+)
+
+
+class MetricsMiddleware:
+    """Record per-route latency histograms for HTTP requests.
+
+    Requests are labelled with the route template (``/api/v1/trails/{trail_id}``)
+    rather than the raw path so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._in_progress = 0
+        REQUESTS_IN_PROGRESS.set_function(lambda: self._in_progress)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self._in_progress += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._in_progress -= 1
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
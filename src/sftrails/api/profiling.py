@@ -0,0 +1,71 @@
+"""Per-request profiling middleware."""
+
+import threading
+import time
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from sftrails.api.dependencies import admin_token, is_admin_authorized
+from sftrails.profiling import SamplingProfiler
+
+REQUEST_PROFILE_INTERVAL = 0.001
+
+
+class ProfilingMiddleware:
+    """Profile a single request when it carries an ``X-Profile`` header.
+
+    The request must also carry the admin bearer token. Instead of the normal
+    response, the client receives the collapsed stacks sampled from the event
+    loop thread while the request was handled, with the original status in
+    ``X-Profile-Status``. Concurrent requests on the same loop can appear in
+    the samples. Requests outside ``path_prefix`` are never profiled.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/") -> None:
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if "x-profile" not in headers or admin_token() is None:
+            await self.app(scope, receive, send)
+            return
+        if not is_admin_authorized(headers.get("authorization")):
+            response = PlainTextResponse(
+                "Invalid admin token",
+                status_code=401,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+            await response(scope, receive, send)
+            return
+
+        status = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profiler = SamplingProfiler(
+            interval=REQUEST_PROFILE_INTERVAL, thread_id=threading.get_ident()
+        )
+        start = time.perf_counter()
+        with profiler:
+            await self.app(scope, receive, discard)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        response = PlainTextResponse(
+            profiler.collapsed(),
+            headers={
+                "X-Profile-Samples": str(profiler.samples),
+                "X-Profile-Status": str(status),
+                "X-Profile-Duration-Ms": f"{elapsed_ms:.3f}",
+            },
+        )
+        await response(scope, receive, send)
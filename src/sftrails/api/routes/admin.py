@@ -0,0 +1,107 @@
+"""Admin endpoints for diagnosing a worker and pushing trail updates."""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from sftrails.api.dependencies import get_trail_service, require_admin
+from sftrails.api.schemas import (
+    BulkPatchRequest,
+    BulkUpdateResponse,
+    BulkUpsertRequest,
+)
+from sftrails.api.serializers import patch_to_fields, upsert_to_trail
+from sftrails.exceptions import TrailNotFoundError
+from sftrails.models import utc_now
+from sftrails.profiling import profile_for
+from sftrails.service import TrailService
+from sftrails.timing import timed
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
+
+_profile_running = False
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_process(
+    seconds: float = Query(5.0, gt=0, le=60, description="Sampling duration"),
+    interval_ms: float = Query(
+        5.0, ge=1, le=100, description="Milliseconds between samples"
+    ),
+) -> PlainTextResponse:
+    """Sample all threads of this process and return collapsed stacks.
+
+    The output can be rendered with flamegraph.pl, speedscope or inferno.
+    Only one profile runs at a time.
+    """
+    global _profile_running
+    if _profile_running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    _profile_running = True
+    try:
+        profiler = await profile_for(seconds, interval=interval_ms / 1000)
+    finally:
+        _profile_running = False
+
+    return PlainTextResponse(
+        profiler.collapsed(), headers={"X-Profile-Samples": str(profiler.samples)}
+    )
+
+
+ingest_router = APIRouter(
+    prefix="/api/v1/admin/trails",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+
+@ingest_router.put("", response_model=BulkUpdateResponse)
+async def upsert_trails(
+    request: BulkUpsertRequest,
+    service: TrailService = Depends(get_trail_service),
+) -> BulkUpdateResponse:
+    """Add or replace full trail records in bulk.
+
+    The batch is validated as a whole and applied atomically; only trails
+    that differ from the current snapshot are published as changes. Pushed
+    trails survive upstream refreshes until upstream reports a newer
+    ``last_updated`` for them.
+    """
+    with timed("decode"):
+        trails = [upsert_to_trail(item) for item in request.trails]
+    change_set = await service.apply_updates(trails)
+    return BulkUpdateResponse(
+        received=len(trails),
+        changed=len(change_set.changes) if change_set else 0,
+        version=service.version,
+    )
+
+
+@ingest_router.patch("", response_model=BulkUpdateResponse)
+async def patch_trails(
+    request: BulkPatchRequest,
+    service: TrailService = Depends(get_trail_service),
+) -> BulkUpdateResponse:
+    """Update fields of existing trails in bulk.
+
+    Later updates to the same trail override earlier ones. If any trail is
+    unknown the whole batch is rejected with 404. Null clears optional
+    fields. Patched trails are kept over refreshes like upserted ones.
+    """
+    with timed("decode"):
+        patches: dict[str, dict[str, object]] = {}
+        for item in request.updates:
+            patches.setdefault(item.id, {}).update(patch_to_fields(item))
+
+    try:
+        change_set = await service.patch_trails(patches, updated_at=utc_now())
+    except TrailNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return BulkUpdateResponse(
+        received=len(request.updates),
+        changed=len(change_set.changes) if change_set else 0,
+        version=service.version,
+    )
@@ -1,13 +1,23 @@
 """Health check endpoint."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from sftrails.api.dependencies import get_trail_service
 from sftrails.api.schemas import HealthResponse
+from sftrails.service import TrailService
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check() -> HealthResponse:
-    """Health check endpoint."""
-    return HealthResponse(status="healthy", version="0.1.0")
+async def health_check(
+    service: TrailService = Depends(get_trail_service),
+) -> HealthResponse:
+    """Health check endpoint, with the age of the trail snapshot."""
+    staleness = service.staleness
+    return HealthResponse(
+        status="healthy",
+        version="0.1.0",
+        snapshot_version=None if staleness is None else service.version,
+        staleness_seconds=staleness,
+    )
@@ -0,0 +1,16 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from sftrails.metrics import REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Expose collected metrics in Prometheus text format."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
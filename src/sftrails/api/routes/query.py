@@ -0,0 +1,135 @@
+"""Batched query endpoint answering several sub-queries from one snapshot."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+
+from sftrails.api.dependencies import get_trail_service
+from sftrails.api.schemas import (
+    BatchQueryRequest,
+    BatchQueryResponse,
+    ParksQuery,
+    SummaryQuery,
+    TrailsQuery,
+)
+from sftrails.api.serializers import (
+    TRAIL_FIELD_GETTERS,
+    park_to_response,
+    parse_fields,
+    project_trail,
+    status_summary_to_response,
+)
+from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.service import TrailService
+from sftrails.snapshot import Snapshot
+from sftrails.timing import timed
+from sftrails.tracing import start_span
+
+router = APIRouter(prefix="/api/v1/query", tags=["query"])
+
+ALL_FIELDS = tuple(TRAIL_FIELD_GETTERS)
+
+# Sub-query fields that select trails, as opposed to shaping the output
+_FILTER_FIELDS = (
+    "q",
+    "status",
+    "condition",
+    "park",
+    "exclude_status",
+    "exclude_condition",
+    "exclude_park",
+    "max_length_miles",
+    "max_elevation_gain_ft",
+)
+
+
+def _filter_key(query: TrailsQuery) -> tuple:
+    """Hashable key that is equal for sub-queries selecting the same trails."""
+    key = []
+    for name in _FILTER_FIELDS:
+        value = getattr(query, name)
+        if isinstance(value, list):
+            value = frozenset(getattr(v, "value", v) for v in value)
+        key.append(value)
+    return tuple(key)
+
+
+def _select_trails(snapshot: Snapshot, query: TrailsQuery) -> list[Trail]:
+    """Evaluate a trail sub-query's filters against a snapshot."""
+
+    def models(enum_type, values):
+        return [enum_type(v.value) for v in values] if values else None
+
+    trails = snapshot.search(
+        status=models(TrailStatus, query.status),
+        condition=models(TrailCondition, query.condition),
+        park=query.park or None,
+        max_length_miles=query.max_length_miles,
+        max_elevation_gain_ft=query.max_elevation_gain_ft,
+        exclude_status=models(TrailStatus, query.exclude_status),
+        exclude_condition=models(TrailCondition, query.exclude_condition),
+        exclude_park=query.exclude_park or None,
+    )
+    if query.q:
+        q_lower = query.q.lower()
+        trails = [t for t in trails if q_lower in t.name.lower()]
+    return trails
+
+
+@router.post("", response_model=BatchQueryResponse)
+async def batch_query(
+    request: BatchQueryRequest,
+    service: TrailService = Depends(get_trail_service),
+) -> JSONResponse:
+    """Answer summary, park and trail sub-queries in one round trip.
+
+    Every sub-query reads the same snapshot, so the results are consistent
+    with each other, and trail sub-queries with the same filters share one
+    evaluation. Results are keyed by the names given in the request.
+    """
+    fields_by_name = {}
+    for name, query in request.queries.items():
+        if isinstance(query, TrailsQuery):
+            try:
+                fields_by_name[name] = parse_fields(query.fields) or ALL_FIELDS
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"{name}: {e}")
+
+    snapshot = await service.get_snapshot()
+
+    selected: dict[tuple, list[Trail]] = {}
+    with (
+        start_span("route.batch_filter", {"queries": len(request.queries)}) as span,
+        timed("filter"),
+    ):
+        for query in request.queries.values():
+            if isinstance(query, TrailsQuery):
+                key = _filter_key(query)
+                if key not in selected:
+                    selected[key] = _select_trails(snapshot, query)
+        span.set_attribute("evaluations", len(selected))
+
+    results = {}
+    with timed("serialize"):
+        for name, query in request.queries.items():
+            if isinstance(query, SummaryQuery):
+                results[name] = status_summary_to_response(
+                    snapshot.status_counts, snapshot.condition_counts
+                ).model_dump()
+            elif isinstance(query, ParksQuery):
+                parks = sorted(snapshot.parks.values(), key=lambda p: p.name)
+                results[name] = {
+                    "parks": [park_to_response(p).model_dump() for p in parks],
+                    "total": len(parks),
+                }
+            else:
+                trails = selected[_filter_key(query)]
+                end = None if query.limit is None else query.offset + query.limit
+                fields = fields_by_name[name]
+                results[name] = {
+                    "trails": [
+                        project_trail(t, fields) for t in trails[query.offset : end]
+                    ],
+                    "total": len(trails),
+                }
+
+    return JSONResponse({"version": snapshot.version, "results": results})
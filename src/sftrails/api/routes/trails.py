@@ -1,94 +1,240 @@
 """Trail API routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-
-from sftrails.api.dependencies import get_trail_service
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from sftrails.api.compression import negotiate_encoding
+from sftrails.api.dependencies import (
+    get_change_broadcaster,
+    get_history_store,
+    get_trail_service,
+)
+from sftrails.api.export import aiter_chunks, gzip_chunks, iter_csv, iter_ndjson
 from sftrails.api.schemas import (
+    ChangeListResponse,
+    ExportFormatEnum,
+    NearbyTrailListResponse,
+    ParkDetailResponse,
+    ParkHistoryResponse,
     ParkListResponse,
-    ParkResponse,
+    RecommendedTrailListResponse,
     StatusSummaryResponse,
     TrailConditionEnum,
+    TrailHistoryResponse,
     TrailListResponse,
     TrailResponse,
     TrailStatusEnum,
 )
-from sftrails.exceptions import TrailNotFoundError
-from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.api.serializers import (
+    change_set_to_response,
+    nearby_trail_to_response,
+    park_to_detail_response,
+    park_to_response,
+    parse_fields,
+    project_trail,
+    recommended_trail_to_response,
+    status_event_to_response,
+    status_summary_to_response,
+    trail_history_to_response,
+    trail_to_response,
+)
+from sftrails.api.stream import ChangeBroadcaster
+from sftrails.exceptions import (
+    ChangeHistoryExpiredError,
+    ParkNotFoundError,
+    TrailNotFoundError,
+)
+from sftrails.history import HistoryStore, TrailHistory
+from sftrails.models import Trail, TrailCondition, TrailStatus, naive_utc, utc_now
 from sftrails.service import TrailService
+from sftrails.timing import timed
+from sftrails.tracing import start_span
 
 router = APIRouter(prefix="/api/v1/trails", tags=["trails"])
 
 
-def trail_to_response(trail: Trail) -> TrailResponse:
-    """Convert a Trail model to a TrailResponse schema."""
-    return TrailResponse(
-        id=trail.id,
-        name=trail.name,
-        park=trail.park,
-        status=TrailStatusEnum(trail.status.value),
-        condition=TrailConditionEnum(trail.condition.value),
-        length_miles=trail.length_miles,
-        elevation_gain_ft=trail.elevation_gain_ft,
-        last_updated=trail.last_updated,
-        notes=trail.notes,
-        is_accessible=trail.is_accessible(),
-        is_safe_for_hiking=trail.is_safe_for_hiking(),
+def get_fields(
+    fields: str | None = Query(
+        None, description="Comma-separated trail fields to include"
+    ),
+) -> tuple[str, ...] | None:
+    """Parse the sparse fieldset query parameter."""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# History window when only one end of the range is given
+HISTORY_WINDOW = timedelta(days=30)
+
+
+def resolve_time_range(
+    start: datetime | None, end: datetime | None, response: Response
+) -> tuple[datetime, datetime]:
+    """Fill in a history time range, defaulting to the 30 days up to now.
+
+    Bounds with a UTC offset are converted to naive UTC, the form history is
+    recorded in. Ranges reaching the present keep changing without a new
+    snapshot, so their responses are marked uncacheable.
+    """
+    start = naive_utc(start) if start is not None else None
+    end = naive_utc(end) if end is not None else None
+    now = utc_now()
+    if end is None or end > now:
+        response.headers["Cache-Control"] = "no-store"
+    if end is None:
+        end = now if start is None else start + HISTORY_WINDOW
+    if start is None:
+        start = end - HISTORY_WINDOW
+    if start >= end:
+        raise HTTPException(status_code=422, detail="'from' must be before 'to'")
+    return start, end
+
+
+def build_trail_list(
+    trails: list[Trail],
+    filters_applied: dict[str, str | None],
+    fields: tuple[str, ...] | None = None,
+) -> TrailListResponse | JSONResponse:
+    """Build a trail list response, projecting to ``fields`` when given.
+
+    Projected responses skip the pydantic models entirely and only compute
+    the requested fields for each trail.
+    """
+    with start_span("route.serialize", {"trails": len(trails)}), timed("serialize"):
+        if fields is None:
+            return TrailListResponse(
+                trails=[trail_to_response(t) for t in trails],
+                total=len(trails),
+                filters_applied=filters_applied,
+            )
+        return JSONResponse(
+            {
+                "trails": [project_trail(t, fields) for t in trails],
+                "total": len(trails),
+                "filters_applied": filters_applied,
+            }
+        )
+
+
+def _joined(values: list | None) -> str | None:
+    """Render a repeated filter for ``filters_applied``."""
+    if not values:
+        return None
+    return ",".join(getattr(v, "value", v) for v in values)
+
+
+@dataclass(frozen=True)
+class TrailFilters:
+    """Status, condition and park filters, each repeatable and negatable."""
+
+    status: list[TrailStatusEnum] | None
+    condition: list[TrailConditionEnum] | None
+    park: list[str] | None
+    exclude_status: list[TrailStatusEnum] | None
+    exclude_condition: list[TrailConditionEnum] | None
+    exclude_park: list[str] | None
+
+    def search_kwargs(self) -> dict:
+        """Keyword arguments for ``TrailService.search_trails``."""
+
+        def statuses(values):
+            return [TrailStatus(v.value) for v in values] if values else None
+
+        def conditions(values):
+            return [TrailCondition(v.value) for v in values] if values else None
+
+        return {
+            "status": statuses(self.status),
+            "condition": conditions(self.condition),
+            "park": self.park or None,
+            "exclude_status": statuses(self.exclude_status),
+            "exclude_condition": conditions(self.exclude_condition),
+            "exclude_park": self.exclude_park or None,
+        }
+
+    def applied(self) -> dict[str, str | None]:
+        """Filters for ``filters_applied``, with repeated values comma-joined."""
+        applied = {
+            "status": _joined(self.status),
+            "condition": _joined(self.condition),
+            "park": _joined(self.park),
+        }
+        for key in ("exclude_status", "exclude_condition", "exclude_park"):
+            if getattr(self, key):
+                applied[key] = _joined(getattr(self, key))
+        return applied
+
+
+def get_filters(
+    status: list[TrailStatusEnum] | None = Query(
+        None, description="Filter by status; repeat to match any of several"
+    ),
+    condition: list[TrailConditionEnum] | None = Query(
+        None, description="Filter by condition; repeat to match any of several"
+    ),
+    park: list[str] | None = Query(
+        None, description="Filter by park name; repeat to match any of several"
+    ),
+    exclude_status: list[TrailStatusEnum] | None = Query(
+        None, description="Exclude trails with this status"
+    ),
+    exclude_condition: list[TrailConditionEnum] | None = Query(
+        None, description="Exclude trails with this condition"
+    ),
+    exclude_park: list[str] | None = Query(
+        None, description="Exclude trails in this park"
+    ),
+) -> TrailFilters:
+    """Parse the repeatable status, condition and park filters."""
+    return TrailFilters(
+        status, condition, park, exclude_status, exclude_condition, exclude_park
     )
 
 
 @router.get("", response_model=TrailListResponse)
 async def list_trails(
-    status: TrailStatusEnum | None = Query(None, description="Filter by status"),
-    condition: TrailConditionEnum | None = Query(None, description="Filter by condition"),
-    park: str | None = Query(None, description="Filter by park name"),
+    filters: TrailFilters = Depends(get_filters),
     max_length_miles: float | None = Query(None, ge=0, description="Max trail length"),
     max_elevation_gain_ft: int | None = Query(None, ge=0, description="Max elevation gain"),
+    fields: tuple[str, ...] | None = Depends(get_fields),
     service: TrailService = Depends(get_trail_service),
 ) -> TrailListResponse:
     """List all trails with optional filters."""
-    # Convert enum values to model enums if provided
-    model_status = TrailStatus(status.value) if status else None
-    model_condition = TrailCondition(condition.value) if condition else None
-
     trails = await service.search_trails(
-        status=model_status,
-        condition=model_condition,
-        park=park,
+        **filters.search_kwargs(),
         max_length_miles=max_length_miles,
         max_elevation_gain_ft=max_elevation_gain_ft,
     )
 
-    return TrailListResponse(
-        trails=[trail_to_response(t) for t in trails],
-        total=len(trails),
+    return build_trail_list(
+        trails,
         filters_applied={
-            "status": status.value if status else None,
-            "condition": condition.value if condition else None,
-            "park": park,
+            **filters.applied(),
             "max_length_miles": str(max_length_miles) if max_length_miles else None,
             "max_elevation_gain_ft": str(max_elevation_gain_ft) if max_elevation_gain_ft else None,
         },
+        fields=fields,
     )
 
 
 @router.get("/search", response_model=TrailListResponse)
 async def search_trails(
     q: str | None = Query(None, description="Search query for trail name"),
-    status: TrailStatusEnum | None = Query(None, description="Filter by status"),
-    condition: TrailConditionEnum | None = Query(None, description="Filter by condition"),
-    park: str | None = Query(None, description="Filter by park name"),
+    filters: TrailFilters = Depends(get_filters),
     max_length_miles: float | None = Query(None, ge=0, description="Max trail length"),
     max_elevation_gain_ft: int | None = Query(None, ge=0, description="Max elevation gain"),
+    fields: tuple[str, ...] | None = Depends(get_fields),
     service: TrailService = Depends(get_trail_service),
 ) -> TrailListResponse:
     """Search trails with query string and filters."""
-    model_status = TrailStatus(status.value) if status else None
-    model_condition = TrailCondition(condition.value) if condition else None
-
     trails = await service.search_trails(
-        status=model_status,
-        condition=model_condition,
-        park=park,
+        **filters.search_kwargs(),
         max_length_miles=max_length_miles,
         max_elevation_gain_ft=max_elevation_gain_ft,
     )
@@ -96,57 +242,233 @@ async def search_trails(
     # Apply name search filter if provided
     if q:
         q_lower = q.lower()
-        trails = [t for t in trails if q_lower in t.name.lower()]
+        with start_span("route.name_filter", {"q": q}), timed("filter"):
+            trails = [t for t in trails if q_lower in t.name.lower()]
 
-    return TrailListResponse(
-        trails=[trail_to_response(t) for t in trails],
-        total=len(trails),
-        filters_applied={
-            "q": q,
-            "status": status.value if status else None,
-            "condition": condition.value if condition else None,
-            "park": park,
-        },
+    return build_trail_list(
+        trails,
+        filters_applied={"q": q, **filters.applied()},
+        fields=fields,
     )
 
 
+@router.get("/nearby", response_model=NearbyTrailListResponse)
+async def get_nearby_trails(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    radius: float = Query(5.0, gt=0, le=100, description="Search radius in miles"),
+    status: TrailStatusEnum | None = Query(None, description="Filter by status"),
+    condition: TrailConditionEnum | None = Query(None, description="Filter by condition"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Max results"),
+    fields: tuple[str, ...] | None = Depends(get_fields),
+    service: TrailService = Depends(get_trail_service),
+) -> NearbyTrailListResponse:
+    """Find trails near a location, nearest first."""
+    results = await service.get_nearby_trails(
+        lat,
+        lon,
+        radius,
+        status=TrailStatus(status.value) if status else None,
+        condition=TrailCondition(condition.value) if condition else None,
+    )
+    if limit is not None:
+        results = results[:limit]
+
+    filters_applied = {
+        "lat": str(lat),
+        "lon": str(lon),
+        "radius": str(radius),
+        "status": status.value if status else None,
+        "condition": condition.value if condition else None,
+    }
+    with timed("serialize"):
+        if fields is not None:
+            return JSONResponse(
+                {
+                    "trails": [
+                        {**project_trail(t, fields), "distance_miles": round(d, 3)}
+                        for t, d in results
+                    ],
+                    "total": len(results),
+                    "filters_applied": filters_applied,
+                }
+            )
+
+        return NearbyTrailListResponse(
+            trails=[nearby_trail_to_response(t, d) for t, d in results],
+            total=len(results),
+            filters_applied=filters_applied,
+        )
+
+
+@router.get("/recommended", response_model=RecommendedTrailListResponse)
+async def get_recommended_trails(
+    limit: int = Query(10, ge=1, le=100, description="Max results"),
+    fields: tuple[str, ...] | None = Depends(get_fields),
+    service: TrailService = Depends(get_trail_service),
+) -> RecommendedTrailListResponse:
+    """Best trails to hike right now, safe trails only, best first.
+
+    Trails are scored by condition, status, freshness of their last report
+    and length; see ``sftrails.ranking``.
+    """
+    results, total = await service.get_recommended_trails(limit)
+
+    with timed("serialize"):
+        if fields is not None:
+            return JSONResponse(
+                {
+                    "trails": [
+                        {**project_trail(t, fields), "score": round(score, 4)}
+                        for t, score in results
+                    ],
+                    "total": total,
+                }
+            )
+        return RecommendedTrailListResponse(
+            trails=[recommended_trail_to_response(t, score) for t, score in results],
+            total=total,
+        )
+
+
 @router.get("/summary", response_model=StatusSummaryResponse)
 async def get_status_summary(
     service: TrailService = Depends(get_trail_service),
 ) -> StatusSummaryResponse:
     """Get aggregate status summary for all trails."""
-    trails = await service.get_all_trails()
-
-    status_counts = {"open": 0, "closed": 0, "limited": 0, "unknown": 0}
-    condition_counts: dict[str, int] = {}
-
-    for trail in trails:
-        status_counts[trail.status.value] += 1
-        cond = trail.condition.value
-        condition_counts[cond] = condition_counts.get(cond, 0) + 1
-
-    return StatusSummaryResponse(
-        total_trails=len(trails),
-        open=status_counts["open"],
-        closed=status_counts["closed"],
-        limited=status_counts["limited"],
-        unknown=status_counts["unknown"],
-        by_condition=condition_counts,
+    # Counts are maintained incrementally by the service
+    status_counts, condition_counts = await service.get_status_counts()
+    return status_summary_to_response(status_counts, condition_counts)
+
+
+@router.get("/changes", response_model=ChangeListResponse)
+async def list_changes(
+    since: int = Query(0, ge=0, description="Return changes after this version"),
+    service: TrailService = Depends(get_trail_service),
+) -> ChangeListResponse:
+    """List change sets recorded after a snapshot version."""
+    await service.get_snapshot()
+
+    try:
+        change_sets = service.changes_since(since)
+    except ChangeHistoryExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+    return ChangeListResponse(
+        since=since,
+        version=service.version,
+        change_sets=[change_set_to_response(cs) for cs in change_sets],
+    )
+
+
+@router.get("/export")
+async def export_trails(
+    format: ExportFormatEnum = Query(
+        ExportFormatEnum.NDJSON, description="Output format"
+    ),
+    accept_encoding: str | None = Header(None),
+    service: TrailService = Depends(get_trail_service),
+) -> StreamingResponse:
+    """Stream the full trail catalog as NDJSON or CSV."""
+    # The stream keeps reading this snapshot even if a newer one lands
+    snapshot = await service.get_snapshot()
+
+    if format == ExportFormatEnum.CSV:
+        chunks, media_type = iter_csv(snapshot.trail_list), "text/csv"
+    else:
+        chunks, media_type = iter_ndjson(snapshot.trail_list), "application/x-ndjson"
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="trails.{format.value}"',
+        "X-Snapshot-Version": str(snapshot.version),
+    }
+    # Only gzip is streamed; honour q-values and wildcards like other routes
+    if negotiate_encoding(accept_encoding or "", ("gzip",)) == "gzip":
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(
+        aiter_chunks(chunks), media_type=media_type, headers=headers
+    )
+
+
+@router.get("/stream")
+async def stream_trail_changes(
+    since: int | None = Query(None, ge=0, description="Resume after this version"),
+    last_event_id: str | None = Header(None),
+    service: TrailService = Depends(get_trail_service),
+    broadcaster: ChangeBroadcaster = Depends(get_change_broadcaster),
+) -> StreamingResponse:
+    """Stream trail change sets as Server-Sent Events."""
+    # Make sure the initial snapshot exists so versions are meaningful
+    await service.get_snapshot()
+
+    last_version = since
+    if last_version is None and last_event_id and last_event_id.isdigit():
+        last_version = int(last_event_id)
+
+    return StreamingResponse(
+        broadcaster.subscribe(last_version),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@router.get("/{trail_id}/history", response_model=TrailHistoryResponse)
+async def get_trail_history(
+    trail_id: str,
+    response: Response,
+    start: datetime | None = Query(
+        None, alias="from", description="Start of the range (inclusive)"
+    ),
+    end: datetime | None = Query(
+        None, alias="to", description="End of the range (exclusive); default now"
+    ),
+    service: TrailService = Depends(get_trail_service),
+    history: HistoryStore = Depends(get_history_store),
+) -> TrailHistoryResponse:
+    """Get a trail's status changes and time spent per status in a range."""
+    # History is fed by snapshot changes, so make sure there is a snapshot
+    snapshot = await service.get_snapshot()
+    start, end = resolve_time_range(start, end, response)
+
+    with timed("filter"):
+        events = history.events(start, end, trail_id=trail_id)
+        summaries = history.summarize(start, end, trail_id=trail_id)
+    if summaries:
+        summary = summaries[0]
+    elif trail_id in snapshot.trails:
+        summary = TrailHistory(trail_id, snapshot.trails[trail_id].park)
+    else:
+        raise HTTPException(status_code=404, detail=f"Trail not found: {trail_id}")
+
+    with timed("serialize"):
+        return TrailHistoryResponse(
+            **trail_history_to_response(summary).model_dump(),
+            start=start,
+            end=end,
+            events=[status_event_to_response(e) for e in events],
+        )
+
+
 @router.get("/{trail_id}", response_model=TrailResponse)
 async def get_trail(
     trail_id: str,
+    fields: tuple[str, ...] | None = Depends(get_fields),
     service: TrailService = Depends(get_trail_service),
 ) -> TrailResponse:
     """Get a specific trail by ID."""
     try:
         trail = await service.get_trail(trail_id)
-        return trail_to_response(trail)
     except TrailNotFoundError:
         raise HTTPException(status_code=404, detail=f"Trail not found: {trail_id}")
 
+    with timed("serialize"):
+        if fields is not None:
+            return JSONResponse(project_trail(trail, fields))
+        return trail_to_response(trail)
+
 
 # Parks router
 parks_router = APIRouter(prefix="/api/v1/parks", tags=["parks"])
@@ -156,38 +478,82 @@ parks_router = APIRouter(prefix="/api/v1/parks", tags=["parks"])
 async def list_parks(
     service: TrailService = Depends(get_trail_service),
 ) -> ParkListResponse:
-    """List all unique parks with trail counts."""
-    trails = await service.get_all_trails()
+    """List all parks with trail counts."""
+    parks = await service.get_parks()
+    return ParkListResponse(
+        parks=[park_to_response(park) for park in parks], total=len(parks)
+    )
 
-    park_counts: dict[str, int] = {}
-    for trail in trails:
-        park_counts[trail.park] = park_counts.get(trail.park, 0) + 1
 
-    parks = [
-        ParkResponse(name=name, trail_count=count)
-        for name, count in sorted(park_counts.items())
-    ]
+@parks_router.get("/{slug}", response_model=ParkDetailResponse)
+async def get_park(
+    slug: str,
+    service: TrailService = Depends(get_trail_service),
+) -> ParkDetailResponse:
+    """Get a park's trails and aggregates by slug (or name)."""
+    try:
+        park = await service.get_park(slug)
+    except ParkNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Park not found: {slug}")
 
-    return ParkListResponse(parks=parks, total=len(parks))
+    with timed("serialize"):
+        return park_to_detail_response(park)
 
 
 @parks_router.get("/{park_name}/trails", response_model=TrailListResponse)
 async def get_park_trails(
     park_name: str,
+    fields: tuple[str, ...] | None = Depends(get_fields),
     service: TrailService = Depends(get_trail_service),
 ) -> TrailListResponse:
-    """Get all trails in a specific park."""
-    trails = await service.get_trails_by_park(park_name)
-
-    if not trails:
-        # Check if park exists at all
-        all_trails = await service.get_all_trails()
-        parks = {t.park.lower() for t in all_trails}
-        if park_name.lower() not in parks:
-            raise HTTPException(status_code=404, detail=f"Park not found: {park_name}")
-
-    return TrailListResponse(
-        trails=[trail_to_response(t) for t in trails],
-        total=len(trails),
-        filters_applied={"park": park_name},
-    )
+    """Get all trails in a park, by slug or name."""
+    try:
+        trails = await service.get_park_trails(park_name)
+    except ParkNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Park not found: {park_name}")
+
+    return build_trail_list(trails, filters_applied={"park": park_name}, fields=fields)
+
+
+@parks_router.get("/{park_name}/history", response_model=ParkHistoryResponse)
+async def get_park_history(
+    park_name: str,
+    response: Response,
+    start: datetime | None = Query(
+        None, alias="from", description="Start of the range (inclusive)"
+    ),
+    end: datetime | None = Query(
+        None, alias="to", description="End of the range (exclusive); default now"
+    ),
+    service: TrailService = Depends(get_trail_service),
+    history: HistoryStore = Depends(get_history_store),
+) -> ParkHistoryResponse:
+    """Roll up time spent per status across a park's trails in a range."""
+    park = (await service.get_snapshot()).find_park(park_name)
+    start, end = resolve_time_range(start, end, response)
+
+    with timed("aggregate"):
+        # History matches every spelling of the park, as snapshots group them
+        summaries = history.summarize(start, end, park=park_name)
+        seconds: Counter[TrailStatus] = Counter()
+        entries: Counter[TrailStatus] = Counter()
+        for summary in summaries:
+            seconds.update(summary.seconds_by_status)
+            entries.update(summary.entries_by_status)
+
+    if not summaries and park is None:
+        raise HTTPException(status_code=404, detail=f"Park not found: {park_name}")
+
+    with timed("serialize"):
+        return ParkHistoryResponse(
+            park=park.name if park is not None else summaries[0].park,
+            start=start,
+            end=end,
+            trail_count=len(summaries),
+            seconds_by_status={s.value: n for s, n in seconds.items()},
+            entries_by_status={s.value: n for s, n in entries.items()},
+            trails=[
+                trail_history_to_response(summary)
+                for summary in sorted(summaries, key=lambda h: h.trail_id)
+            ],
+        )
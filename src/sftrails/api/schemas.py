@@ -2,8 +2,9 @@
 
 from datetime import datetime
 from enum import Enum
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class TrailStatusEnum(str, Enum):
@@ -26,6 +27,13 @@ class TrailConditionEnum(str, Enum):
     UNKNOWN = "unknown"
 
 
+class ExportFormatEnum(str, Enum):
+    """Output format for catalog exports."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class TrailResponse(BaseModel):
     """Response schema for a single trail."""
 
@@ -40,10 +48,40 @@ class TrailResponse(BaseModel):
     notes: str = ""
     is_accessible: bool
     is_safe_for_hiking: bool
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
+    geometry: list[tuple[float, float]] | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class NearbyTrailResponse(TrailResponse):
+    """Response schema for a trail found by a radius search."""
+
+    distance_miles: float = Field(ge=0)
+
+
+class NearbyTrailListResponse(BaseModel):
+    """Response schema for a radius search, nearest trails first."""
+
+    trails: list[NearbyTrailResponse]
+    total: int
+    filters_applied: dict[str, str | None] = {}
+
+
+class RecommendedTrailResponse(TrailResponse):
+    """Response schema for a recommended trail."""
+
+    score: float = Field(ge=0, le=1)
+
+
+class RecommendedTrailListResponse(BaseModel):
+    """Response schema for recommended trails, best first."""
+
+    trails: list[RecommendedTrailResponse]
+    total: int  # Recommendable trails, before the limit
+
+
 class TrailListResponse(BaseModel):
     """Response schema for a list of trails."""
 
@@ -66,10 +104,21 @@ class StatusSummaryResponse(BaseModel):
 class ParkResponse(BaseModel):
     """Response schema for a park."""
 
+    slug: str
     name: str
     trail_count: int
 
 
+class ParkDetailResponse(ParkResponse):
+    """Response schema for one park with its trails and aggregates."""
+
+    trail_ids: list[str]
+    by_status: dict[str, int]
+    by_condition: dict[str, int]
+    total_length_miles: float
+    last_updated: datetime
+
+
 class ParkListResponse(BaseModel):
     """Response schema for list of parks."""
 
@@ -77,8 +126,220 @@ class ParkListResponse(BaseModel):
     total: int
 
 
+class ChangeTypeEnum(str, Enum):
+    """Kind of trail change for API responses."""
+
+    ADDED = "added"
+    REMOVED = "removed"
+    UPDATED = "updated"
+
+
+class TrailChangeResponse(BaseModel):
+    """Response schema for a single trail change."""
+
+    type: ChangeTypeEnum
+    trail_id: str
+    trail: TrailResponse | None = None
+    previous_status: TrailStatusEnum | None = None
+    previous_condition: TrailConditionEnum | None = None
+    changed_fields: list[str] = []
+
+
+class ChangeSetResponse(BaseModel):
+    """Response schema for the changes introduced by one snapshot version."""
+
+    version: int
+    timestamp: datetime
+    changes: list[TrailChangeResponse]
+
+
+class ChangeListResponse(BaseModel):
+    """Response schema for incremental change sync."""
+
+    since: int
+    version: int
+    change_sets: list[ChangeSetResponse]
+
+
+class StatusEventResponse(BaseModel):
+    """Response schema for one recorded change of trail status."""
+
+    timestamp: datetime
+    trail_id: str
+    park: str
+    status: TrailStatusEnum | None = None  # None when the trail was removed
+    condition: TrailConditionEnum | None = None
+
+
+class TrailHistorySummaryResponse(BaseModel):
+    """Response schema for the time a trail spent in each status."""
+
+    trail_id: str
+    park: str
+    seconds_by_status: dict[str, float]
+    entries_by_status: dict[str, int]
+
+
+class TrailHistoryResponse(TrailHistorySummaryResponse):
+    """Response schema for a trail's status history over a time range."""
+
+    start: datetime = Field(alias="from")
+    end: datetime = Field(alias="to")
+    events: list[StatusEventResponse]
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ParkHistoryResponse(BaseModel):
+    """Response schema for status history rolled up across a park."""
+
+    park: str
+    start: datetime = Field(alias="from")
+    end: datetime = Field(alias="to")
+    trail_count: int
+    seconds_by_status: dict[str, float]
+    entries_by_status: dict[str, int]
+    trails: list[TrailHistorySummaryResponse]
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+MAX_BULK_UPDATES = 100_000
+
+
+# Patch fields that may be set to null to clear them
+NULLABLE_PATCH_FIELDS = frozenset({"notes", "latitude", "longitude", "geometry"})
+
+
+class TrailUpsertRequest(BaseModel):
+    """Full trail record pushed through the admin API."""
+
+    id: str = Field(min_length=1)
+    name: str
+    park: str
+    status: TrailStatusEnum
+    condition: TrailConditionEnum
+    length_miles: float = Field(ge=0)
+    elevation_gain_ft: int = Field(ge=0)
+    last_updated: datetime
+    notes: str = ""
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
+    geometry: list[tuple[float, float]] | None = None
+
+
+class TrailPatchRequest(BaseModel):
+    """Partial trail update; omitted fields keep their values.
+
+    Null clears ``notes``, ``latitude``, ``longitude`` and ``geometry``, and
+    is rejected for fields a trail always has.
+    """
+
+    id: str = Field(min_length=1)
+    name: str | None = None
+    park: str | None = None
+    status: TrailStatusEnum | None = None
+    condition: TrailConditionEnum | None = None
+    length_miles: float | None = Field(None, ge=0)
+    elevation_gain_ft: int | None = Field(None, ge=0)
+    last_updated: datetime | None = None
+    notes: str | None = None
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
+    geometry: list[tuple[float, float]] | None = None
+
+    @model_validator(mode="after")
+    def _check_nulls(self) -> "TrailPatchRequest":
+        nulls = sorted(
+            name
+            for name in self.model_fields_set - NULLABLE_PATCH_FIELDS
+            if getattr(self, name) is None
+        )
+        if nulls:
+            raise ValueError(f"Fields cannot be null: {', '.join(nulls)}")
+        return self
+
+
+class BulkUpsertRequest(BaseModel):
+    """Request schema for replacing or adding trails in bulk."""
+
+    trails: list[TrailUpsertRequest] = Field(max_length=MAX_BULK_UPDATES)
+
+
+class BulkPatchRequest(BaseModel):
+    """Request schema for partial trail updates in bulk."""
+
+    updates: list[TrailPatchRequest] = Field(max_length=MAX_BULK_UPDATES)
+
+
+class BulkUpdateResponse(BaseModel):
+    """Response schema for a bulk update."""
+
+    received: int
+    changed: int
+    version: int
+
+
 class HealthResponse(BaseModel):
     """Response schema for health check."""
 
     status: str
     version: str
+    snapshot_version: int | None = None  # None until the catalog is loaded
+    staleness_seconds: float | None = None
+
+
+# Most sub-queries a single batched query may contain
+MAX_BATCH_QUERIES = 20
+
+
+class SummaryQuery(BaseModel):
+    """Batched sub-query for the status summary."""
+
+    type: Literal["summary"]
+
+
+class ParksQuery(BaseModel):
+    """Batched sub-query for the park list."""
+
+    type: Literal["parks"]
+
+
+class TrailsQuery(BaseModel):
+    """Batched sub-query for a filtered trail list.
+
+    Filters match ``GET /api/v1/trails/search``; status, condition and park
+    take lists of values.
+    """
+
+    type: Literal["trails"]
+    q: str | None = None
+    status: list[TrailStatusEnum] | None = None
+    condition: list[TrailConditionEnum] | None = None
+    park: list[str] | None = None
+    exclude_status: list[TrailStatusEnum] | None = None
+    exclude_condition: list[TrailConditionEnum] | None = None
+    exclude_park: list[str] | None = None
+    max_length_miles: float | None = Field(None, ge=0)
+    max_elevation_gain_ft: int | None = Field(None, ge=0)
+    fields: str | None = None
+    limit: int | None = Field(None, ge=1, le=1000)
+    offset: int = Field(0, ge=0)
+
+
+class BatchQueryRequest(BaseModel):
+    """Request schema for several sub-queries answered from one snapshot."""
+
+    queries: dict[
+        str,
+        Annotated[
+            SummaryQuery | ParksQuery | TrailsQuery, Field(discriminator="type")
+        ],
+    ] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+
+
+class BatchQueryResponse(BaseModel):
+    """Response schema for a batched query, keyed like the request."""
+
+    version: int
+    results: dict[str, Any]
@@ -0,0 +1,235 @@
+"""Conversion between domain models and API schemas."""
+
+from collections.abc import Callable, Mapping
+from operator import attrgetter
+
+from sftrails.api.schemas import (
+    ChangeSetResponse,
+    ChangeTypeEnum,
+    NearbyTrailResponse,
+    ParkDetailResponse,
+    ParkResponse,
+    RecommendedTrailResponse,
+    StatusEventResponse,
+    StatusSummaryResponse,
+    TrailChangeResponse,
+    TrailConditionEnum,
+    TrailHistorySummaryResponse,
+    TrailPatchRequest,
+    TrailResponse,
+    TrailStatusEnum,
+    TrailUpsertRequest,
+)
+from sftrails.changes import ChangeSet, TrailChange
+from sftrails.history import StatusEvent, TrailHistory
+from sftrails.models import Trail, TrailCondition, TrailStatus, naive_utc
+from sftrails.parks import Park
+
+
+def _trail_response_fields(trail: Trail) -> dict:
+    """Keyword arguments shared by the trail response schemas."""
+    return dict(
+        id=trail.id,
+        name=trail.name,
+        park=trail.park,
+        status=TrailStatusEnum(trail.status.value),
+        condition=TrailConditionEnum(trail.condition.value),
+        length_miles=trail.length_miles,
+        elevation_gain_ft=trail.elevation_gain_ft,
+        last_updated=trail.last_updated,
+        notes=trail.notes,
+        is_accessible=trail.is_accessible(),
+        is_safe_for_hiking=trail.is_safe_for_hiking(),
+        latitude=trail.latitude,
+        longitude=trail.longitude,
+        geometry=trail.geometry,
+    )
+
+
+def trail_to_response(trail: Trail) -> TrailResponse:
+    """Convert a Trail model to a TrailResponse schema."""
+    return TrailResponse(**_trail_response_fields(trail))
+
+
+def nearby_trail_to_response(
+    trail: Trail, distance_miles: float
+) -> NearbyTrailResponse:
+    """Convert a Trail and its distance to a NearbyTrailResponse schema."""
+    return NearbyTrailResponse(
+        **_trail_response_fields(trail), distance_miles=round(distance_miles, 3)
+    )
+
+
+def recommended_trail_to_response(
+    trail: Trail, score: float
+) -> RecommendedTrailResponse:
+    """Convert a Trail and its score to a RecommendedTrailResponse schema."""
+    return RecommendedTrailResponse(
+        **_trail_response_fields(trail), score=round(score, 4)
+    )
+
+
+# Per-field accessors for projected responses. Only the requested entries
+# are evaluated, so omitted computed fields cost nothing.
+TRAIL_FIELD_GETTERS: dict[str, Callable[[Trail], object]] = {
+    "id": attrgetter("id"),
+    "name": attrgetter("name"),
+    "park": attrgetter("park"),
+    "status": lambda t: t.status.value,
+    "condition": lambda t: t.condition.value,
+    "length_miles": attrgetter("length_miles"),
+    "elevation_gain_ft": attrgetter("elevation_gain_ft"),
+    "last_updated": lambda t: t.last_updated.isoformat(),
+    "notes": attrgetter("notes"),
+    "is_accessible": Trail.is_accessible,
+    "is_safe_for_hiking": Trail.is_safe_for_hiking,
+    "latitude": attrgetter("latitude"),
+    "longitude": attrgetter("longitude"),
+    "geometry": lambda t: (
+        [list(point) for point in t.geometry] if t.geometry is not None else None
+    ),
+}
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """Parse a comma-separated field list, or None to include every field.
+
+    Raises ValueError if any requested field is unknown.
+    """
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [name for name in names if name not in TRAIL_FIELD_GETTERS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def project_trail(trail: Trail, fields: tuple[str, ...]) -> dict:
+    """Serialize only the requested fields of a trail to a JSON-ready dict."""
+    return {name: TRAIL_FIELD_GETTERS[name](trail) for name in fields}
+
+
+def status_summary_to_response(
+    status_counts: Mapping[TrailStatus, int],
+    condition_counts: Mapping[TrailCondition, int],
+) -> StatusSummaryResponse:
+    """Convert snapshot status and condition counts to a StatusSummaryResponse."""
+    return StatusSummaryResponse(
+        total_trails=sum(status_counts.values()),
+        open=status_counts.get(TrailStatus.OPEN, 0),
+        closed=status_counts.get(TrailStatus.CLOSED, 0),
+        limited=status_counts.get(TrailStatus.LIMITED, 0),
+        unknown=status_counts.get(TrailStatus.UNKNOWN, 0),
+        by_condition={c.value: n for c, n in condition_counts.items()},
+    )
+
+
+def change_to_response(change: TrailChange) -> TrailChangeResponse:
+    """Convert a TrailChange to a TrailChangeResponse schema."""
+    return TrailChangeResponse(
+        type=ChangeTypeEnum(change.type.value),
+        trail_id=change.trail_id,
+        trail=trail_to_response(change.trail) if change.trail else None,
+        previous_status=(
+            TrailStatusEnum(change.previous_status.value)
+            if change.previous_status
+            else None
+        ),
+        previous_condition=(
+            TrailConditionEnum(change.previous_condition.value)
+            if change.previous_condition
+            else None
+        ),
+        changed_fields=list(change.changed_fields),
+    )
+
+
+def change_set_to_response(change_set: ChangeSet) -> ChangeSetResponse:
+    """Convert a ChangeSet to a ChangeSetResponse schema."""
+    return ChangeSetResponse(
+        version=change_set.version,
+        timestamp=change_set.timestamp,
+        changes=[change_to_response(c) for c in change_set.changes],
+    )
+
+
+def status_event_to_response(event: StatusEvent) -> StatusEventResponse:
+    """Convert a StatusEvent to a StatusEventResponse schema."""
+    return StatusEventResponse(
+        timestamp=event.timestamp,
+        trail_id=event.trail_id,
+        park=event.park,
+        status=TrailStatusEnum(event.status.value) if event.status else None,
+        condition=(
+            TrailConditionEnum(event.condition.value) if event.condition else None
+        ),
+    )
+
+
+def trail_history_to_response(history: TrailHistory) -> TrailHistorySummaryResponse:
+    """Convert a TrailHistory to a TrailHistorySummaryResponse schema."""
+    return TrailHistorySummaryResponse(
+        trail_id=history.trail_id,
+        park=history.park,
+        seconds_by_status={
+            s.value: seconds for s, seconds in history.seconds_by_status.items()
+        },
+        entries_by_status={
+            s.value: count for s, count in history.entries_by_status.items()
+        },
+    )
+
+
+def upsert_to_trail(item: TrailUpsertRequest) -> Trail:
+    """Convert a validated upsert request item to a Trail model."""
+    return Trail(
+        id=item.id,
+        name=item.name,
+        park=item.park,
+        status=TrailStatus(item.status.value),
+        condition=TrailCondition(item.condition.value),
+        length_miles=item.length_miles,
+        elevation_gain_ft=item.elevation_gain_ft,
+        last_updated=naive_utc(item.last_updated),
+        notes=item.notes,
+        latitude=item.latitude,
+        longitude=item.longitude,
+        geometry=item.geometry,
+    )
+
+
+def patch_to_fields(item: TrailPatchRequest) -> dict[str, object]:
+    """Get the Trail field values set by a patch request item."""
+    values: dict[str, object] = {}
+    for name in item.model_fields_set - {"id"}:
+        value = getattr(item, name)
+        if name == "status":
+            value = TrailStatus(value.value)
+        elif name == "condition":
+            value = TrailCondition(value.value)
+        elif name == "last_updated":
+            value = naive_utc(value)
+        elif name == "notes" and value is None:
+            value = ""
+        values[name] = value
+    return values
+
+
+def park_to_response(park: Park) -> ParkResponse:
+    """Convert a Park to a ParkResponse schema."""
+    return ParkResponse(slug=park.slug, name=park.name, trail_count=park.trail_count)
+
+
+def park_to_detail_response(park: Park) -> ParkDetailResponse:
+    """Convert a Park to a ParkDetailResponse schema."""
+    return ParkDetailResponse(
+        slug=park.slug,
+        name=park.name,
+        trail_count=park.trail_count,
+        trail_ids=list(park.trail_ids),
+        by_status={s.value: n for s, n in park.status_counts.items()},
+        by_condition={c.value: n for c, n in park.condition_counts.items()},
+        total_length_miles=park.total_length_miles,
+        last_updated=park.last_updated,
+    )
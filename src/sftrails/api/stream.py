@@ -0,0 +1,114 @@
+"""Server-Sent Events fan-out of trail change sets."""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+
+from sftrails.api.serializers import change_set_to_response
+from sftrails.changes import ChangeSet
+
+
+def format_event(event: str, data: str, event_id: int | None = None) -> bytes:
+    """Encode a single Server-Sent Events frame."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def _resync_event(version: int) -> bytes:
+    """Frame telling a client to reload the full catalog at a version."""
+    return format_event("resync", f'{{"version": {version}}}', version)
+
+
+class ChangeBroadcaster:
+    """Fan out change sets to any number of stream subscribers.
+
+    Each change set is encoded once on publish and appended to a bounded
+    history of frames shared by every subscriber. Subscribers keep only a
+    version cursor into that history, so publishing never diffs or encodes
+    per subscriber, and a reconnecting client can resume from the last
+    version it saw as long as it is still retained.
+
+    The initial catalog load is not broadcast as changes: every trail would
+    arrive as ``added`` in one frame. It is recorded as a ``resync`` event
+    instead, telling subscribers to load the catalog themselves.
+    """
+
+    def __init__(self, history_size: int = 256, version: int = 0) -> None:
+        self._frames: deque[tuple[int, bytes]] = deque(maxlen=history_size)
+        self._version = version
+        self._waiters: set[asyncio.Event] = set()
+
+    @property
+    def version(self) -> int:
+        """Version of the most recently published change set."""
+        return self._version
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of currently connected subscribers."""
+        return len(self._waiters)
+
+    def publish(self, change_set: ChangeSet) -> None:
+        """Encode a change set and wake all subscribers."""
+        version = change_set.version
+        if self._version == 0:
+            # Initial load of the catalog
+            frame = _resync_event(version)
+        else:
+            payload = change_set_to_response(change_set).model_dump_json()
+            frame = format_event("changes", payload, version)
+        self._frames.append((version, frame))
+        self._version = version
+        for waiter in self._waiters:
+            waiter.set()
+
+    def _frames_since(self, version: int) -> list[tuple[int, bytes]] | None:
+        """Frames newer than a version, or None if some were not retained."""
+        if version == self._version:
+            return []
+        if version > self._version or not self._frames:
+            return None
+        if self._frames[0][0] > version + 1:
+            return None
+        return [(v, frame) for v, frame in self._frames if v > version]
+
+    async def subscribe(
+        self,
+        last_version: int | None = None,
+        keepalive_seconds: float = 15.0,
+    ) -> AsyncIterator[bytes]:
+        """Yield encoded frames published after ``last_version``.
+
+        Without ``last_version`` the stream starts at the current version.
+        If the requested version can no longer be replayed, a ``resync``
+        event is sent first so the client knows to reload the full catalog.
+        """
+        wakeup = asyncio.Event()
+        self._waiters.add(wakeup)
+        cursor = self._version if last_version is None else last_version
+        try:
+            while True:
+                wakeup.clear()
+                frames = self._frames_since(cursor)
+                if frames is None:
+                    cursor = self._version
+                    yield _resync_event(cursor)
+                    continue
+                for version, frame in frames:
+                    cursor = version
+                    yield frame
+                if frames:
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+        finally:
+            self._waiters.discard(wakeup)
@@ -0,0 +1,46 @@
+"""Server-Timing response header middleware."""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from sftrails.timing import start_timing, stop_timing
+
+
+class ServerTimingMiddleware:
+    """Report per-phase request timings in a ``Server-Timing`` header.
+
+    Phases recorded with ``sftrails.timing.timed`` while the request runs
+    (cache, upstream, decode, filter, index, serialize, ...) are added to
+    the response, plus ``total`` for the time until the response started.
+    Set ``timing_allow_origin`` so cross-origin pages can read the timings.
+    """
+
+    def __init__(self, app: ASGIApp, timing_allow_origin: str | None = None) -> None:
+        self.app = app
+        self.timing_allow_origin = timing_allow_origin
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timing, token = start_timing()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    timing.header_value(total=time.perf_counter() - start),
+                )
+                if self.timing_allow_origin:
+                    headers["Timing-Allow-Origin"] = self.timing_allow_origin
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_timing(token)
@@ -0,0 +1,37 @@
+"""Request tracing middleware."""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from sftrails.tracing import start_span
+
+
+class TracingMiddleware:
+    """Open a root span per HTTP request.
+
+    Spans opened by the route, service and client while handling the
+    request become its children. With the default no-op tracer this costs
+    a single attribute lookup and two empty method calls per request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        attributes = {"http.method": scope["method"], "http.path": scope["path"]}
+        with start_span("http.request", attributes) as span:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.set_attribute("http.route", route.path)
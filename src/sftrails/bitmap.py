@@ -0,0 +1,218 @@
+"""Bitmap posting lists for evaluating trail filters as set operations."""
+
+from collections.abc import Generator, Iterable, Mapping, Sequence
+from typing import Generic, TypeVar
+
+from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.parks import slugify
+
+K = TypeVar("K")
+
+
+def bit_positions(bits: int) -> list[int]:
+    """Positions of the set bits in ``bits``, lowest first."""
+    if not bits:
+        return []
+    digits = bin(bits)[:1:-1]  # Least significant bit first
+    if bits.bit_count() * 16 < len(digits):
+        # Sparse: let str.find skip runs of zeros in C
+        positions = []
+        i = digits.find("1")
+        while i != -1:
+            positions.append(i)
+            i = digits.find("1", i + 1)
+        return positions
+    return [i for i, digit in enumerate(digits) if digit == "1"]
+
+
+class _Postings(Generic[K]):
+    """Builds one bitmap per key from positions, in linear time."""
+
+    def __init__(self, size: int) -> None:
+        self._size = (size + 7) // 8
+        self._arrays: dict[K, bytearray] = {}
+
+    def add(self, key: K, position: int) -> None:
+        array = self._arrays.get(key)
+        if array is None:
+            array = self._arrays[key] = bytearray(self._size)
+        array[position >> 3] |= 1 << (position & 7)
+
+    def bitmaps(self) -> dict[K, int]:
+        return {
+            key: int.from_bytes(array, "little")
+            for key, array in self._arrays.items()
+        }
+
+
+class FilterIndex:
+    """Bitmap posting lists over a snapshot's trail order.
+
+    Bit ``i`` stands for ``trails[i]``. Each status, condition and park
+    (by slug, as in ``Park``) maps to a Python int whose set bits mark its
+    trails, so filters combine with ``|``, ``&`` and ``& ~`` on compact
+    bitsets instead of per-trail comparisons.
+    """
+
+    def __init__(self, trails: Sequence[Trail]) -> None:
+        self._trails = trails
+        self.all = (1 << len(trails)) - 1
+        statuses: _Postings[TrailStatus] = _Postings(len(trails))
+        conditions: _Postings[TrailCondition] = _Postings(len(trails))
+        parks: _Postings[str] = _Postings(len(trails))
+        positions = {}
+        for position, trail in enumerate(trails):
+            statuses.add(trail.status, position)
+            conditions.add(trail.condition, position)
+            parks.add(slugify(trail.park), position)
+            positions[trail.id] = position
+        self.by_status = statuses.bitmaps()
+        self.by_condition = conditions.bitmaps()
+        self.by_park = parks.bitmaps()
+        self._positions: dict[str, int] | None = positions
+
+    @classmethod
+    def from_bitmaps(
+        cls,
+        trails: Sequence[Trail],
+        by_status: dict[TrailStatus, int],
+        by_condition: dict[TrailCondition, int],
+        by_park: dict[str, int],
+        positions: dict[str, int] | None = None,
+    ) -> "FilterIndex":
+        """Index over ``trails`` using bitmaps built earlier, e.g. from a file.
+
+        Trails are only read for positions that ``trails()`` returns, so a
+        lazily decoded sequence is never decoded in full by a selective query.
+        """
+        index = cls.__new__(cls)
+        index._trails = trails
+        index.all = (1 << len(trails)) - 1
+        index.by_status = by_status
+        index.by_condition = by_condition
+        index.by_park = by_park
+        index._positions = positions
+        return index
+
+    @property
+    def positions(self) -> Mapping[str, int]:
+        """Position of each trail, by trail ID."""
+        if self._positions is None:
+            self._positions = {t.id: i for i, t in enumerate(self._trails)}
+        return self._positions
+
+    def updated(
+        self, trails: Sequence[Trail], updates: Iterable[Trail]
+    ) -> "FilterIndex":
+        """Index over ``trails``, this index's trails after ``updates``.
+
+        Updated trails must keep their position and new trails must be
+        appended in the order given, as ``Snapshot.with_updates`` does; each
+        trail ID may appear once. Only the updated positions are changed.
+        """
+        positions = dict(self.positions)
+        size = len(trails)
+        old: tuple[_Postings, ...] = tuple(_Postings(size) for _ in range(3))
+        new: tuple[_Postings, ...] = tuple(_Postings(size) for _ in range(3))
+        for trail in updates:
+            position = positions.setdefault(trail.id, len(positions))
+            if position < len(self._trails):
+                _add_keys(old, self._trails[position], position)
+            _add_keys(new, trail, position)
+        return FilterIndex.from_bitmaps(
+            trails,
+            _patched(self.by_status, old[0], new[0]),
+            _patched(self.by_condition, old[1], new[1]),
+            _patched(self.by_park, old[2], new[2]),
+            positions,
+        )
+
+    @staticmethod
+    def _union(postings: dict[K, int], keys: Iterable[K]) -> int:
+        bits = 0
+        for key in keys:
+            bits |= postings.get(key, 0)
+        return bits
+
+    def select(
+        self,
+        statuses: Iterable[TrailStatus] | None = None,
+        conditions: Iterable[TrailCondition] | None = None,
+        parks: Iterable[str] | None = None,
+        exclude_statuses: Iterable[TrailStatus] = (),
+        exclude_conditions: Iterable[TrailCondition] = (),
+        exclude_parks: Iterable[str] = (),
+    ) -> int:
+        """Bitmap of trails matching any value of each given filter.
+
+        Filters left as None match everything; excluded values remove
+        trails regardless of the other filters. Parks are given by slug or
+        by any spelling of their name.
+        """
+        bits = self.all
+        if statuses is not None:
+            bits &= self._union(self.by_status, statuses)
+        if conditions is not None:
+            bits &= self._union(self.by_condition, conditions)
+        if parks is not None:
+            bits &= self._union(self.by_park, map(slugify, parks))
+        excluded = (
+            self._union(self.by_status, exclude_statuses)
+            | self._union(self.by_condition, exclude_conditions)
+            | self._union(self.by_park, map(slugify, exclude_parks))
+        )
+        return bits & ~excluded
+
+    def trails(self, bits: int) -> list[Trail]:
+        """Trails whose bits are set, in snapshot order."""
+        if bits == self.all:
+            return list(self._trails)
+        return [self._trails[i] for i in bit_positions(bits)]
+
+
+def _add_keys(postings: tuple[_Postings, ...], trail: Trail, position: int) -> None:
+    """Add a trail's status, condition and park slug at a position."""
+    postings[0].add(trail.status, position)
+    postings[1].add(trail.condition, position)
+    postings[2].add(slugify(trail.park), position)
+
+
+def _patched(
+    bitmaps: dict[K, int], removed: _Postings[K], added: _Postings[K]
+) -> dict[K, int]:
+    """Copy of ``bitmaps`` with positions moved between keys."""
+    patched = dict(bitmaps)
+    removed_bits, added_bits = removed.bitmaps(), added.bitmaps()
+    for key in removed_bits.keys() | added_bits.keys():
+        bits = patched.get(key, 0) & ~removed_bits.get(key, 0)
+        bits |= added_bits.get(key, 0)
+        if bits:
+            patched[key] = bits
+        else:
+            patched.pop(key, None)
+    return patched
+
+
+def filter_index_steps(
+    trails: Sequence[Trail], chunk_size: int
+) -> Generator[None, None, FilterIndex]:
+    """Build a FilterIndex over ``trails``, yielding after each chunk."""
+    statuses: _Postings[TrailStatus] = _Postings(len(trails))
+    conditions: _Postings[TrailCondition] = _Postings(len(trails))
+    parks: _Postings[str] = _Postings(len(trails))
+    positions = {}
+    for start in range(0, len(trails), chunk_size):
+        for position in range(start, min(start + chunk_size, len(trails))):
+            trail = trails[position]
+            statuses.add(trail.status, position)
+            conditions.add(trail.condition, position)
+            parks.add(slugify(trail.park), position)
+            positions[trail.id] = position
+        yield
+    return FilterIndex.from_bitmaps(
+        trails,
+        statuses.bitmaps(),
+        conditions.bitmaps(),
+        parks.bitmaps(),
+        positions,
+    )
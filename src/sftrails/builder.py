@@ -0,0 +1,154 @@
+"""Building snapshots without stalling the event loop.
+
+Decoding, indexing and diffing a large catalog is split into steps: each
+``*_steps`` function is a generator that yields after every chunk of work
+and returns its result. ``run_cooperatively`` runs the steps on the event
+loop, yielding to other tasks whenever a time budget is used up, while
+``run_steps`` runs them to completion, e.g. in a thread or process pool.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from collections.abc import Callable, Generator, Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, TypeVar
+
+from sftrails.changes import TrailChange, diff_removals, diff_updates
+from sftrails.geo import SpatialIndex
+from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.snapshot import Snapshot
+
+# Roughly a few milliseconds of decoding per chunk
+CHUNK_SIZE = 500
+# Loop iterations to give up each time the budget runs out; a task woken by
+# a timer or I/O needs more than one to resume
+YIELD_ITERATIONS = 3
+
+T = TypeVar("T")
+Steps = Generator[None, None, T]
+
+
+@dataclass
+class BuiltCatalog:
+    """Decoded trails with their indexes and aggregates, not yet versioned.
+
+    Plain containers only, so a catalog built in a worker process can be
+    pickled back to the server.
+    """
+
+    trails: dict[str, Trail]
+    spatial_index: SpatialIndex
+    status_counts: Counter[TrailStatus]
+    condition_counts: Counter[TrailCondition]
+    decode_seconds: float = 0.0  # Time spent working, excluding yields
+    index_seconds: float = 0.0
+
+    def to_snapshot(self, version: int) -> Snapshot:
+        """Wrap the catalog in a snapshot, taking ownership of its containers."""
+        return Snapshot(
+            version=version,
+            trails=MappingProxyType(self.trails),
+            trail_list=tuple(self.trails.values()),
+            spatial_index=self.spatial_index,
+            status_counts=MappingProxyType(self.status_counts),
+            condition_counts=MappingProxyType(self.condition_counts),
+        )
+
+    def upsert(self, trails: Iterable[Trail]) -> None:
+        """Add or replace trails, keeping the indexes and aggregates in step."""
+        removed, added = [], []
+        for trail in trails:
+            previous = self.trails.get(trail.id)
+            if previous is not None:
+                removed.append(previous)
+                self.status_counts[previous.status] -= 1
+                self.condition_counts[previous.condition] -= 1
+            added.append(trail)
+            self.status_counts[trail.status] += 1
+            self.condition_counts[trail.condition] += 1
+            self.trails[trail.id] = trail
+        if added:
+            self.spatial_index = self.spatial_index.updated(removed, added)
+            self.status_counts = +self.status_counts
+            self.condition_counts = +self.condition_counts
+
+
+def build_steps(
+    raw_trails: list[dict[str, Any]], chunk_size: int = CHUNK_SIZE
+) -> Steps[BuiltCatalog]:
+    """Decode and index raw trail records in chunks."""
+    trails: dict[str, Trail] = {}
+    decode_seconds = 0.0
+    for start in range(0, len(raw_trails), chunk_size):
+        chunk_start = time.perf_counter()
+        for raw in raw_trails[start : start + chunk_size]:
+            trails[raw["id"]] = Trail.from_dict(raw)
+        decode_seconds += time.perf_counter() - chunk_start
+        yield
+
+    spatial_index = SpatialIndex(())
+    statuses: Counter[TrailStatus] = Counter()
+    conditions: Counter[TrailCondition] = Counter()
+    trail_list = list(trails.values())
+    index_seconds = 0.0
+    for start in range(0, len(trail_list), chunk_size):
+        chunk_start = time.perf_counter()
+        chunk = trail_list[start : start + chunk_size]
+        spatial_index.extend(chunk)
+        statuses.update(t.status for t in chunk)
+        conditions.update(t.condition for t in chunk)
+        index_seconds += time.perf_counter() - chunk_start
+        yield
+
+    return BuiltCatalog(
+        trails, spatial_index, statuses, conditions, decode_seconds, index_seconds
+    )
+
+
+def diff_steps(
+    old: Mapping[str, Trail],
+    new: Mapping[str, Trail],
+    chunk_size: int = CHUNK_SIZE,
+) -> Steps[list[TrailChange]]:
+    """Diff two catalogs in chunks; same result as ``diff_trails``."""
+    changes: list[TrailChange] = []
+    trail_list = list(new.values())
+    for start in range(0, len(trail_list), chunk_size):
+        changes.extend(diff_updates(old, trail_list[start : start + chunk_size]))
+        yield
+    changes.extend(diff_removals(old, new))
+    return changes
+
+
+def run_steps(steps: Callable[..., Steps[T]], *args: Any) -> T:
+    """Run steps to completion without yielding.
+
+    Takes the generator function and its arguments rather than a generator
+    so it can be submitted to a process pool.
+    """
+    generator = steps(*args)
+    while True:
+        try:
+            next(generator)
+        except StopIteration as done:
+            return done.value
+
+
+async def run_cooperatively(steps: Steps[T], budget: float | None) -> T:
+    """Run steps on the event loop, yielding once ``budget`` seconds pass.
+
+    Other tasks are then held up for at most about the budget plus one
+    chunk. With no budget the steps run to completion without yielding.
+    """
+    deadline = None if budget is None else time.perf_counter() + budget
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+        if deadline is not None and time.perf_counter() >= deadline:
+            for _ in range(YIELD_ITERATIONS):
+                await asyncio.sleep(0)
+            deadline = time.perf_counter() + budget
@@ -0,0 +1,516 @@
+"""Cache backends shared between API instances.
+
+A ``CacheBackend`` stores bytes under string keys and relays pub/sub
+messages. ``LRUCache`` keeps both in the process; ``RedisCache`` talks to
+any server speaking the Redis protocol (see ``sftrails.respserver`` for a
+local stand-in); ``TieredCache`` puts an in-process LRU in front of a
+shared backend.
+
+``CachedTrailSource`` uses a backend so that only one instance fetches the
+catalog from upstream at a time. Catalogs are stored under versioned,
+content-addressed keys, and each new one is announced on
+``INVALIDATE_CHANNEL`` so other instances refresh from the cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Protocol
+from urllib.parse import urlsplit
+
+from sftrails.client import TrailDataSource
+from sftrails.exceptions import CacheError
+from sftrails.metrics import REGISTRY
+from sftrails.resp import RespError, encode_command, read_reply
+from sftrails.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "sftrails_shared_cache_lookups_total",
+    "Tiered cache lookups by the tier that answered",
+    labels=("result",),
+)
+CATALOG_FETCHES = REGISTRY.counter(
+    "sftrails_catalog_fetches_total",
+    "Catalogs served to the service by where they came from",
+    labels=("source",),
+)
+
+CURRENT_CATALOG_KEY = "sftrails:catalog:current"
+CATALOG_LOCK_KEY = "sftrails:catalog:lock"
+INVALIDATE_CHANNEL = "sftrails:invalidate"
+
+
+def catalog_key(digest: str) -> str:
+    """Key of the catalog with a given content digest."""
+    return f"sftrails:catalog:{digest}"
+
+
+class CacheBackend(Protocol):
+    """Protocol for cache backends.
+
+    TTLs are in seconds; None keeps an entry until it is evicted.
+    """
+
+    async def get(self, key: str) -> bytes | None:
+        """Get a value, or None if missing or expired."""
+        ...
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        """Store a value."""
+        ...
+
+    async def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        """Store a value only if the key is absent; return whether it was."""
+        ...
+
+    async def delete(self, key: str) -> None:
+        """Remove a value."""
+        ...
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        """Send a message to every subscriber of a channel."""
+        ...
+
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        """Messages published to a channel while subscribed.
+
+        The subscription starts with the first iteration; close the
+        iterator with ``aclose()`` to unsubscribe.
+        """
+        ...
+
+    async def close(self) -> None:
+        """Release connections."""
+        ...
+
+
+class LRUCache:
+    """In-process cache holding up to ``max_entries`` values.
+
+    Pub/sub only reaches subscribers in the same process.
+    """
+
+    def __init__(
+        self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[bytes, float | None]] = OrderedDict()
+        self._subscribers: dict[str, set[asyncio.Queue[bytes]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _live(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and self._clock() >= expires_at:
+            del self._entries[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        value = self._live(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        expires_at = None if ttl is None else self._clock() + ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+_Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class RedisCache:
+    """Cache backend for servers speaking the Redis protocol (RESP2).
+
+    Commands share one connection, opened on first use and reopened after
+    a failure. Each subscription gets its own connection.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        timeout: float = 5.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._connection: _Connection | None = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 5.0) -> "RedisCache":
+        """Create from a ``redis://host:port/db`` URL."""
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL: {url!r}")
+        db = int(parts.path.lstrip("/") or 0)
+        return cls(parts.hostname or "localhost", parts.port or 6379, db, timeout)
+
+    async def _connect(self) -> _Connection:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise CacheError(
+                f"Cannot connect to cache at {self.host}:{self.port}: {e}"
+            ) from e
+        if self.db:
+            writer.write(encode_command("SELECT", self.db))
+            reply = await read_reply(reader)
+            if isinstance(reply, RespError):
+                writer.close()
+                raise CacheError(f"Cannot select cache database {self.db}: {reply}")
+        return reader, writer
+
+    async def execute(self, *args: bytes | str | int | float) -> object:
+        """Send one command and return its reply.
+
+        Raises CacheError on connection problems and error replies.
+        """
+        async with self._lock:
+            if self._connection is None:
+                self._connection = await self._connect()
+            reader, writer = self._connection
+            try:
+                writer.write(encode_command(*args))
+                reply = await asyncio.wait_for(read_reply(reader), self.timeout)
+            except BaseException as e:
+                # The connection may be mid-reply, also when the caller was
+                # cancelled; start over next time rather than read its rest
+                self._connection = None
+                writer.close()
+                if isinstance(e, (OSError, asyncio.TimeoutError, CacheError)):
+                    raise CacheError(f"Cache command {args[0]} failed: {e}") from e
+                raise
+        if isinstance(reply, RespError):
+            raise CacheError(f"Cache command {args[0]} failed: {reply}")
+        return reply
+
+    @staticmethod
+    def _ttl_args(ttl: float | None) -> tuple:
+        return () if ttl is None else ("PX", max(1, int(ttl * 1000)))
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        await self.execute("SET", key, value, *self._ttl_args(ttl))
+
+    async def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        reply = await self.execute("SET", key, value, "NX", *self._ttl_args(ttl))
+        return reply is not None
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", key)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self.execute("PUBLISH", channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        reader, writer = await self._connect()
+        try:
+            writer.write(encode_command("SUBSCRIBE", channel))
+            await read_reply(reader)  # Subscription confirmation
+            while True:
+                reply = await read_reply(reader)
+                if isinstance(reply, list) and reply[:1] == [b"message"]:
+                    yield reply[2]
+        finally:
+            writer.close()
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._connection is not None:
+                self._connection[1].close()
+                self._connection = None
+
+
+class TieredCache:
+    """An in-process LRU (L1) in front of a shared backend (L2).
+
+    Reads try L1 first and copy L2 hits into it; writes go to both. L1
+    entries live at most ``l1_ttl`` seconds, which bounds how stale a
+    mutable key can be; versioned keys never change, so it does not matter
+    for them. Pub/sub goes through L2.
+    """
+
+    def __init__(
+        self, l2: CacheBackend, l1: LRUCache | None = None, l1_ttl: float = 1.0
+    ) -> None:
+        self.l1 = l1 if l1 is not None else LRUCache()
+        self.l2 = l2
+        self.l1_ttl = l1_ttl
+
+    def _l1_ttl(self, ttl: float | None) -> float:
+        return self.l1_ttl if ttl is None else min(ttl, self.l1_ttl)
+
+    async def get(self, key: str) -> bytes | None:
+        value = await self.l1.get(key)
+        if value is not None:
+            CACHE_LOOKUPS.inc(result="l1")
+            return value
+        value = await self.l2.get(key)
+        if value is None:
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+        CACHE_LOOKUPS.inc(result="l2")
+        await self.l1.set(key, value, self.l1_ttl)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        await self.l2.set(key, value, ttl)
+        await self.l1.set(key, value, self._l1_ttl(ttl))
+
+    async def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        if not await self.l2.add(key, value, ttl):
+            return False
+        await self.l1.set(key, value, self._l1_ttl(ttl))
+        return True
+
+    async def delete(self, key: str) -> None:
+        await self.l1.delete(key)
+        await self.l2.delete(key)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self.l2.publish(channel, message)
+
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        return self.l2.subscribe(channel)
+
+    async def close(self) -> None:
+        await self.l1.close()
+        await self.l2.close()
+
+
+def create_cache(url: str) -> CacheBackend:
+    """Cache backend for a URL: ``memory://`` or ``redis://host:port/db``.
+
+    Redis-protocol backends get an in-process L1 in front of them.
+    """
+    if url.startswith("memory://"):
+        return LRUCache()
+    return TieredCache(RedisCache.from_url(url))
+
+
+class CachedTrailSource:
+    """Share upstream catalog fetches between instances through a cache.
+
+    A catalog cached less than ``max_age`` seconds ago is served from the
+    cache. Otherwise one instance, holding a short-lived lock, fetches it
+    from upstream, stores it under a key derived from its content and
+    announces the new key; the others keep serving the cached catalog
+    meanwhile. Single-trail lookups go straight to upstream.
+    """
+
+    def __init__(
+        self,
+        source: TrailDataSource,
+        cache: CacheBackend,
+        max_age: float = 30.0,
+        lock_ttl: float = 10.0,
+        retention: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.source = source
+        self.cache = cache
+        self.max_age = max_age
+        self.lock_ttl = lock_ttl
+        self.retention = retention  # How long superseded catalogs stay cached
+        self.digest: str | None = None  # Digest of the last catalog returned
+        self._announced: str | None = None
+        self._clock = clock
+
+    async def _current(self) -> tuple[str, float] | None:
+        """Digest and fetch time of the newest cached catalog."""
+        pointer = await self.cache.get(CURRENT_CATALOG_KEY)
+        if pointer is None:
+            return None
+        current = json.loads(pointer)
+        return current["digest"], current["fetched_at"]
+
+    async def _cached(self, digest: str) -> list[dict] | None:
+        payload = await self.cache.get(catalog_key(digest))
+        if payload is None:
+            return None
+        CATALOG_FETCHES.inc(source="cache")
+        self.digest = digest
+        return json.loads(payload)
+
+    async def fetch_trails(self) -> list[dict]:
+        """Fetch the catalog from the cache, or from upstream if it is stale.
+
+        If the cache is unreachable, every fetch goes to upstream.
+        """
+        with start_span("cache.fetch_trails") as span:
+            try:
+                announced, self._announced = self._announced, None
+                if announced is not None and announced != self.digest:
+                    trails = await self._cached(announced)
+                    if trails is not None:
+                        span.set_attribute("source", "cache")
+                        return trails
+
+                current = await self._current()
+                if current is not None and self._clock() - current[1] < self.max_age:
+                    trails = await self._cached(current[0])
+                    if trails is not None:
+                        span.set_attribute("source", "cache")
+                        return trails
+
+                locked = await self.cache.add(CATALOG_LOCK_KEY, b"1", self.lock_ttl)
+                if not locked and current is not None:
+                    # Another instance is fetching; a stale catalog beats waiting
+                    trails = await self._cached(current[0])
+                    if trails is not None:
+                        span.set_attribute("source", "stale")
+                        return trails
+            except CacheError:
+                logger.warning("Trail cache unavailable", exc_info=True)
+                current, locked = None, False
+
+            span.set_attribute("source", "upstream")
+            try:
+                trails = await self.source.fetch_trails()
+                CATALOG_FETCHES.inc(source="upstream")
+                await self._store(trails, current[0] if current else None)
+            except CacheError:
+                logger.warning("Could not cache the trail catalog", exc_info=True)
+            finally:
+                if locked:
+                    await self._unlock()
+            return trails
+
+    async def _unlock(self) -> None:
+        try:
+            await self.cache.delete(CATALOG_LOCK_KEY)
+        except CacheError:
+            pass  # The lock expires on its own
+
+    async def _store(self, trails: list[dict], previous: str | None) -> None:
+        payload = json.dumps(trails, separators=(",", ":")).encode()
+        digest = hashlib.sha256(payload).hexdigest()[:16]
+        await self.cache.set(catalog_key(digest), payload, self.retention)
+        pointer = {"digest": digest, "fetched_at": self._clock()}
+        await self.cache.set(CURRENT_CATALOG_KEY, json.dumps(pointer).encode())
+        self.digest = digest
+        if digest != previous:
+            await self.cache.publish(INVALIDATE_CHANNEL, digest.encode())
+
+    def announce(self, digest: str) -> None:
+        """Note a catalog another instance cached, to fetch it next.
+
+        Its key never changes, so it is looked up directly rather than
+        through the current-catalog pointer, which an L1 may hold stale.
+        """
+        self._announced = digest
+
+    async def fetch_trail(self, trail_id: str) -> dict | None:
+        """Fetch a single trail from upstream."""
+        return await self.source.fetch_trail(trail_id)
+
+
+class InvalidationListener:
+    """Call ``on_invalidate`` whenever another instance caches a new catalog.
+
+    Announcements of the catalog ``source`` already holds are ignored, so
+    the instance that fetched it does not refresh twice. Lost connections
+    and unexpected errors are logged and the subscription is retried after
+    ``retry_delay`` seconds.
+    """
+
+    def __init__(
+        self,
+        source: CachedTrailSource,
+        on_invalidate: Callable[[], Awaitable[object]],
+        retry_delay: float = 5.0,
+    ) -> None:
+        self.source = source
+        self.on_invalidate = on_invalidate
+        self.retry_delay = retry_delay
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the listener task is active."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Subscribe in a background task."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="sftrails-invalidation")
+
+    async def stop(self) -> None:
+        """Unsubscribe and wait for the task to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            messages = self.source.cache.subscribe(INVALIDATE_CHANNEL)
+            try:
+                async for message in messages:
+                    digest = message.decode()
+                    if digest == self.source.digest:
+                        continue
+                    self.source.announce(digest)
+                    try:
+                        await self.on_invalidate()
+                    except Exception:
+                        logger.exception("Refresh after cache invalidation failed")
+            except CacheError:
+                logger.warning("Lost cache subscription; retrying", exc_info=True)
+            except Exception:
+                logger.exception("Cache invalidation listener failed; retrying")
+            finally:
+                await messages.aclose()
+            await asyncio.sleep(self.retry_delay)
@@ -0,0 +1,145 @@
+"""Change tracking between trail snapshots."""
+
+from collections import deque
+from collections.abc import Container, Iterable, Mapping
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from enum import Enum
+from itertools import islice
+
+from sftrails.exceptions import ChangeHistoryExpiredError
+from sftrails.models import Trail, TrailCondition, TrailStatus, utc_now
+
+
+class ChangeType(Enum):
+    """Kind of change applied to a trail between two snapshots."""
+
+    ADDED = "added"
+    REMOVED = "removed"
+    UPDATED = "updated"
+
+
+@dataclass(frozen=True)
+class TrailChange:
+    """A single trail change between two snapshots."""
+
+    type: ChangeType
+    trail_id: str
+    trail: Trail | None = None  # New state; None when the trail was removed
+    previous_status: TrailStatus | None = None
+    previous_condition: TrailCondition | None = None
+    changed_fields: tuple[str, ...] = ()
+
+    @property
+    def status_changed(self) -> bool:
+        """Check if this change moved the trail to a different status."""
+        return self.type == ChangeType.UPDATED and "status" in self.changed_fields
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """All trail changes introduced by one snapshot version."""
+
+    version: int
+    changes: tuple[TrailChange, ...]
+    timestamp: datetime = field(default_factory=utc_now)  # Naive UTC
+
+
+_TRAIL_FIELDS = tuple(f.name for f in fields(Trail))
+
+
+def _compare(trail: Trail, previous: Trail | None) -> TrailChange | None:
+    """Describe how ``trail`` differs from its previous state, if at all."""
+    if previous is None:
+        return TrailChange(ChangeType.ADDED, trail.id, trail)
+    if previous == trail:
+        return None
+    return TrailChange(
+        ChangeType.UPDATED,
+        trail.id,
+        trail,
+        previous_status=previous.status,
+        previous_condition=previous.condition,
+        changed_fields=tuple(
+            name
+            for name in _TRAIL_FIELDS
+            if getattr(previous, name) != getattr(trail, name)
+        ),
+    )
+
+
+def diff_trails(
+    old: Mapping[str, Trail], new: Mapping[str, Trail]
+) -> list[TrailChange]:
+    """Compute the changes needed to turn one trail snapshot into another."""
+    return diff_updates(old, new.values()) + diff_removals(old, new)
+
+
+def diff_removals(
+    old: Mapping[str, Trail], new: Container[str]
+) -> list[TrailChange]:
+    """Compute the removals of trails in ``old`` whose IDs are not in ``new``."""
+    return [
+        TrailChange(
+            ChangeType.REMOVED,
+            trail_id,
+            previous_status=previous.status,
+            previous_condition=previous.condition,
+        )
+        for trail_id, previous in old.items()
+        if trail_id not in new
+    ]
+
+
+def diff_updates(
+    old: Mapping[str, Trail], updates: Iterable[Trail]
+) -> list[TrailChange]:
+    """Compute the changes from upserting trails into a snapshot.
+
+    Only the updated trails are compared, so the cost is proportional to the
+    batch rather than the snapshot. Later updates to the same trail win.
+    """
+    latest = {trail.id: trail for trail in updates}
+    changes = []
+    for trail_id, trail in latest.items():
+        change = _compare(trail, old.get(trail_id))
+        if change is not None:
+            changes.append(change)
+    return changes
+
+
+class ChangeLog:
+    """Bounded ring buffer of change sets with consecutive versions."""
+
+    def __init__(self, max_size: int = 1000) -> None:
+        self._entries: deque[ChangeSet] = deque(maxlen=max_size)
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def version(self) -> int:
+        """Version of the most recent change set."""
+        return self._version
+
+    @property
+    def oldest_version(self) -> int:
+        """Oldest version whose changes can still be replayed from."""
+        if not self._entries:
+            return self._version
+        return self._entries[0].version - 1
+
+    def record(self, changes: list[TrailChange]) -> ChangeSet:
+        """Append changes as the next version and return the change set."""
+        self._version += 1
+        change_set = ChangeSet(version=self._version, changes=tuple(changes))
+        self._entries.append(change_set)
+        return change_set
+
+    def since(self, version: int) -> list[ChangeSet]:
+        """Return all change sets newer than ``version``, oldest first."""
+        if version > self._version or version < self.oldest_version:
+            raise ChangeHistoryExpiredError(version, self.oldest_version)
+        start = version - self.oldest_version
+        return list(islice(self._entries, start, None))
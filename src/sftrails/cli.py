@@ -0,0 +1,225 @@
+"""Command-line tool for building and querying snapshot files offline.
+
+    sftrails fetch --url https://trails.example.com/api -o trails.snapshot
+    sftrails query trails.snapshot --status open --park "Golden Gate Park"
+    sftrails summary trails.snapshot --format csv
+
+``fetch`` reads from an HTTP upstream (``--url``, or SFTRAILS_UPSTREAM_URL)
+or a JSON file of raw trails (``--input``, ``-`` for stdin). Query results
+go to stdout as JSON, NDJSON or CSV; errors go to stderr with exit status 1.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections.abc import Sequence
+from typing import TextIO
+
+from sftrails.api.export import EXPORT_FIELDS, trail_to_record
+from sftrails.client import HTTPTrailClient, InMemoryTrailSource, TrailDataSource
+from sftrails.exceptions import SFTrailsError
+from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.snapshot_file import SnapshotFile, write_snapshot
+
+
+async def _fetch(source: TrailDataSource) -> list[dict]:
+    try:
+        return await source.fetch_trails()
+    finally:
+        if isinstance(source, HTTPTrailClient):
+            await source.close()
+
+
+def _data_source(args: argparse.Namespace) -> TrailDataSource:
+    if args.input is not None:
+        if args.input == "-":
+            return InMemoryTrailSource(json.load(sys.stdin))
+        with open(args.input) as f:
+            return InMemoryTrailSource(json.load(f))
+    url = args.url or os.environ.get("SFTRAILS_UPSTREAM_URL")
+    if not url:
+        raise SFTrailsError("No data source: pass --url or --input")
+    return HTTPTrailClient(url, timeout=args.timeout)
+
+
+def _decode(raw: list) -> list[Trail]:
+    trails = []
+    for index, data in enumerate(raw):
+        try:
+            trails.append(Trail.from_dict(data))
+        except (KeyError, TypeError, ValueError) as e:
+            trail_id = data.get("id") if isinstance(data, dict) else None
+            record = f"{index} ({trail_id})" if trail_id else str(index)
+            reason = f"missing field {e}" if isinstance(e, KeyError) else e
+            raise SFTrailsError(f"Invalid trail record {record}: {reason}") from e
+    return trails
+
+
+def cmd_fetch(args: argparse.Namespace, out: TextIO) -> None:
+    import asyncio  # Only fetching needs an event loop
+
+    raw = asyncio.run(_fetch(_data_source(args)))
+    trails = _decode(raw)
+    size = write_snapshot(args.output, trails)
+    print(
+        f"Saved {len(trails)} trails to {args.output} ({size} bytes)",
+        file=sys.stderr,
+    )
+
+
+def _filters(args: argparse.Namespace) -> dict:
+    def enums(enum_type, values):
+        return [enum_type(v) for v in values] if values else None
+
+    return {
+        "status": enums(TrailStatus, args.status),
+        "condition": enums(TrailCondition, args.condition),
+        "park": args.park,
+        "exclude_status": enums(TrailStatus, args.exclude_status) or (),
+        "exclude_condition": enums(TrailCondition, args.exclude_condition) or (),
+        "exclude_park": args.exclude_park or (),
+        "min_length_miles": args.min_length,
+        "max_length_miles": args.max_length,
+        "min_elevation_gain_ft": args.min_elevation,
+        "max_elevation_gain_ft": args.max_elevation,
+        "name": args.name,
+    }
+
+
+def _write_records(
+    records: list[dict], fields: Sequence[str], fmt: str, out: TextIO
+) -> None:
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+    elif fmt == "ndjson":
+        for record in records:
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+    else:
+        json.dump(records, out, indent=2)
+        out.write("\n")
+
+
+def cmd_query(args: argparse.Namespace, out: TextIO) -> None:
+    snapshot = SnapshotFile.load(args.snapshot)
+    fields = args.fields.split(",") if args.fields else list(EXPORT_FIELDS)
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        raise SFTrailsError(f"Unknown fields: {', '.join(unknown)}")
+
+    positions = snapshot.select(**_filters(args))
+    if args.limit is not None:
+        positions = positions[: args.limit]
+    records = [
+        {f: record[f] for f in fields}
+        for record in (trail_to_record(snapshot.trails[p]) for p in positions)
+    ]
+    _write_records(records, fields, args.format, out)
+
+
+def _any_filter(filters: dict) -> bool:
+    # Zero bounds are filters too; only empty value lists are not
+    for value in filters.values():
+        if isinstance(value, (list, tuple)):
+            if value:
+                return True
+        elif value is not None:
+            return True
+    return False
+
+
+def cmd_summary(args: argparse.Namespace, out: TextIO) -> None:
+    snapshot = SnapshotFile.load(args.snapshot)
+    filters = _filters(args)
+    if _any_filter(filters):
+        statuses, conditions = snapshot.counts(snapshot.select(**filters))
+    else:
+        statuses, conditions = snapshot.counts()
+    summary = {
+        "total_trails": sum(statuses.values()),
+        **{s.value: statuses.get(s, 0) for s in TrailStatus},
+        "by_condition": {c.value: n for c, n in conditions.items()},
+    }
+    if args.format == "json":
+        json.dump(summary, out, indent=2)
+        out.write("\n")
+        return
+    records = [
+        {"group": "status", "value": s.value, "count": statuses.get(s, 0)}
+        for s in TrailStatus
+    ]
+    records += [
+        {"group": "condition", "value": c.value, "count": n}
+        for c, n in conditions.items()
+    ]
+    _write_records(records, ("group", "value", "count"), args.format, out)
+
+
+def _add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    statuses = [s.value for s in TrailStatus]
+    conditions = [c.value for c in TrailCondition]
+    group = parser.add_argument_group("filters (repeat a flag to match any value)")
+    group.add_argument("--status", action="append", choices=statuses)
+    group.add_argument("--condition", action="append", choices=conditions)
+    group.add_argument("--park", action="append")
+    group.add_argument("--exclude-status", action="append", choices=statuses)
+    group.add_argument("--exclude-condition", action="append", choices=conditions)
+    group.add_argument("--exclude-park", action="append")
+    group.add_argument("--min-length", type=float, metavar="MILES")
+    group.add_argument("--max-length", type=float, metavar="MILES")
+    group.add_argument("--min-elevation", type=int, metavar="FEET")
+    group.add_argument("--max-elevation", type=int, metavar="FEET")
+    group.add_argument("--name", help="Case-insensitive substring of the name")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser for the ``sftrails`` command."""
+    parser = argparse.ArgumentParser(
+        prog="sftrails", description=__doc__.splitlines()[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser("fetch", help="Fetch trails and save a snapshot")
+    source = fetch.add_mutually_exclusive_group()
+    source.add_argument("--url", help="Upstream trail API base URL")
+    source.add_argument("--input", help="JSON file of raw trails, or - for stdin")
+    fetch.add_argument("--timeout", type=float, default=30.0)
+    fetch.add_argument("-o", "--output", required=True, help="Snapshot file to write")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    query = commands.add_parser("query", help="List trails matching filters")
+    query.add_argument("snapshot")
+    _add_filter_arguments(query)
+    query.add_argument("--fields", help="Comma-separated fields to output")
+    query.add_argument("--limit", type=int)
+    query.add_argument("--format", choices=["json", "ndjson", "csv"], default="json")
+    query.set_defaults(handler=cmd_query)
+
+    summary = commands.add_parser("summary", help="Count trails by status")
+    summary.add_argument("snapshot")
+    _add_filter_arguments(summary)
+    summary.add_argument("--format", choices=["json", "csv"], default="json")
+    summary.set_defaults(handler=cmd_summary)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None, out: TextIO | None = None) -> int:
+    """Run the command line; returns the exit status."""
+    args = build_parser().parse_args(argv)
+    try:
+        args.handler(args, out if out is not None else sys.stdout)
+    except BrokenPipeError:
+        # The reader (e.g. ``head``) exited; silence the flush at shutdown
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (SFTrailsError, OSError, ValueError) as e:
+        print(f"sftrails: error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,27 @@
 """HTTP client for fetching trail data from external sources."""
 
-from typing import Protocol
-
-import httpx
+import time
+from typing import TYPE_CHECKING, Protocol
 
 from sftrails.exceptions import DataFetchError
+from sftrails.metrics import REGISTRY
+from sftrails.tracing import start_span
+
+# httpx is imported on first use so the service and CLI tools that only read
+# in-memory or cached catalogs do not pay for it at startup
+if TYPE_CHECKING:
+    import httpx
+
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "sftrails_upstream_request_seconds",
+    "Latency of upstream trail API requests",
+    labels=("operation",),
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "sftrails_upstream_errors_total",
+    "Failed upstream trail API requests",
+    labels=("operation",),
+)
 
 
 class TrailDataSource(Protocol):
@@ -22,17 +39,26 @@ class TrailDataSource(Protocol):
 class HTTPTrailClient:
     """HTTP client for fetching trail data from a REST API."""
 
-    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 30.0,
+        transport: "httpx.AsyncBaseTransport | None" = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        self._client: httpx.AsyncClient | None = None
+        self.transport = transport  # e.g. httpx.MockTransport for local testing
+        self._client: "httpx.AsyncClient | None" = None
 
-    async def _get_client(self) -> httpx.AsyncClient:
+    async def _get_client(self) -> "httpx.AsyncClient":
         """Get or create the HTTP client."""
+        import httpx
+
         if self._client is None or self._client.is_closed:
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
                 timeout=self.timeout,
+                transport=self.transport,
             )
         return self._client
 
@@ -44,25 +70,43 @@ class HTTPTrailClient:
 
     async def fetch_trails(self) -> list[dict]:
         """Fetch all trails from the API."""
+        import httpx
+
         client = await self._get_client()
+        start = time.perf_counter()
         try:
-            response = await client.get("/trails")
-            response.raise_for_status()
-            return response.json()
+            with start_span("upstream.fetch_trails"):
+                response = await client.get("/trails")
+                response.raise_for_status()
+                return response.json()
         except httpx.HTTPError as e:
+            UPSTREAM_ERRORS.inc(operation="fetch_trails")
             raise DataFetchError(f"Failed to fetch trails: {e}", cause=e)
+        finally:
+            UPSTREAM_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, operation="fetch_trails"
+            )
 
     async def fetch_trail(self, trail_id: str) -> dict | None:
         """Fetch a single trail by ID."""
+        import httpx
+
         client = await self._get_client()
+        start = time.perf_counter()
         try:
-            response = await client.get(f"/trails/{trail_id}")
-            if response.status_code == 404:
-                return None
-            response.raise_for_status()
-            return response.json()
+            with start_span("upstream.fetch_trail", {"trail_id": trail_id}):
+                response = await client.get(f"/trails/{trail_id}")
+                if response.status_code == 404:
+                    return None
+                response.raise_for_status()
+                return response.json()
         except httpx.HTTPError as e:
+            UPSTREAM_ERRORS.inc(operation="fetch_trail")
             raise DataFetchError(f"Failed to fetch trail {trail_id}: {e}", cause=e)
+        finally:
+            UPSTREAM_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, operation="fetch_trail"
+            )
 
     async def __aenter__(self) -> "HTTPTrailClient":
         """Async context manager entry."""
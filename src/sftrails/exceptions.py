@@ -15,9 +15,37 @@ class TrailNotFoundError(SFTrailsError):
         super().__init__(f"Trail not found: {trail_id}")
 
 
+class ParkNotFoundError(SFTrailsError):
+    """Raised when a park is not found."""
+
+    def __init__(self, park: str) -> None:
+        self.park = park
+        super().__init__(f"Park not found: {park}")
+
+
 class DataFetchError(SFTrailsError):
     """Raised when trail data cannot be fetched."""
 
     def __init__(self, message: str, cause: Exception | None = None) -> None:
         self.cause = cause
         super().__init__(message)
+
+
+class ChangeHistoryExpiredError(SFTrailsError):
+    """Raised when changes since a version are no longer retained."""
+
+    def __init__(self, since: int, oldest_version: int) -> None:
+        self.since = since
+        self.oldest_version = oldest_version
+        super().__init__(
+            f"Changes since version {since} are no longer available "
+            f"(oldest retained version is {oldest_version})"
+        )
+
+
+class CacheError(SFTrailsError):
+    """Raised when a shared cache backend cannot be reached or misbehaves."""
+
+
+class SnapshotFileError(SFTrailsError):
+    """Raised when a saved snapshot file cannot be read."""
@@ -0,0 +1,130 @@
+"""Geospatial helpers and a grid index over trailhead locations."""
+
+import math
+from collections.abc import Iterable
+
+from sftrails.models import Trail
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+class SpatialIndex:
+    """Uniform lat/lon grid over trailheads for radius queries.
+
+    Trails are bucketed into square cells of ``cell_degrees``. A radius
+    query only visits the cells overlapping the query's bounding box and
+    computes exact distances for the trails in them.
+    """
+
+    def __init__(self, trails: Iterable[Trail], cell_degrees: float = 0.05) -> None:
+        self.cell_degrees = cell_degrees
+        self._cells: dict[tuple[int, int], list[Trail]] = {}
+        self._size = 0
+        self.extend(trails)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def updated(
+        self, removed: Iterable[Trail], added: Iterable[Trail]
+    ) -> "SpatialIndex":
+        """Copy of the index with trails removed and added.
+
+        This index is left untouched so concurrent readers are unaffected;
+        only the cells that change are copied.
+        """
+        removed, added = list(removed), list(added)
+        index = SpatialIndex((), self.cell_degrees)
+        index._cells = dict(self._cells)
+        index._size = self._size
+        for trail in removed + added:
+            if trail.has_location:
+                key = self._cell(trail.latitude, trail.longitude)
+                cell = self._cells.get(key)
+                if cell is not None and index._cells[key] is cell:
+                    index._cells[key] = list(cell)
+        for trail in removed:
+            index._remove(trail)
+        for trail in added:
+            index._add(trail)
+        return index
+
+    def extend(self, trails: Iterable[Trail]) -> None:
+        """Add trails to an index that is still being built.
+
+        Indexes are shared once published in a snapshot; use ``updated``
+        to change those.
+        """
+        for trail in trails:
+            self._add(trail)
+
+    def _add(self, trail: Trail) -> None:
+        """Index a trail; trails without a location are ignored."""
+        if trail.has_location:
+            key = self._cell(trail.latitude, trail.longitude)
+            self._cells.setdefault(key, []).append(trail)
+            self._size += 1
+
+    def _remove(self, trail: Trail) -> None:
+        """Remove a previously added trail, matched by ID."""
+        if not trail.has_location:
+            return
+        key = self._cell(trail.latitude, trail.longitude)
+        cell = self._cells.get(key, [])
+        for i, indexed in enumerate(cell):
+            if indexed.id == trail.id:
+                del cell[i]
+                self._size -= 1
+                break
+        if not cell:
+            self._cells.pop(key, None)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (
+            math.floor(lat / self.cell_degrees),
+            math.floor(lon / self.cell_degrees),
+        )
+
+    def nearby(
+        self, lat: float, lon: float, radius_miles: float
+    ) -> list[tuple[Trail, float]]:
+        """Find trails within a radius, ordered by distance (nearest first)."""
+        lat_span = radius_miles / MILES_PER_DEGREE_LAT
+        # Longitude degrees shrink towards the poles; clamp to avoid blowups
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        lon_span = radius_miles / (MILES_PER_DEGREE_LAT * cos_lat)
+
+        min_i, min_j = self._cell(lat - lat_span, lon - lon_span)
+        max_i, max_j = self._cell(lat + lat_span, lon + lon_span)
+
+        results = []
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(self._cells):
+            # Huge radius: scanning occupied cells is cheaper than the box
+            candidates = (t for cell in self._cells.values() for t in cell)
+        else:
+            candidates = (
+                t
+                for i in range(min_i, max_i + 1)
+                for j in range(min_j, max_j + 1)
+                for t in self._cells.get((i, j), ())
+            )
+        for trail in candidates:
+            distance = haversine_miles(lat, lon, trail.latitude, trail.longitude)
+            if distance <= radius_miles:
+                results.append((trail, distance))
+
+        results.sort(key=lambda item: item[1])
+        return results
@@ -0,0 +1,405 @@
+"""Append-only trail status history in time-partitioned segments.
+
+Each status, condition or park change seen in a snapshot diff is appended
+as an event to the segment for its calendar month. A segment starts with a
+baseline of every trail's state when it was opened, so the state at any
+moment can be rebuilt from a single segment. Events within a segment are
+in time order and indexed per trail, so range queries bisect rather than
+scan.
+
+With a directory, segments are ``YYYY-MM.jsonl`` files holding one compact
+JSON array per line. Only the current segment is written to; older ones
+are immutable and loaded on demand into a small LRU cache. Inside an event
+loop, appends are written by a background task in a worker thread, so
+recording a change set never blocks on disk.
+
+Timestamps are naive UTC, like the rest of the catalog.
+"""
+
+import asyncio
+import json
+import logging
+import queue
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+
+from sftrails.changes import ChangeSet, ChangeType
+from sftrails.models import TrailCondition, TrailStatus, utc_now
+from sftrails.parks import slugify
+
+logger = logging.getLogger(__name__)
+
+_BASELINE = "b"
+_EVENT = "e"
+
+
+@dataclass(frozen=True)
+class StatusEvent:
+    """A trail's status, condition and park from ``timestamp`` onwards."""
+
+    timestamp: datetime
+    trail_id: str
+    park: str
+    status: TrailStatus | None  # None once the trail was removed
+    condition: TrailCondition | None
+
+    def to_row(self, kind: str) -> str:
+        """Encode as one segment file line."""
+        return json.dumps(
+            [
+                kind,
+                self.timestamp.isoformat(),
+                self.trail_id,
+                self.park,
+                self.status.value if self.status else None,
+                self.condition.value if self.condition else None,
+            ],
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_row(cls, row: list) -> "StatusEvent":
+        """Decode a segment file line parsed as JSON, without its kind."""
+        _, timestamp, trail_id, park, status, condition = row
+        return cls(
+            timestamp=datetime.fromisoformat(timestamp),
+            trail_id=trail_id,
+            park=park,
+            status=TrailStatus(status) if status else None,
+            condition=TrailCondition(condition) if condition else None,
+        )
+
+
+@dataclass
+class TrailHistory:
+    """How long a trail spent in each status over a time range."""
+
+    trail_id: str
+    park: str
+    seconds_by_status: Counter[TrailStatus] = field(default_factory=Counter)
+    # How many times the trail changed into each status within the range
+    entries_by_status: Counter[TrailStatus] = field(default_factory=Counter)
+
+
+def _park_matcher(park: str) -> Callable[[str], bool]:
+    """Match park names recorded in events against a park name or slug.
+
+    Names are compared by slug, like parks in a snapshot, so every spelling
+    of a park matches.
+    """
+    slug = slugify(park)
+    matches: dict[str, bool] = {}
+
+    def match(name: str) -> bool:
+        result = matches.get(name)
+        if result is None:
+            result = matches[name] = slugify(name) == slug
+        return result
+
+    return match
+
+
+def _month_key(when: datetime) -> str:
+    return f"{when:%Y-%m}"
+
+
+def _month_start(key: str) -> datetime:
+    return datetime.strptime(key, "%Y-%m")
+
+
+class _Segment:
+    """One month of history: a baseline plus time-ordered events."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.baseline: dict[str, StatusEvent] = {}
+        self.events: list[StatusEvent] = []
+        self.timestamps: list[datetime] = []
+        self.by_trail: dict[str, list[int]] = {}
+
+    def append(self, event: StatusEvent) -> None:
+        self.by_trail.setdefault(event.trail_id, []).append(len(self.events))
+        self.events.append(event)
+        self.timestamps.append(event.timestamp)
+
+    def state_at(self, when: datetime) -> dict[str, StatusEvent]:
+        """Latest event per trail at or before ``when``."""
+        state = dict(self.baseline)
+        for event in self.events[: bisect_right(self.timestamps, when)]:
+            state[event.trail_id] = event
+        return state
+
+    def between(
+        self, start: datetime, end: datetime, trail_id: str | None = None
+    ) -> list[StatusEvent]:
+        """Events in ``[start, end)``, optionally for one trail."""
+        if trail_id is None:
+            lo = bisect_left(self.timestamps, start)
+            hi = bisect_left(self.timestamps, end)
+            return self.events[lo:hi]
+
+        positions = self.by_trail.get(trail_id, [])
+        lo = bisect_left(positions, start, key=self.timestamps.__getitem__)
+        hi = bisect_left(positions, end, key=self.timestamps.__getitem__)
+        return [self.events[i] for i in positions[lo:hi]]
+
+    @classmethod
+    def read(cls, key: str, lines: Iterable[str]) -> "_Segment":
+        segment = cls(key)
+        for line in lines:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            event = StatusEvent.from_row(row)
+            if row[0] == _BASELINE:
+                segment.baseline[event.trail_id] = event
+            else:
+                segment.append(event)
+        return segment
+
+
+class HistoryStore:
+    """Trail status history fed from change sets.
+
+    Register ``record`` as a TrailService listener. Without a directory the
+    history is kept in memory only. Await ``flush`` before shutting down to
+    finish writing recorded events.
+    """
+
+    def __init__(
+        self, directory: str | Path | None = None, max_cached_segments: int = 24
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self.max_cached_segments = max_cached_segments
+        self._closed: OrderedDict[str, _Segment] = OrderedDict()
+        self._current: _Segment | None = None
+        self._keys: list[str] = []
+        self._latest: dict[str, StatusEvent] = {}
+        # Segment rows recorded but not yet written, drained by a worker
+        # thread while the loop appends, and the task writing them
+        self._pending: queue.SimpleQueue[tuple[str, list[str]]] = queue.SimpleQueue()
+        self._writer: asyncio.Task[None] | None = None
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._keys = sorted(path.stem for path in self.directory.glob("*.jsonl"))
+            if self._keys:
+                self._current = self._read(self._keys[-1])
+                self._latest = self._current.state_at(datetime.max)
+
+    def __len__(self) -> int:
+        """Number of trails with any recorded history."""
+        return len(self._latest)
+
+    @property
+    def segment_keys(self) -> list[str]:
+        """Months with recorded history, oldest first."""
+        return list(self._keys)
+
+    def record(self, change_set: ChangeSet) -> int:
+        """Append the status-relevant changes in a change set.
+
+        Changes that leave a trail's status, condition and park as last
+        recorded are skipped. Returns the number of events appended.
+        """
+        events = []
+        for change in change_set.changes:
+            previous = self._latest.get(change.trail_id)
+            if change.type == ChangeType.REMOVED:
+                if previous is None or previous.status is None:
+                    continue
+                event = StatusEvent(
+                    change_set.timestamp, change.trail_id, previous.park, None, None
+                )
+            else:
+                trail = change.trail
+                if previous is not None and (
+                    previous.park,
+                    previous.status,
+                    previous.condition,
+                ) == (trail.park, trail.status, trail.condition):
+                    continue
+                event = StatusEvent(
+                    change_set.timestamp,
+                    trail.id,
+                    trail.park,
+                    trail.status,
+                    trail.condition,
+                )
+            events.append(event)
+
+        if events:
+            self._append(events)
+        return len(events)
+
+    def _append(self, events: list[StatusEvent]) -> None:
+        timestamp = events[0].timestamp
+        key = _month_key(timestamp)
+        if self._current is None or key > self._current.key:
+            self._open_segment(key)
+        else:
+            # Keep segments in time order even if the clock went backwards
+            last = self._current.timestamps[-1] if self._current.events else None
+            if key < self._current.key or (last is not None and timestamp < last):
+                timestamp = last or _month_start(self._current.key)
+                events = [replace(event, timestamp=timestamp) for event in events]
+
+        for event in events:
+            self._current.append(event)
+            self._latest[event.trail_id] = event
+        self._write(self._current.key, (event.to_row(_EVENT) for event in events))
+
+    def _open_segment(self, key: str) -> None:
+        """Close the current segment and start one for a new month."""
+        if self._current is not None:
+            self._cache(self._current)
+        segment = _Segment(key)
+        start = _month_start(key)
+        segment.baseline = {
+            trail_id: replace(event, timestamp=start)
+            for trail_id, event in self._latest.items()
+            if event.status is not None
+        }
+        self._current = segment
+        self._keys.append(key)
+        self._write(
+            key, (event.to_row(_BASELINE) for event in segment.baseline.values())
+        )
+
+    def _write(self, key: str, rows: Iterator[str]) -> None:
+        if self.directory is None:
+            return
+        self._pending.put((key, list(rows)))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to block, as in scripts; write straight away
+            self._write_pending()
+            return
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._write_in_background())
+
+    async def _write_in_background(self) -> None:
+        while not self._pending.empty():
+            try:
+                await asyncio.to_thread(self._write_pending)
+            except Exception:
+                logger.exception("Could not write trail history")
+
+    def _write_pending(self) -> None:
+        """Append pending rows to their segment files, oldest first."""
+        while True:
+            try:
+                key, rows = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            with open(self.directory / f"{key}.jsonl", "a", encoding="utf-8") as f:
+                f.writelines(f"{row}\n" for row in rows)
+
+    async def flush(self) -> None:
+        """Wait until every recorded event has been written."""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    def _read(self, key: str) -> _Segment:
+        with open(self.directory / f"{key}.jsonl", encoding="utf-8") as f:
+            return _Segment.read(key, f)
+
+    def _cache(self, segment: _Segment) -> None:
+        self._closed[segment.key] = segment
+        self._closed.move_to_end(segment.key)
+        # In-memory history has nowhere else to live, so never evict it
+        if self.directory is not None:
+            while len(self._closed) > self.max_cached_segments:
+                self._closed.popitem(last=False)
+
+    def _segment(self, key: str) -> _Segment:
+        if self._current is not None and key == self._current.key:
+            return self._current
+        segment = self._closed.get(key)
+        if segment is None:
+            segment = self._read(key)
+        self._cache(segment)
+        return segment
+
+    def state_at(self, when: datetime) -> dict[str, StatusEvent]:
+        """Latest recorded event per trail at ``when``."""
+        index = bisect_right(self._keys, _month_key(when))
+        if index == 0:
+            return {}
+        return self._segment(self._keys[index - 1]).state_at(when)
+
+    def events(
+        self,
+        start: datetime,
+        end: datetime,
+        trail_id: str | None = None,
+        park: str | None = None,
+    ) -> list[StatusEvent]:
+        """Events in ``[start, end)``, optionally for one trail or park.
+
+        ``park`` is a park name in any spelling, or its slug.
+        """
+        lo = bisect_left(self._keys, _month_key(start))
+        hi = bisect_right(self._keys, _month_key(end))
+        events = []
+        for key in self._keys[lo:hi]:
+            events.extend(self._segment(key).between(start, end, trail_id))
+        if park is not None:
+            in_park = _park_matcher(park)
+            events = [event for event in events if in_park(event.park)]
+        return events
+
+    def summarize(
+        self,
+        start: datetime,
+        end: datetime,
+        trail_id: str | None = None,
+        park: str | None = None,
+        now: datetime | None = None,
+    ) -> list[TrailHistory]:
+        """Time spent per status by each matching trail within a range.
+
+        Time after ``now`` (default: the current time) is not counted.
+        ``park`` matches as in ``events``.
+        """
+        end = min(end, now or utc_now())
+        summaries: dict[str, TrailHistory] = {}
+        current: dict[str, tuple[datetime, TrailStatus]] = {}
+        in_park = _park_matcher(park) if park is not None else None
+
+        for event in self.state_at(start).values():
+            if trail_id is not None and event.trail_id != trail_id:
+                continue
+            if park is not None and not in_park(event.park):
+                continue
+            if event.status is not None:
+                summaries[event.trail_id] = TrailHistory(event.trail_id, event.park)
+                current[event.trail_id] = (start, event.status)
+
+        for event in self.events(start, end, trail_id, park):
+            summary = summaries.get(event.trail_id)
+            if summary is None:
+                summary = TrailHistory(event.trail_id, event.park)
+                summaries[event.trail_id] = summary
+            summary.park = event.park
+
+            previous = current.pop(event.trail_id, None)
+            if previous is not None:
+                since, status = previous
+                seconds = (event.timestamp - since).total_seconds()
+                summary.seconds_by_status[status] += seconds
+            if event.status is not None:
+                current[event.trail_id] = (event.timestamp, event.status)
+                if previous is None or previous[1] != event.status:
+                    summary.entries_by_status[event.status] += 1
+
+        for tid, (since, status) in current.items():
+            seconds = max((end - since).total_seconds(), 0.0)
+            summaries[tid].seconds_by_status[status] += seconds
+
+        return list(summaries.values())
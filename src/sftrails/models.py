@@ -1,7 +1,7 @@
 """Data models for trail information."""
 
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -38,6 +38,14 @@ class Trail:
     elevation_gain_ft: int
     last_updated: datetime
     notes: str = ""
+    latitude: float | None = None  # Trailhead location
+    longitude: float | None = None
+    geometry: list[tuple[float, float]] | None = None  # (lat, lon) path points
+
+    @property
+    def has_location(self) -> bool:
+        """Check if the trail has trailhead coordinates."""
+        return self.latitude is not None and self.longitude is not None
 
     def is_accessible(self) -> bool:
         """Check if the trail is currently accessible for use."""
@@ -60,6 +68,13 @@ class Trail:
             "elevation_gain_ft": self.elevation_gain_ft,
             "last_updated": self.last_updated.isoformat(),
             "notes": self.notes,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "geometry": (
+                [list(point) for point in self.geometry]
+                if self.geometry is not None
+                else None
+            ),
         }
 
     @classmethod
@@ -73,6 +88,34 @@ class Trail:
             condition=TrailCondition(data["condition"]),
             length_miles=float(data["length_miles"]),
             elevation_gain_ft=int(data["elevation_gain_ft"]),
-            last_updated=datetime.fromisoformat(data["last_updated"]),
+            last_updated=naive_utc(datetime.fromisoformat(data["last_updated"])),
             notes=data.get("notes", ""),
+            latitude=_optional_float(data.get("latitude")),
+            longitude=_optional_float(data.get("longitude")),
+            geometry=(
+                [(float(lat), float(lon)) for lat, lon in data["geometry"]]
+                if data.get("geometry")
+                else None
+            ),
         )
+
+
+def _optional_float(value: object) -> float | None:
+    """Convert a value to float, keeping None as None."""
+    return float(value) if value is not None else None
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Convert a timestamp to the catalog's form: naive, in UTC.
+
+    Naive timestamps are assumed to be UTC already and returned unchanged,
+    so aware and naive values never meet in comparisons.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def utc_now() -> datetime:
+    """The current time in the catalog's naive-UTC form."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,176 @@
+"""Parks derived from the trail catalog."""
+
+import re
+import unicodedata
+from bisect import insort
+from collections import Counter
+from collections.abc import Generator, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
+from sftrails.models import Trail, TrailCondition, TrailStatus
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(name: str) -> str:
+    """URL-safe key for a park name.
+
+    ``"Mount Davidson Park"`` becomes ``"mount-davidson-park"``. Slugifying
+    a slug returns it unchanged, so slugs and names are looked up alike.
+    """
+    ascii_name = (
+        unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    )
+    return _NON_ALNUM.sub("-", ascii_name.lower()).strip("-")
+
+
+@dataclass(frozen=True)
+class Park:
+    """A park with its trails and aggregates at one snapshot version."""
+
+    slug: str
+    name: str
+    trail_ids: tuple[str, ...]
+    status_counts: Mapping[TrailStatus, int]
+    condition_counts: Mapping[TrailCondition, int]
+    total_length_miles: float
+    last_updated: datetime
+
+    @property
+    def trail_count(self) -> int:
+        """Number of trails in the park."""
+        return len(self.trail_ids)
+
+
+def build_parks(trails: Iterable[Trail]) -> dict[str, Park]:
+    """Group trails into parks keyed by slug, in catalog order.
+
+    Park names that differ only in case or punctuation share a slug and
+    become one park, named after its most common spelling.
+    """
+    groups: dict[str, list[Trail]] = {}
+    for trail in trails:
+        groups.setdefault(slugify(trail.park), []).append(trail)
+    return {slug: _park(slug, members) for slug, members in groups.items()}
+
+
+def build_parks_steps(
+    trails: Sequence[Trail], chunk_size: int
+) -> Generator[None, None, dict[str, Park]]:
+    """Same result as ``build_parks``, yielding after each chunk of trails."""
+    groups: dict[str, list[Trail]] = {}
+    for start in range(0, len(trails), chunk_size):
+        for trail in trails[start : start + chunk_size]:
+            groups.setdefault(slugify(trail.park), []).append(trail)
+        yield
+
+    parks = {}
+    aggregated = 0
+    for slug, members in groups.items():
+        parks[slug] = _park(slug, members)
+        aggregated += len(members)
+        if aggregated >= chunk_size:
+            aggregated = 0
+            yield
+    return parks
+
+
+def updated_parks(
+    parks: Mapping[str, Park],
+    removed: Iterable[Trail],
+    added: Iterable[Trail],
+    trails: Mapping[str, Trail],
+    positions: Mapping[str, int],
+) -> dict[str, Park]:
+    """Copy of ``parks`` after ``removed`` trails were replaced by ``added``.
+
+    ``trails`` and ``positions`` describe the updated catalog. Only the
+    parks of the given trails are adjusted, from their previous aggregates;
+    a park is only re-read in full when its name or newest report may have
+    changed. Parks left without trails are dropped.
+    """
+    changed: dict[str, tuple[list[Trail], list[Trail]]] = {}
+    for trail in removed:
+        changed.setdefault(slugify(trail.park), ([], []))[0].append(trail)
+    for trail in added:
+        changed.setdefault(slugify(trail.park), ([], []))[1].append(trail)
+
+    updated = dict(parks)
+    for slug, (gone, new) in changed.items():
+        park = _updated_park(updated.get(slug), slug, gone, new, trails, positions)
+        if park is None:
+            updated.pop(slug, None)
+        else:
+            updated[slug] = park
+    return updated
+
+
+def _updated_park(
+    park: Park | None,
+    slug: str,
+    gone: list[Trail],
+    new: list[Trail],
+    trails: Mapping[str, Trail],
+    positions: Mapping[str, int],
+) -> Park | None:
+    """A park with ``gone`` trails replaced by ``new`` ones, or None if empty."""
+    if park is None:
+        return _park(slug, new)
+    gone_ids = {t.id for t in gone}
+    new_ids = {t.id for t in new}
+    trail_ids = list(park.trail_ids)
+    if gone_ids - new_ids:
+        trail_ids = [i for i in trail_ids if i not in gone_ids - new_ids]
+    for trail_id in new_ids - gone_ids:
+        insort(trail_ids, trail_id, key=positions.__getitem__)
+    if not trail_ids:
+        return None
+
+    statuses = Counter(park.status_counts)
+    conditions = Counter(park.condition_counts)
+    statuses.subtract(t.status for t in gone)
+    statuses.update(t.status for t in new)
+    conditions.subtract(t.condition for t in gone)
+    conditions.update(t.condition for t in new)
+    length = park.total_length_miles
+    length += sum(t.length_miles for t in new) - sum(t.length_miles for t in gone)
+
+    name, last_updated = park.name, park.last_updated
+    spellings_kept = Counter(t.park for t in gone) == Counter(t.park for t in new)
+    newest_kept = (
+        not gone
+        or max(t.last_updated for t in gone) < last_updated
+        or (new and max(t.last_updated for t in new) >= last_updated)
+    )
+    if not spellings_kept or not newest_kept:
+        members = [trails[i] for i in trail_ids]
+        name = Counter(t.park for t in members).most_common(1)[0][0]
+        last_updated = max(t.last_updated for t in members)
+    elif new:
+        last_updated = max(last_updated, *(t.last_updated for t in new))
+    return Park(
+        slug=slug,
+        name=name,
+        trail_ids=tuple(trail_ids),
+        status_counts=MappingProxyType(+statuses),
+        condition_counts=MappingProxyType(+conditions),
+        total_length_miles=round(length, 2),
+        last_updated=last_updated,
+    )
+
+
+def _park(slug: str, members: Sequence[Trail]) -> Park:
+    """Aggregate the trails sharing a slug into a park."""
+    # most_common keeps first-seen order among ties
+    name = Counter(t.park for t in members).most_common(1)[0][0]
+    return Park(
+        slug=slug,
+        name=name,
+        trail_ids=tuple(t.id for t in members),
+        status_counts=MappingProxyType(Counter(t.status for t in members)),
+        condition_counts=MappingProxyType(Counter(t.condition for t in members)),
+        total_length_miles=round(sum(t.length_miles for t in members), 2),
+        last_updated=max(t.last_updated for t in members),
+    )
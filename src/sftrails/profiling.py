@@ -0,0 +1,121 @@
+"""Low-overhead sampling profiler for a running process.
+
+A background thread periodically captures the Python stacks of other threads
+with ``sys._current_frames()`` and counts identical stacks. The output is in
+collapsed-stack format (``frame;frame;frame count`` per line), which can be
+fed directly to flamegraph.pl, speedscope or inferno.
+"""
+
+import asyncio
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_label(frame: FrameType) -> str:
+    """Label a frame as ``module:qualname``."""
+    module = frame.f_globals.get("__name__", "?")
+    # co_qualname is new in 3.11; fall back to the bare function name
+    name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+    return f"{module}:{name}"
+
+
+class SamplingProfiler:
+    """Sample thread stacks at a fixed interval on a background thread.
+
+    Profiles every thread except its own, or only ``thread_id`` if given.
+    When profiling all threads, each stack is rooted at the thread name.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        thread_id: int | None = None,
+        max_depth: int = 128,
+    ) -> None:
+        self.interval = interval
+        self.thread_id = thread_id
+        self.max_depth = max_depth
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampler thread is active."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sftrails-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude=own_id)
+
+    def sample(self, exclude: int | None = None) -> None:
+        """Record one stack sample from each profiled thread."""
+        names = (
+            {t.ident: t.name for t in threading.enumerate()}
+            if self.thread_id is None
+            else {}
+        )
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == exclude:
+                continue
+            if self.thread_id is not None and thread_id != self.thread_id:
+                continue
+
+            labels = []
+            current: FrameType | None = frame
+            while current is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(current))
+                current = current.f_back
+            if self.thread_id is None:
+                labels.append(names.get(thread_id, str(thread_id)))
+
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Render recorded stacks in collapsed-stack format."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+async def profile_for(
+    seconds: float,
+    interval: float = DEFAULT_INTERVAL,
+    thread_id: int | None = None,
+) -> SamplingProfiler:
+    """Sample the process for ``seconds`` without blocking the event loop."""
+    profiler = SamplingProfiler(interval=interval, thread_id=thread_id)
+    with profiler:
+        await asyncio.sleep(seconds)
+    return profiler
@@ -0,0 +1,142 @@
+"""Ranking of trails for "best open trails right now" recommendations."""
+
+import heapq
+from bisect import bisect_left, insort
+from collections.abc import Generator, Iterable, Sequence
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sftrails.models import Trail, TrailCondition, TrailStatus
+
+CONDITION_SCORES = {
+    TrailCondition.DRY: 1.0,
+    TrailCondition.WET: 0.6,
+    TrailCondition.MUDDY: 0.3,
+    TrailCondition.UNKNOWN: 0.2,
+}
+STATUS_SCORES = {TrailStatus.OPEN: 1.0, TrailStatus.LIMITED: 0.5}
+# (upper bound in miles, score); the last bucket catches everything longer
+LENGTH_BUCKETS = ((2.0, 0.7), (6.0, 1.0), (10.0, 0.6), (float("inf"), 0.3))
+FRESHNESS_HALF_LIFE = timedelta(days=2)
+
+CONDITION_WEIGHT = 0.4
+STATUS_WEIGHT = 0.2
+FRESHNESS_WEIGHT = 0.25
+LENGTH_WEIGHT = 0.15
+
+
+def length_score(length_miles: float) -> float:
+    """Score a trail's length bucket; moderate hikes score highest."""
+    for limit, score in LENGTH_BUCKETS:
+        if length_miles < limit:
+            return score
+    return LENGTH_BUCKETS[-1][1]
+
+
+def recommendation_score(trail: Trail, reference: datetime) -> float | None:
+    """Score a trail between 0 and 1, or None if it should not be recommended.
+
+    Only trails safe for hiking are scored. Freshness halves for every
+    ``FRESHNESS_HALF_LIFE`` that the trail's report is older than
+    ``reference``.
+    """
+    if not trail.is_safe_for_hiking():
+        return None
+    age = max((reference - trail.last_updated).total_seconds(), 0.0)
+    freshness = 0.5 ** (age / FRESHNESS_HALF_LIFE.total_seconds())
+    return (
+        CONDITION_WEIGHT * CONDITION_SCORES.get(trail.condition, 0.0)
+        + STATUS_WEIGHT * STATUS_SCORES.get(trail.status, 0.0)
+        + FRESHNESS_WEIGHT * freshness
+        + LENGTH_WEIGHT * length_score(trail.length_miles)
+    )
+
+
+def rank_trails(trails: Iterable[Trail]) -> tuple[tuple[Trail, float], ...]:
+    """Recommendable trails with their scores, best first.
+
+    Freshness is measured against the newest report among the trails, so a
+    catalog ranks the same way no matter when it is ranked. Ties are broken
+    by trail ID.
+    """
+    trails = list(trails)
+    if not trails:
+        return ()
+    reference = max(trail.last_updated for trail in trails)
+    scored = _scored(trails, reference)
+    scored.sort(key=_rank_key)
+    return tuple(scored)
+
+
+def rank_trails_steps(
+    trails: Sequence[Trail], chunk_size: int
+) -> Generator[None, None, tuple[tuple[Trail, float], ...]]:
+    """Same result as ``rank_trails``, yielding after each chunk.
+
+    Chunks are scored and sorted one at a time, then merged in chunks, so
+    no single step sorts the whole catalog.
+    """
+    if not trails:
+        return ()
+    reference = max(trail.last_updated for trail in trails)
+    runs = []
+    for start in range(0, len(trails), chunk_size):
+        run = _scored(trails[start : start + chunk_size], reference)
+        run.sort(key=_rank_key)
+        runs.append(run)
+        yield
+    ranked: list[tuple[Trail, float]] = []
+    merged = heapq.merge(*runs, key=_rank_key)
+    while chunk := list(islice(merged, chunk_size)):
+        ranked.extend(chunk)
+        yield
+    return tuple(ranked)
+
+
+def newest_update_steps(
+    trails: Sequence[Trail], chunk_size: int
+) -> Generator[None, None, datetime | None]:
+    """Latest ``last_updated`` among the trails, the ranking's reference."""
+    newest = None
+    for start in range(0, len(trails), chunk_size):
+        chunk = max(t.last_updated for t in trails[start : start + chunk_size])
+        newest = chunk if newest is None else max(newest, chunk)
+        yield
+    return newest
+
+
+def updated_ranking(
+    ranking: Sequence[tuple[Trail, float]],
+    reference: datetime,
+    removed: Iterable[Trail],
+    added: Iterable[Trail],
+) -> tuple[tuple[Trail, float], ...]:
+    """``ranking`` with ``removed`` trails taken out and ``added`` ones scored in.
+
+    Only valid while ``reference``, the newest report in the catalog, stays
+    the same: moving it changes every freshness score, so the catalog has to
+    be ranked again.
+    """
+    ranked = list(ranking)
+    for trail in removed:
+        score = recommendation_score(trail, reference)
+        if score is not None:
+            del ranked[bisect_left(ranked, (-score, trail.id), key=_rank_key)]
+    for item in _scored(added, reference):
+        insort(ranked, item, key=_rank_key)
+    return tuple(ranked)
+
+
+def _scored(
+    trails: Iterable[Trail], reference: datetime
+) -> list[tuple[Trail, float]]:
+    scored = []
+    for trail in trails:
+        score = recommendation_score(trail, reference)
+        if score is not None:
+            scored.append((trail, score))
+    return scored
+
+
+def _rank_key(item: tuple[Trail, float]) -> tuple[float, str]:
+    return -item[1], item[0].id
@@ -0,0 +1,124 @@
+"""Background snapshot refreshes on an adaptive, jittered schedule."""
+
+import asyncio
+import logging
+import random
+
+from sftrails.changes import ChangeSet, ChangeType
+from sftrails.metrics import REGISTRY
+from sftrails.service import TrailService
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = REGISTRY.gauge(
+    "sftrails_refresh_interval_seconds",
+    "Current background refresh interval before jitter",
+)
+SNAPSHOT_STALENESS = REGISTRY.gauge(
+    "sftrails_snapshot_staleness_seconds",
+    "Seconds since the snapshot was last refreshed from the data source",
+)
+REFRESH_FAILURES = REGISTRY.counter(
+    "sftrails_refresh_failures_total", "Background refreshes that raised"
+)
+
+
+def _is_significant(change_set: ChangeSet) -> bool:
+    """Whether any trail appeared, disappeared or changed status or condition."""
+    return any(
+        change.type != ChangeType.UPDATED
+        or "status" in change.changed_fields
+        or "condition" in change.changed_fields
+        for change in change_set.changes
+    )
+
+
+class BackgroundRefresher:
+    """Keep a TrailService snapshot fresh so requests never refresh it.
+
+    The snapshot is loaded on start and then refreshed every ``interval``
+    seconds, randomly stretched or shrunk by up to ``jitter`` so workers
+    started together drift apart. The interval halves, down to
+    ``min_interval``, after a refresh that changed trail statuses or
+    conditions, and grows by half, up to ``max_interval``, after a refresh
+    that changed nothing. Failed refreshes keep the current snapshot and
+    are retried with exponential backoff from ``min_interval``.
+    """
+
+    def __init__(
+        self,
+        service: TrailService,
+        interval: float = 60.0,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+        jitter: float = 0.1,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.service = service
+        self.min_interval = interval / 4 if min_interval is None else min_interval
+        self.max_interval = interval * 4 if max_interval is None else max_interval
+        self.interval = interval
+        self.jitter = jitter
+        self.failures = 0  # Consecutive failed refreshes
+        self._rng = rng or random.Random()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the refresh loop is active."""
+        return self._task is not None and not self._task.done()
+
+    def adapt(self, change_set: ChangeSet | None) -> None:
+        """Adjust the interval to the changes found by a refresh."""
+        if change_set is None:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        elif _is_significant(change_set):
+            self.interval = max(self.min_interval, self.interval / 2)
+
+    def next_delay(self) -> float:
+        """Seconds to wait before the next refresh."""
+        if self.failures:
+            base = min(self.max_interval, self.min_interval * 2 ** (self.failures - 1))
+        else:
+            base = self.interval
+        return base * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def refresh_once(self) -> ChangeSet | None:
+        """Refresh the snapshot and adapt the interval; never raises."""
+        try:
+            change_set = await self.service.refresh()
+        except Exception:
+            self.failures += 1
+            REFRESH_FAILURES.inc()
+            logger.exception("Background trail refresh failed")
+            return None
+        self.failures = 0
+        self.adapt(change_set)
+        return change_set
+
+    async def start(self) -> None:
+        """Load the snapshot, then keep refreshing it in a background task."""
+        if self.running:
+            return
+        REFRESH_INTERVAL.set_function(lambda: self.interval)
+        SNAPSHOT_STALENESS.set_function(lambda: self.service.staleness or 0.0)
+        await self.refresh_once()
+        self._task = asyncio.create_task(self._run(), name="sftrails-refresher")
+
+    async def stop(self) -> None:
+        """Cancel the background task and wait for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        # Start at a random phase so workers don't refresh in lockstep
+        await asyncio.sleep(self._rng.uniform(0, self.next_delay()))
+        while True:
+            await self.refresh_once()
+            await asyncio.sleep(self.next_delay())
@@ -0,0 +1,70 @@
+"""Minimal RESP2 (Redis serialization protocol) encoding and decoding."""
+
+import asyncio
+
+from sftrails.exceptions import CacheError
+
+
+class RespError(Exception):
+    """An error reply, kept distinct from a simple string reply."""
+
+
+def _bulk(value: bytes | str | int | float) -> bytes:
+    if isinstance(value, str):
+        value = value.encode()
+    elif not isinstance(value, bytes):
+        value = str(value).encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def encode_command(*args: bytes | str | int | float) -> bytes:
+    """Encode a command as an array of bulk strings."""
+    return b"*%d\r\n" % len(args) + b"".join(_bulk(arg) for arg in args)
+
+
+def encode_reply(value: object) -> bytes:
+    """Encode a reply: str as a simple string, bytes as a bulk string."""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return _bulk(value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(v) for v in value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as RESP")
+
+
+async def read_reply(reader: asyncio.StreamReader) -> object:
+    """Read one value; error replies are returned as RespError, not raised.
+
+    Raises CacheError if the connection closes or the data is malformed.
+    """
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise CacheError("Connection closed by the cache server")
+    kind, rest = line[:1], line[1:-2]
+    try:
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [await read_reply(reader) for _ in range(length)]
+    except (ValueError, asyncio.IncompleteReadError) as e:
+        raise CacheError(f"Malformed reply from the cache server: {e}") from e
+    raise CacheError(f"Unexpected reply from the cache server: {line!r}")
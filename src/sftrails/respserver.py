@@ -0,0 +1,175 @@
+"""Local stand-in for a Redis server, for development and tests.
+
+Implements the subset of commands ``RedisCache`` uses (GET, SET with
+PX/EX/NX/XX, DEL, EXISTS, PUBLISH, SUBSCRIBE, UNSUBSCRIBE, SELECT, PING,
+FLUSHALL) with every database sharing one keyspace. Run it with:
+
+    python -m sftrails.respserver --port 6379
+    SFTRAILS_CACHE_URL=redis://localhost:6379 uvicorn sftrails.api.main:app
+"""
+
+import argparse
+import asyncio
+import time
+
+from sftrails.exceptions import CacheError
+from sftrails.resp import RespError, encode_reply, read_reply
+
+
+class RespServer:
+    """In-memory key-value and pub/sub server speaking RESP2."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.host = host
+        self.port = port  # 0 picks a free port on start
+        self._data: dict[bytes, tuple[bytes, float | None]] = {}
+        self._channels: dict[bytes, set[asyncio.StreamWriter]] = {}
+        self._server: asyncio.Server | None = None
+        self._clients: set[asyncio.StreamWriter] = set()
+
+    @property
+    def url(self) -> str:
+        """``redis://`` URL of the running server."""
+        return f"redis://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Disconnect every client and stop listening."""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> "RespServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    def _get(self, key: bytes) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    def _set(self, key: bytes, value: bytes, *options: bytes) -> str | None:
+        expires_at = None
+        only_if_absent = only_if_present = False
+        args = iter(options)
+        for option in args:
+            option = option.upper()
+            if option in (b"PX", b"EX"):
+                amount = float(next(args))
+                seconds = amount / 1000 if option == b"PX" else amount
+                expires_at = time.monotonic() + seconds
+            elif option == b"NX":
+                only_if_absent = True
+            elif option == b"XX":
+                only_if_present = True
+            else:
+                raise RespError(f"ERR syntax error: {option.decode()}")
+        exists = self._get(key) is not None
+        if (only_if_absent and exists) or (only_if_present and not exists):
+            return None
+        self._data[key] = (value, expires_at)
+        return "OK"
+
+    def _execute(self, name: bytes, args: list[bytes]) -> object:
+        if name == b"PING":
+            return args[0] if args else "PONG"
+        if name == b"SELECT":
+            return "OK"
+        if name == b"GET":
+            return self._get(args[0])
+        if name == b"SET":
+            return self._set(*args)
+        if name in (b"DEL", b"EXISTS"):
+            found = [key for key in args if self._get(key) is not None]
+            if name == b"DEL":
+                for key in found:
+                    del self._data[key]
+            return len(found)
+        if name == b"PUBLISH":
+            channel, message = args
+            subscribers = list(self._channels.get(channel, ()))
+            for writer in subscribers:
+                writer.write(encode_reply([b"message", channel, message]))
+            return len(subscribers)
+        if name == b"FLUSHALL":
+            self._data.clear()
+            return "OK"
+        raise RespError(f"ERR unknown command '{name.decode()}'")
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._clients.add(writer)
+        subscriptions: set[bytes] = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    writer.write(encode_reply(RespError("ERR invalid command")))
+                    continue
+                name, args = command[0].upper(), command[1:]
+                if name == b"QUIT":
+                    writer.write(encode_reply("OK"))
+                    break
+                if name in (b"SUBSCRIBE", b"UNSUBSCRIBE"):
+                    kind = name.lower()
+                    for channel in args or list(subscriptions):
+                        subscribers = self._channels.setdefault(channel, set())
+                        if name == b"SUBSCRIBE":
+                            subscriptions.add(channel)
+                            subscribers.add(writer)
+                        else:
+                            subscriptions.discard(channel)
+                            subscribers.discard(writer)
+                        reply = [kind, channel, len(subscriptions)]
+                        writer.write(encode_reply(reply))
+                    continue
+                try:
+                    reply = self._execute(name, args)
+                except RespError as e:
+                    reply = e
+                except (IndexError, ValueError, TypeError, StopIteration):
+                    reply = RespError(f"ERR wrong arguments for '{name.decode()}'")
+                writer.write(encode_reply(reply))
+                await writer.drain()
+        except (CacheError, ConnectionError):
+            pass  # Client went away
+        finally:
+            for channel in subscriptions:
+                self._channels[channel].discard(writer)
+            self._clients.discard(writer)
+            writer.close()
+
+
+async def _main(host: str, port: int) -> None:
+    server = RespServer(host, port)
+    await server.start()
+    print(f"Serving RESP on {server.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    options = parser.parse_args()
+    try:
+        asyncio.run(_main(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
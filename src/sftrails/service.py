@@ -1,96 +1,512 @@
 """Trail status service for querying and filtering trails."""
 
+import asyncio
+import time
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import Executor
+from dataclasses import replace
+from datetime import datetime
+from typing import Any
+
+from sftrails.builder import (
+    CHUNK_SIZE,
+    BuiltCatalog,
+    build_steps,
+    diff_steps,
+    run_cooperatively,
+    run_steps,
+)
+from sftrails.changes import ChangeLog, ChangeSet, TrailChange, diff_updates
 from sftrails.client import TrailDataSource
-from sftrails.exceptions import TrailNotFoundError
+from sftrails.exceptions import ParkNotFoundError, TrailNotFoundError
+from sftrails.metrics import REGISTRY
 from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.parks import Park
+from sftrails.snapshot import Snapshot
+from sftrails.timing import annotate, record, timed
+from sftrails.tracing import start_span
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "sftrails_cache_requests_total",
+    "Trail cache lookups by result",
+    labels=("result",),
+)
+REFRESHES = REGISTRY.counter(
+    "sftrails_refreshes_total", "Snapshot refreshes from the data source"
+)
+REFRESH_SECONDS = REGISTRY.histogram(
+    "sftrails_refresh_seconds", "Time to fetch, decode and index a snapshot"
+)
+INDEX_BUILD_SECONDS = REGISTRY.histogram(
+    "sftrails_index_build_seconds",
+    "Time to build snapshot indexes",
+    labels=("index",),
+)
+SNAPSHOT_TRAILS = REGISTRY.gauge(
+    "sftrails_snapshot_trails", "Number of trails in the current snapshot"
+)
+INGESTED_UPDATES = REGISTRY.counter(
+    "sftrails_ingested_updates_total",
+    "Pushed trail updates by whether they changed the snapshot",
+    labels=("result",),
+)
+
+# Longest a cooperative refresh holds the event loop before yielding
+DEFAULT_STALL_BUDGET = 0.02
 
 
 class TrailService:
-    """Service for querying trail status information."""
+    """Service for querying trail status information.
+
+    The catalog is held in an immutable Snapshot. Refreshes and updates
+    build a new snapshot and swap the reference, so readers never copy or
+    lock and each sees a consistent version.
 
-    def __init__(self, data_source: TrailDataSource) -> None:
+    New snapshots are built, and diffed against the current one, in
+    ``build_executor`` when given (a thread or process pool). Otherwise the
+    build runs on the event loop in chunks, yielding to other tasks every
+    ``stall_budget`` seconds, or never if the budget is None.
+    """
+
+    def __init__(
+        self,
+        data_source: TrailDataSource,
+        change_log_size: int = 1000,
+        build_executor: Executor | None = None,
+        stall_budget: float | None = DEFAULT_STALL_BUDGET,
+    ) -> None:
         self._data_source = data_source
-        self._cache: dict[str, Trail] = {}
+        self._snapshot = Snapshot.empty()
+        self._loaded = False  # Whether the full catalog has been fetched
+        self._change_log = ChangeLog(change_log_size)
+        self._listeners: list[Callable[[ChangeSet], None]] = []
+        self._build_executor = build_executor
+        self._stall_budget = stall_budget
+        self._refreshing: asyncio.Task[ChangeSet | None] | None = None
+        self._applying = asyncio.Lock()  # Pushed batches apply one at a time
+        self._refreshed_at: float | None = None  # time.monotonic() of last refresh
+        # Pushed trails, kept over refreshes until upstream has a newer version
+        self._pushed: dict[str, Trail] = {}
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """The current snapshot, which may not be loaded yet."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Version of the most recent snapshot that changed any trail."""
+        return self._snapshot.version
+
+    @property
+    def staleness(self) -> float | None:
+        """Seconds since the last successful refresh, or None if not loaded."""
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+
+    def add_listener(self, listener: Callable[[ChangeSet], None]) -> None:
+        """Register a callback invoked with each new change set."""
+        self._listeners.append(listener)
+
+    async def get_snapshot(self, use_cache: bool = True) -> Snapshot:
+        """Get the current snapshot, loading it from the data source if needed."""
+        if not use_cache or not self._loaded:
+            CACHE_REQUESTS.inc(result="miss")
+            annotate("cache", "miss")
+            await self.refresh()
+        else:
+            CACHE_REQUESTS.inc(result="hit")
+            annotate("cache", "hit")
+        return self._snapshot
 
     async def get_all_trails(self, use_cache: bool = True) -> list[Trail]:
         """Get all trails from the data source."""
-        if not use_cache or not self._cache:
-            raw_trails = await self._data_source.fetch_trails()
-            self._cache = {
-                trail["id"]: Trail.from_dict(trail) for trail in raw_trails
-            }
-        return list(self._cache.values())
+        return list((await self.get_snapshot(use_cache)).trail_list)
+
+    async def _ensure_loaded(self) -> Snapshot:
+        """Load the full catalog if it has not been fetched yet."""
+        if not self._loaded:
+            await self.refresh()
+        return self._snapshot
+
+    async def refresh(self) -> ChangeSet | None:
+        """Reload trails from the data source and publish what changed.
+
+        Calls made while a refresh is running wait for it and share its
+        result rather than starting another build. The refresh runs in its
+        own task, so cancelling a caller stops only that caller's wait.
+        """
+        if self._refreshing is None:
+            self._refreshing = asyncio.create_task(self._refresh())
+            self._refreshing.add_done_callback(self._refresh_done)
+        return await asyncio.shield(self._refreshing)
+
+    def _refresh_done(self, task: asyncio.Task[ChangeSet | None]) -> None:
+        self._refreshing = None
+        if not task.cancelled():
+            task.exception()  # Waiters are optional; mark it retrieved
+
+    async def _refresh(self) -> ChangeSet | None:
+        start = time.perf_counter()
+        with start_span("service.refresh") as span:
+            with timed("upstream"):
+                raw_trails = await self._data_source.fetch_trails()
+            with start_span("service.decode", {"trails": len(raw_trails)}):
+                catalog = await self._build(raw_trails)
+            record("decode", catalog.decode_seconds)
+            record("index", catalog.index_seconds)
+            INDEX_BUILD_SECONDS.observe(catalog.index_seconds, index="spatial")
+
+            snapshot = None
+            while snapshot is None:
+                with start_span("service.diff"), timed("diff"):
+                    base = self._snapshot
+                    self._keep_pushed(catalog)
+                    changes = await self._diff(base, catalog)
+                if self._snapshot is not base:
+                    continue  # Updates were applied while diffing; diff again
+                if not changes:
+                    break
+                snapshot = catalog.to_snapshot(self._change_log.version + 1)
+                with timed("index"):
+                    await self._index(snapshot)
+                if self._snapshot is not base:
+                    snapshot = None  # Updates landed while indexing; start over
+            span.set_attribute("changes", len(changes))
+
+            # No awaits since the diff and indexing, so their base is current
+            change_set = None
+            if snapshot is not None:
+                change_set = self._publish(changes, lambda version: snapshot)
+
+        self._loaded = True
+        self._refreshed_at = time.monotonic()
+        REFRESHES.inc()
+        REFRESH_SECONDS.observe(time.perf_counter() - start)
+        SNAPSHOT_TRAILS.set(len(self._snapshot))
+        return change_set
+
+    def _keep_pushed(self, catalog: BuiltCatalog) -> None:
+        """Put pushed trails over upstream's unless upstream's are newer.
+
+        A pushed trail is forgotten once upstream reports it with a later
+        ``last_updated``; until then it also survives upstream omitting it.
+        """
+        kept = []
+        for trail_id, pushed in list(self._pushed.items()):
+            upstream = catalog.trails.get(trail_id)
+            if upstream is not None and upstream.last_updated > pushed.last_updated:
+                del self._pushed[trail_id]
+            elif upstream != pushed:
+                kept.append(pushed)
+        catalog.upsert(kept)
+
+    async def _build(self, raw_trails: list[dict[str, Any]]) -> BuiltCatalog:
+        """Decode and index a freshly fetched catalog."""
+        if self._build_executor is None:
+            return await run_cooperatively(
+                build_steps(raw_trails), self._stall_budget
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._build_executor, run_steps, build_steps, raw_trails
+        )
+
+    async def _index(self, snapshot: Snapshot) -> None:
+        """Build a snapshot's query indexes before it is published."""
+        if self._build_executor is None:
+            seconds = await run_cooperatively(
+                snapshot.index_steps(CHUNK_SIZE), self._stall_budget
+            )
+        else:
+            # The indexes are kept on the snapshot, so build them in a thread
+            seconds = await asyncio.to_thread(
+                run_steps, snapshot.index_steps, CHUNK_SIZE
+            )
+        for name, elapsed in seconds.items():
+            INDEX_BUILD_SECONDS.observe(elapsed, index=name)
+
+    async def _diff(
+        self, base: Snapshot, catalog: BuiltCatalog
+    ) -> list[TrailChange]:
+        """Diff a built catalog against a snapshot."""
+        if self._build_executor is None:
+            return await run_cooperatively(
+                diff_steps(base.trails, catalog.trails), self._stall_budget
+            )
+        # Snapshots live in this process, so diff in a thread even when
+        # building in a process pool
+        return await asyncio.to_thread(
+            run_steps, diff_steps, base.trails, catalog.trails
+        )
+
+    def _publish(
+        self, changes: list[TrailChange], build: Callable[[int], Snapshot]
+    ) -> ChangeSet:
+        """Swap in the snapshot for the next version and notify listeners."""
+        snapshot = build(self._change_log.version + 1)
+        change_set = self._change_log.record(changes)
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            listener(change_set)
+        return change_set
+
+    async def _apply(
+        self, updates: Callable[[Snapshot], list[Trail]]
+    ) -> ChangeSet | None:
+        """Upsert the trails ``updates`` derives from the loaded snapshot.
+
+        Batches are applied one at a time, in arrival order. Indexes that a
+        batch cannot adjust in place are built like a refresh's; if a
+        refresh publishes meanwhile, the batch is derived and applied again.
+        """
+        async with self._applying:
+            with start_span("service.apply_updates") as span, timed("apply"):
+                snapshot = None
+                while snapshot is None:
+                    base = self._snapshot
+                    trails = updates(base)
+                    changes = diff_updates(base.trails, trails)
+                    if not changes:
+                        break
+                    snapshot = base.with_updates(
+                        [c.trail for c in changes], self._change_log.version + 1
+                    )
+                    await self._index(snapshot)
+                    if self._snapshot is not base:
+                        snapshot = None  # A refresh landed while indexing
+                span.set_attribute("updates", len(trails))
+
+                # No awaits since indexing, so its base is current
+                change_set = None
+                if snapshot is not None:
+                    for change in changes:
+                        self._pushed[change.trail_id] = change.trail
+                    change_set = self._publish(changes, lambda version: snapshot)
+
+        INGESTED_UPDATES.inc(len(changes), result="changed")
+        INGESTED_UPDATES.inc(len(trails) - len(changes), result="unchanged")
+        SNAPSHOT_TRAILS.set(len(self._snapshot))
+        return change_set
+
+    async def apply_updates(self, trails: Iterable[Trail]) -> ChangeSet | None:
+        """Upsert trails into the current snapshot and publish what changed.
+
+        Only the given trails are diffed and re-indexed, and the whole batch
+        lands in one new snapshot. Refreshes keep pushed trails until the
+        data source returns them with a newer ``last_updated``.
+        """
+        await self._ensure_loaded()
+        trails = list(trails)
+        return await self._apply(lambda snapshot: trails)
+
+    async def patch_trails(
+        self,
+        patches: Mapping[str, Mapping[str, Any]],
+        updated_at: datetime | None = None,
+    ) -> ChangeSet | None:
+        """Apply partial field updates to existing trails, keyed by trail ID.
+
+        Trails that actually change get ``last_updated`` set to
+        ``updated_at`` unless the patch sets it. Raises TrailNotFoundError,
+        without applying anything, if any trail is not in the snapshot.
+        """
+        await self._ensure_loaded()
+        return await self._apply(
+            lambda snapshot: self._patched(snapshot, patches, updated_at)
+        )
+
+    @staticmethod
+    def _patched(
+        snapshot: Snapshot,
+        patches: Mapping[str, Mapping[str, Any]],
+        updated_at: datetime | None,
+    ) -> list[Trail]:
+        """Trails of a snapshot with partial field updates applied."""
+        for trail_id in patches:
+            if trail_id not in snapshot.trails:
+                raise TrailNotFoundError(trail_id)
+
+        trails = []
+        for trail_id, fields in patches.items():
+            current = snapshot.trails[trail_id]
+            trail = replace(current, **fields)
+            if updated_at is not None and "last_updated" not in fields:
+                if trail != current:
+                    trail = replace(trail, last_updated=updated_at)
+            trails.append(trail)
+        return trails
+
+    def changes_since(self, version: int) -> list[ChangeSet]:
+        """Get change sets recorded after a version, oldest first.
+
+        Raises ChangeHistoryExpiredError if the version is older than the
+        retained change log or newer than the current version.
+        """
+        return self._change_log.since(version)
 
     async def get_trail(self, trail_id: str) -> Trail:
-        """Get a specific trail by ID."""
-        if trail_id in self._cache:
-            return self._cache[trail_id]
+        """Get a specific trail by ID.
+
+        Trails missing from the snapshot are looked up in the data source
+        but not added to the snapshot; the next refresh picks them up.
+        """
+        trail = self._snapshot.trails.get(trail_id)
+        if trail is not None:
+            CACHE_REQUESTS.inc(result="hit")
+            annotate("cache", "hit")
+            return trail
+
+        CACHE_REQUESTS.inc(result="miss")
+        annotate("cache", "miss")
+        with start_span("service.get_trail", {"trail_id": trail_id}):
+            with timed("upstream"):
+                raw_trail = await self._data_source.fetch_trail(trail_id)
+            if raw_trail is None:
+                raise TrailNotFoundError(trail_id)
+
+            with timed("decode"):
+                return Trail.from_dict(raw_trail)
 
-        raw_trail = await self._data_source.fetch_trail(trail_id)
-        if raw_trail is None:
-            raise TrailNotFoundError(trail_id)
+    async def get_status_counts(
+        self,
+    ) -> tuple[Mapping[TrailStatus, int], Mapping[TrailCondition, int]]:
+        """Get trail counts by status and by condition.
 
-        trail = Trail.from_dict(raw_trail)
-        self._cache[trail_id] = trail
-        return trail
+        The counts are maintained incrementally as the snapshot changes.
+        """
+        snapshot = await self._ensure_loaded()
+        return snapshot.status_counts, snapshot.condition_counts
 
     async def get_open_trails(self) -> list[Trail]:
         """Get all trails that are currently open."""
-        trails = await self.get_all_trails()
+        trails = (await self.get_snapshot()).trail_list
         return [t for t in trails if t.status == TrailStatus.OPEN]
 
     async def get_accessible_trails(self) -> list[Trail]:
         """Get all trails that are accessible (open or limited)."""
-        trails = await self.get_all_trails()
+        trails = (await self.get_snapshot()).trail_list
         return [t for t in trails if t.is_accessible()]
 
     async def get_trails_by_park(self, park: str) -> list[Trail]:
         """Get all trails in a specific park."""
-        trails = await self.get_all_trails()
-        return [t for t in trails if t.park.lower() == park.lower()]
+        index = (await self.get_snapshot()).filter_index
+        with timed("filter"):
+            return index.trails(index.select(parks=(park,)))
+
+    async def get_parks(self) -> list[Park]:
+        """Get every park, sorted by name."""
+        snapshot = await self.get_snapshot()
+        with timed("aggregate"):
+            return sorted(snapshot.parks.values(), key=lambda p: p.name)
+
+    async def get_park(self, name_or_slug: str) -> Park:
+        """Get a park by slug or name; raises ParkNotFoundError if unknown."""
+        park = (await self.get_snapshot()).find_park(name_or_slug)
+        if park is None:
+            raise ParkNotFoundError(name_or_slug)
+        return park
+
+    async def get_park_trails(self, name_or_slug: str) -> list[Trail]:
+        """Get a park's trails in catalog order, looked up by slug or name."""
+        snapshot = await self.get_snapshot()
+        park = snapshot.find_park(name_or_slug)
+        if park is None:
+            raise ParkNotFoundError(name_or_slug)
+        return [snapshot.trails[trail_id] for trail_id in park.trail_ids]
 
     async def get_trails_by_condition(
         self, condition: TrailCondition
     ) -> list[Trail]:
         """Get all trails with a specific condition."""
-        trails = await self.get_all_trails()
+        trails = (await self.get_snapshot()).trail_list
         return [t for t in trails if t.condition == condition]
 
     async def get_safe_hiking_trails(self) -> list[Trail]:
         """Get all trails safe for hiking."""
-        trails = await self.get_all_trails()
+        trails = (await self.get_snapshot()).trail_list
         return [t for t in trails if t.is_safe_for_hiking()]
 
-    async def search_trails(
+    async def get_recommended_trails(
+        self, limit: int
+    ) -> tuple[list[tuple[Trail, float]], int]:
+        """Get the top recommended trails as (trail, score) pairs.
+
+        Also returns how many trails are recommendable in total. The ranking
+        is computed once per snapshot rather than per call.
+        """
+        snapshot = await self.get_snapshot()
+        with timed("rank"):
+            ranking = snapshot.recommended
+        return list(ranking[:limit]), len(ranking)
+
+    async def get_nearby_trails(
         self,
+        latitude: float,
+        longitude: float,
+        radius_miles: float,
         status: TrailStatus | None = None,
         condition: TrailCondition | None = None,
-        park: str | None = None,
+    ) -> list[tuple[Trail, float]]:
+        """Get trails within a radius as (trail, distance) pairs, nearest first."""
+        snapshot = await self.get_snapshot()
+
+        with (
+            start_span("index.spatial.lookup", {"radius_miles": radius_miles}),
+            timed("index"),
+        ):
+            return [
+                (trail, distance)
+                for trail, distance in snapshot.spatial_index.nearby(
+                    latitude, longitude, radius_miles
+                )
+                if (status is None or trail.status == status)
+                and (condition is None or trail.condition == condition)
+            ]
+
+    async def search_trails(
+        self,
+        status: TrailStatus | Iterable[TrailStatus] | None = None,
+        condition: TrailCondition | Iterable[TrailCondition] | None = None,
+        park: str | Iterable[str] | None = None,
         max_length_miles: float | None = None,
         max_elevation_gain_ft: int | None = None,
+        exclude_status: TrailStatus | Iterable[TrailStatus] | None = None,
+        exclude_condition: TrailCondition | Iterable[TrailCondition] | None = None,
+        exclude_park: str | Iterable[str] | None = None,
     ) -> list[Trail]:
-        """Search trails with multiple filter criteria."""
-        trails = await self.get_all_trails()
-
-        results = []
-        for trail in trails:
-            if status is not None and trail.status != status:
-                continue
-            if condition is not None and trail.condition != condition:
-                continue
-            if park is not None and trail.park.lower() != park.lower():
-                continue
-            if max_length_miles is not None and trail.length_miles > max_length_miles:
-                continue
-            if (
-                max_elevation_gain_ft is not None
-                and trail.elevation_gain_ft > max_elevation_gain_ft
-            ):
-                continue
-            results.append(trail)
+        """Search trails with multiple filter criteria.
+
+        Status, condition and park accept one value or several; a trail
+        matches if it has any of the given values. The ``exclude_`` filters
+        drop trails with any of their values. Results keep catalog order.
+        """
+        snapshot = await self.get_snapshot()
+
+        with (
+            start_span("service.filter", {"candidates": len(snapshot)}) as span,
+            timed("filter"),
+        ):
+            results = snapshot.search(
+                status=status,
+                condition=condition,
+                park=park,
+                max_length_miles=max_length_miles,
+                max_elevation_gain_ft=max_elevation_gain_ft,
+                exclude_status=exclude_status,
+                exclude_condition=exclude_condition,
+                exclude_park=exclude_park,
+            )
+            span.set_attribute("results", len(results))
 
         return results
 
     def clear_cache(self) -> None:
-        """Clear the trail cache."""
-        self._cache.clear()
+        """Clear the trail cache, so the next read fetches the catalog again.
+
+        The current snapshot stays as the baseline that fetch is diffed
+        against, so only trails that really changed are published.
+        """
+        self._loaded = False
+        self._refreshed_at = None
+        self._pushed.clear()
@@ -0,0 +1,248 @@
+"""Immutable, versioned views of the trail catalog."""
+
+import time
+from collections import Counter
+from collections.abc import Generator, Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any
+
+from sftrails.bitmap import FilterIndex, filter_index_steps
+from sftrails.geo import SpatialIndex
+from sftrails.models import Trail, TrailCondition, TrailStatus
+from sftrails.parks import (
+    Park,
+    build_parks,
+    build_parks_steps,
+    slugify,
+    updated_parks,
+)
+from sftrails.ranking import (
+    newest_update_steps,
+    rank_trails,
+    rank_trails_steps,
+    updated_ranking,
+)
+
+
+def _values(value: Any) -> tuple | None:
+    """Normalize a filter given as one value or a collection of values."""
+    if value is None:
+        return None
+    if isinstance(value, (str, Enum)):
+        return (value,)
+    return tuple(value)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """The trail catalog at one version, with its indexes and aggregates.
+
+    A snapshot is never modified after construction. Updates produce a new
+    snapshot that the service swaps in by reference, so a reader holding a
+    snapshot sees one consistent version without copying or locking. Trails
+    are shared between snapshots and must be treated as read-only; use
+    ``dataclasses.replace`` to derive updated trails.
+    """
+
+    version: int
+    trails: Mapping[str, Trail]
+    trail_list: tuple[Trail, ...]
+    spatial_index: SpatialIndex
+    status_counts: Mapping[TrailStatus, int]
+    condition_counts: Mapping[TrailCondition, int]
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def __len__(self) -> int:
+        return len(self.trail_list)
+
+    @cached_property
+    def recommended(self) -> tuple[tuple[Trail, float], ...]:
+        """Recommendable trails with their scores, best first.
+
+        Ranked once per snapshot, so top-k lookups are slices.
+        """
+        return rank_trails(self.trail_list)
+
+    @cached_property
+    def filter_index(self) -> FilterIndex:
+        """Bitmap postings by status, condition and park."""
+        return FilterIndex(self.trail_list)
+
+    @cached_property
+    def parks(self) -> Mapping[str, Park]:
+        """Parks keyed by slug."""
+        return MappingProxyType(build_parks(self.trail_list))
+
+    @cached_property
+    def newest_update(self) -> datetime | None:
+        """Latest ``last_updated`` of any trail, the ranking's reference."""
+        return max((t.last_updated for t in self.trail_list), default=None)
+
+    def index_steps(
+        self, chunk_size: int
+    ) -> Generator[None, None, dict[str, float]]:
+        """Build the query indexes and ``newest_update`` in chunks.
+
+        Those are otherwise built on first use. The service runs these steps
+        before publishing a snapshot, so no request pays for them. Returns
+        the seconds spent on each index built, excluding yields.
+        """
+        seconds = {}
+        for name, steps, wrap in (
+            ("filter_index", filter_index_steps, None),
+            ("parks", build_parks_steps, MappingProxyType),
+            ("newest_update", newest_update_steps, None),
+            ("recommended", rank_trails_steps, None),
+        ):
+            if name in self.__dict__:
+                continue
+            generator = steps(self.trail_list, chunk_size)
+            elapsed = 0.0
+            while True:
+                step_start = time.perf_counter()
+                try:
+                    next(generator)
+                except StopIteration as done:
+                    value = done.value
+                    break
+                finally:
+                    elapsed += time.perf_counter() - step_start
+                yield
+            # Fill the cached_property slot; the dataclass itself is frozen
+            self.__dict__[name] = wrap(value) if wrap else value
+            seconds[name] = elapsed
+        return seconds
+
+    def find_park(self, name_or_slug: str) -> Park | None:
+        """Look up a park by slug or by any spelling of its name."""
+        return self.parks.get(slugify(name_or_slug))
+
+    def search(
+        self,
+        status: TrailStatus | Iterable[TrailStatus] | None = None,
+        condition: TrailCondition | Iterable[TrailCondition] | None = None,
+        park: str | Iterable[str] | None = None,
+        max_length_miles: float | None = None,
+        max_elevation_gain_ft: int | None = None,
+        exclude_status: TrailStatus | Iterable[TrailStatus] | None = None,
+        exclude_condition: TrailCondition | Iterable[TrailCondition] | None = None,
+        exclude_park: str | Iterable[str] | None = None,
+    ) -> list[Trail]:
+        """Trails matching every given filter, in catalog order.
+
+        See ``TrailService.search_trails`` for the filter semantics.
+        """
+        index = self.filter_index
+        bits = index.select(
+            statuses=_values(status),
+            conditions=_values(condition),
+            parks=_values(park),
+            exclude_statuses=_values(exclude_status) or (),
+            exclude_conditions=_values(exclude_condition) or (),
+            exclude_parks=_values(exclude_park) or (),
+        )
+        results = index.trails(bits)
+        if max_length_miles is not None:
+            results = [t for t in results if t.length_miles <= max_length_miles]
+        if max_elevation_gain_ft is not None:
+            results = [
+                t for t in results if t.elevation_gain_ft <= max_elevation_gain_ft
+            ]
+        return results
+
+    @classmethod
+    def from_trails(
+        cls,
+        trails: dict[str, Trail],
+        version: int,
+        spatial_index: SpatialIndex | None = None,
+    ) -> "Snapshot":
+        """Build a snapshot that takes ownership of a trail mapping."""
+        trail_list = tuple(trails.values())
+        return cls(
+            version=version,
+            trails=MappingProxyType(trails),
+            trail_list=trail_list,
+            spatial_index=(
+                spatial_index if spatial_index is not None else SpatialIndex(trail_list)
+            ),
+            status_counts=MappingProxyType(Counter(t.status for t in trail_list)),
+            condition_counts=MappingProxyType(
+                Counter(t.condition for t in trail_list)
+            ),
+        )
+
+    @classmethod
+    def empty(cls, version: int = 0) -> "Snapshot":
+        """Snapshot of an empty catalog."""
+        return cls.from_trails({}, version=version)
+
+    def with_updates(self, trails: Iterable[Trail], version: int) -> "Snapshot":
+        """New snapshot with trails added or replaced; this one is unchanged.
+
+        The ID map and ordering are copied once, while the spatial index,
+        aggregates and any query indexes built on this snapshot are only
+        adjusted for the updated trails.
+        """
+        updates = {trail.id: trail for trail in trails}
+        data = self.trails.copy()
+        statuses = Counter(self.status_counts)
+        conditions = Counter(self.condition_counts)
+        removed, added = [], []
+        for trail in updates.values():
+            previous = data.get(trail.id)
+            if previous is not None:
+                removed.append(previous)
+                statuses[previous.status] -= 1
+                conditions[previous.condition] -= 1
+            added.append(trail)
+            statuses[trail.status] += 1
+            conditions[trail.condition] += 1
+            data[trail.id] = trail
+
+        snapshot = Snapshot(
+            version=version,
+            trails=MappingProxyType(data),
+            trail_list=tuple(data.values()),
+            spatial_index=self.spatial_index.updated(removed, added),
+            status_counts=MappingProxyType(+statuses),
+            condition_counts=MappingProxyType(+conditions),
+        )
+        snapshot._update_indexes(self, removed, added)
+        return snapshot
+
+    def _update_indexes(
+        self, previous: "Snapshot", removed: list[Trail], added: list[Trail]
+    ) -> None:
+        """Derive the query indexes built on ``previous`` for this snapshot.
+
+        Indexes that cannot be updated in place are left to be built later.
+        The ranking is only updated while the newest report stays the same.
+        """
+        if not added:
+            return
+        built = previous.__dict__
+        if "filter_index" in built:
+            index = built["filter_index"].updated(self.trail_list, added)
+            self.__dict__["filter_index"] = index
+            if "parks" in built:
+                parks = updated_parks(
+                    built["parks"], removed, added, self.trails, index.positions
+                )
+                self.__dict__["parks"] = MappingProxyType(parks)
+        if "recommended" in built:
+            reference = previous.newest_update
+            newest = max(t.last_updated for t in added)
+            if reference is None or newest > reference:
+                self.__dict__["newest_update"] = newest
+            elif newest == reference or all(
+                t.last_updated != reference for t in removed
+            ):
+                self.__dict__["newest_update"] = reference
+                self.__dict__["recommended"] = updated_ranking(
+                    built["recommended"], reference, removed, added
+                )
@@ -0,0 +1,225 @@
+"""Compact snapshot files for querying the catalog without the API.
+
+A snapshot file is gzip-compressed JSON holding every trail as a row of
+values, plus the status, condition and park bitmaps of a FilterIndex over
+the rows. Loading only parses the JSON: queries select positions with
+bitmap operations, apply range and name filters to the raw row values,
+and decode just the trails they return.
+"""
+
+import gzip
+import json
+import zlib
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from pathlib import Path
+
+from sftrails.bitmap import FilterIndex, bit_positions
+from sftrails.exceptions import SnapshotFileError
+from sftrails.models import Trail, TrailCondition, TrailStatus
+
+FORMAT = "sftrails-snapshot"
+FORMAT_VERSION = 2  # 2: park bitmaps keyed by slug
+
+# Row layout, in Trail.to_dict order
+FIELDS = (
+    "id",
+    "name",
+    "park",
+    "status",
+    "condition",
+    "length_miles",
+    "elevation_gain_ft",
+    "last_updated",
+    "notes",
+    "latitude",
+    "longitude",
+    "geometry",
+)
+_NAME = FIELDS.index("name")
+_STATUS, _CONDITION = FIELDS.index("status"), FIELDS.index("condition")
+_LENGTH = FIELDS.index("length_miles")
+_ELEVATION = FIELDS.index("elevation_gain_ft")
+
+
+def _encode_bitmaps(bitmaps: dict) -> dict[str, str]:
+    # Enum keys are stored by value; bitmaps as hex digits
+    return {
+        getattr(key, "value", key): format(bits, "x") for key, bits in bitmaps.items()
+    }
+
+
+def write_snapshot(
+    path: str | Path, trails: Sequence[Trail], created_at: datetime | None = None
+) -> int:
+    """Save trails and their filter bitmaps; returns the file size in bytes.
+
+    The file is replaced atomically, so concurrent readers see either the
+    old snapshot or the new one.
+    """
+    index = FilterIndex(trails)
+    document = {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "created_at": (created_at or datetime.now()).isoformat(),
+        "fields": FIELDS,
+        "rows": [
+            [record[f] for f in FIELDS] for record in map(Trail.to_dict, trails)
+        ],
+        "index": {
+            "status": _encode_bitmaps(index.by_status),
+            "condition": _encode_bitmaps(index.by_condition),
+            "park": _encode_bitmaps(index.by_park),
+        },
+    }
+    data = gzip.compress(
+        json.dumps(document, separators=(",", ":")).encode(), mtime=0
+    )
+    path = Path(path)
+    partial = path.with_name(path.name + ".partial")
+    partial.write_bytes(data)
+    partial.replace(path)
+    return len(data)
+
+
+class _RowTrails(Sequence[Trail]):
+    """Trails decoded from rows on first access."""
+
+    def __init__(self, rows: list[list]) -> None:
+        self._rows = rows
+        self._decoded: list[Trail | None] = [None] * len(rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, position):  # type: ignore[override]
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        trail = self._decoded[position]
+        if trail is None:
+            trail = Trail.from_dict(dict(zip(FIELDS, self._rows[position])))
+            self._decoded[position] = trail
+        return trail
+
+
+class SnapshotFile:
+    """A loaded snapshot file, queried without decoding every trail."""
+
+    def __init__(
+        self, rows: list[list], index: dict[str, dict[str, str]], created_at: datetime
+    ) -> None:
+        self.rows = rows
+        self.created_at = created_at
+        self.trails = _RowTrails(rows)
+        self.index = FilterIndex.from_bitmaps(
+            self.trails,
+            by_status={
+                TrailStatus(k): int(v, 16) for k, v in index["status"].items()
+            },
+            by_condition={
+                TrailCondition(k): int(v, 16) for k, v in index["condition"].items()
+            },
+            by_park={k: int(v, 16) for k, v in index["park"].items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SnapshotFile":
+        """Read a file written by ``write_snapshot``."""
+        try:
+            document = json.loads(gzip.decompress(Path(path).read_bytes()))
+        except OSError as e:
+            raise SnapshotFileError(f"Cannot read snapshot {path}: {e}") from e
+        except (zlib.error, EOFError, ValueError) as e:
+            raise SnapshotFileError(f"Not a snapshot file: {path}") from e
+
+        if not isinstance(document, dict) or document.get("format") != FORMAT:
+            raise SnapshotFileError(f"Not a snapshot file: {path}")
+        if document.get("format_version") != FORMAT_VERSION:
+            raise SnapshotFileError(
+                f"Unsupported snapshot format version "
+                f"{document.get('format_version')!r} in {path}"
+            )
+        if tuple(document["fields"]) != FIELDS:
+            raise SnapshotFileError(f"Unexpected snapshot fields in {path}")
+        try:
+            return cls(
+                document["rows"],
+                document["index"],
+                datetime.fromisoformat(document["created_at"]),
+            )
+        except (KeyError, ValueError) as e:
+            raise SnapshotFileError(f"Corrupt snapshot file {path}: {e}") from e
+
+    def select(
+        self,
+        status: Iterable[TrailStatus] | None = None,
+        condition: Iterable[TrailCondition] | None = None,
+        park: Iterable[str] | None = None,
+        exclude_status: Iterable[TrailStatus] = (),
+        exclude_condition: Iterable[TrailCondition] = (),
+        exclude_park: Iterable[str] = (),
+        min_length_miles: float | None = None,
+        max_length_miles: float | None = None,
+        min_elevation_gain_ft: int | None = None,
+        max_elevation_gain_ft: int | None = None,
+        name: str | None = None,
+    ) -> list[int]:
+        """Positions of trails matching every given filter, in file order.
+
+        Status, condition and park filters match any of their values, as in
+        ``TrailService.search_trails``; ``name`` is a case-insensitive
+        substring and the ranges are inclusive.
+        """
+        positions = bit_positions(
+            self.index.select(
+                statuses=status,
+                conditions=condition,
+                parks=park,
+                exclude_statuses=exclude_status,
+                exclude_conditions=exclude_condition,
+                exclude_parks=exclude_park,
+            )
+        )
+        rows = self.rows
+        for column, low, high in (
+            (_LENGTH, min_length_miles, max_length_miles),
+            (_ELEVATION, min_elevation_gain_ft, max_elevation_gain_ft),
+        ):
+            if low is not None:
+                positions = [p for p in positions if rows[p][column] >= low]
+            if high is not None:
+                positions = [p for p in positions if rows[p][column] <= high]
+        if name:
+            needle = name.lower()
+            positions = [p for p in positions if needle in rows[p][_NAME].lower()]
+        return positions
+
+    def search(self, **filters) -> list[Trail]:
+        """Trails matching ``filters`` (see ``select``), in file order."""
+        return [self.trails[p] for p in self.select(**filters)]
+
+    def counts(
+        self, positions: Iterable[int] | None = None
+    ) -> tuple[Counter[TrailStatus], Counter[TrailCondition]]:
+        """Status and condition counts over the given positions, or all trails.
+
+        Counting every trail only reads the bitmaps.
+        """
+        if positions is None:
+            return (
+                Counter({k: v.bit_count() for k, v in self.index.by_status.items()}),
+                Counter(
+                    {k: v.bit_count() for k, v in self.index.by_condition.items()}
+                ),
+            )
+        rows = [self.rows[p] for p in positions]
+        statuses = Counter(row[_STATUS] for row in rows)
+        conditions = Counter(row[_CONDITION] for row in rows)
+        return (
+            Counter({TrailStatus(k): n for k, n in statuses.items()}),
+            Counter({TrailCondition(k): n for k, n in conditions.items()}),
+        )
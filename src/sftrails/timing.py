@@ -0,0 +1,118 @@
+"""Per-request phase timings for the Server-Timing header.
+
+The API installs a ServerTiming collector for each request. Code on the
+request path wraps its work in ``timed("phase")``, which adds the elapsed
+``time.perf_counter()`` interval to the collector. Outside a request, for
+example during a background refresh, ``timed`` does nothing.
+"""
+
+import time
+from contextvars import ContextVar, Token
+
+
+class ServerTiming:
+    """Accumulated phase durations for one request."""
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        self.descriptions: dict[str, str] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a phase; repeated phases accumulate."""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def describe(self, name: str, description: str) -> None:
+        """Attach a description such as ``hit`` or ``miss`` to a phase."""
+        self.descriptions[name] = description
+
+    def header_value(self, total: float | None = None) -> str:
+        """Render phases as a Server-Timing header value in milliseconds."""
+        entries = dict(self.durations)
+        for name in self.descriptions:
+            entries.setdefault(name, 0.0)
+        if total is not None:
+            entries["total"] = total
+
+        metrics = []
+        for name, seconds in entries.items():
+            metric = name
+            if name in self.descriptions:
+                metric += f';desc="{self.descriptions[name]}"'
+            metrics.append(f"{metric};dur={seconds * 1000:.3f}")
+        return ", ".join(metrics)
+
+
+_current_timing: ContextVar[ServerTiming | None] = ContextVar(
+    "sftrails_server_timing", default=None
+)
+
+
+def start_timing() -> tuple[ServerTiming, Token]:
+    """Install a fresh collector for the current request."""
+    timing = ServerTiming()
+    return timing, _current_timing.set(timing)
+
+
+def stop_timing(token: Token) -> None:
+    """Remove the collector installed by ``start_timing``."""
+    _current_timing.reset(token)
+
+
+def current_timing() -> ServerTiming | None:
+    """Get the collector for the current request, if any."""
+    return _current_timing.get()
+
+
+class _Phase:
+    """Context manager adding its elapsed time to a collector."""
+
+    __slots__ = ("timing", "name", "start")
+
+    def __init__(self, timing: ServerTiming, name: str) -> None:
+        self.timing = timing
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "_Phase":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.timing.add(self.name, time.perf_counter() - self.start)
+
+
+class _NoopPhase:
+    """Phase stand-in used outside a timed request."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopPhase":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NOOP_PHASE = _NoopPhase()
+
+
+def timed(name: str) -> _Phase | _NoopPhase:
+    """Time a phase of the current request; use as a context manager."""
+    timing = _current_timing.get()
+    if timing is None:
+        return _NOOP_PHASE
+    return _Phase(timing, name)
+
+
+def annotate(name: str, description: str) -> None:
+    """Describe a phase of the current request, e.g. a cache ``hit``."""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.describe(name, description)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add a duration measured elsewhere, e.g. in a worker, to a phase."""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.add(name, seconds)
@@ -0,0 +1,143 @@
+"""Optional tracing spans across the API, service and client layers.
+
+Tracing is disabled by default: the global tracer is a NoopTracer whose
+spans are a shared object with empty methods. Install a RecordingTracer
+with ``set_tracer`` to collect spans, for example into an
+InMemorySpanExporter in tests.
+"""
+
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_time: float
+    end_time: float | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, or 0 while the span is still open."""
+        if self.end_time is None:
+            return 0.0
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+
+class SpanExporter(Protocol):
+    """Protocol for receiving finished spans."""
+
+    def export(self, span: Span) -> None:
+        """Handle a finished span."""
+        ...
+
+
+class InMemorySpanExporter:
+    """Span exporter that keeps finished spans in a list."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        """Store a finished span."""
+        self.spans.append(span)
+
+    def find(self, name: str) -> list[Span]:
+        """Get finished spans with a given name."""
+        return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        """Drop all stored spans."""
+        self.spans.clear()
+
+
+class _NoopSpan:
+    """Span stand-in used when tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Span | None] = ContextVar("sftrails_span", default=None)
+
+
+class NoopTracer:
+    """Tracer that records nothing."""
+
+    def start_span(self, name: str, attributes: dict | None = None) -> _NoopSpan:
+        """Return the shared no-op span."""
+        return _NOOP_SPAN
+
+
+class RecordingTracer:
+    """Tracer that records nested spans and hands them to an exporter."""
+
+    def __init__(self, exporter: SpanExporter) -> None:
+        self.exporter = exporter
+
+    @contextmanager
+    def start_span(
+        self, name: str, attributes: dict | None = None
+    ) -> Iterator[Span]:
+        """Open a span as a child of the current span, if any."""
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_time=time.perf_counter(),
+            attributes=dict(attributes) if attributes else {},
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.end_time = time.perf_counter()
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+
+_tracer: NoopTracer | RecordingTracer = NoopTracer()
+
+
+def get_tracer() -> NoopTracer | RecordingTracer:
+    """Get the global tracer."""
+    return _tracer
+
+
+def set_tracer(tracer: NoopTracer | RecordingTracer) -> None:
+    """Install the global tracer."""
+    global _tracer
+    _tracer = tracer
+
+
+def start_span(name: str, attributes: dict | None = None):
+    """Open a span on the global tracer; use as a context manager."""
+    return _tracer.start_span(name, attributes)
@@ -1,14 +1,73 @@
-"""Pytest fixtures for SF Trails tests."""
+"""Pytest fixtures and shared helpers for SF Trails tests."""
 
+from collections.abc import Sequence
 from datetime import datetime
 
 import pytest
+from fastapi.testclient import TestClient
 
+from sftrails.api.main import app
+from sftrails.changes import ChangeSet, ChangeType, TrailChange
 from sftrails.client import InMemoryTrailSource
 from sftrails.models import Trail, TrailCondition, TrailStatus
 from sftrails.service import TrailService
 
 
+class CountingSource(InMemoryTrailSource):
+    """In-memory source that counts full fetches."""
+
+    def __init__(self, trails: list[dict]) -> None:
+        super().__init__(trails)
+        self.fetches = 0
+
+    async def fetch_trails(self) -> list[dict]:
+        self.fetches += 1
+        return await super().fetch_trails()
+
+
+def raw_catalog(size: int, statuses: Sequence[str] = ("open",)) -> list[dict]:
+    """A generated catalog of raw trails, cycling through ``statuses``."""
+    return [
+        {
+            "id": f"trail-{i:05d}",
+            "name": f"Trail {i}",
+            "park": f"Park {i % 7}",
+            "status": statuses[i % len(statuses)],
+            "condition": "dry",
+            "length_miles": 1.0 + i % 10,
+            "elevation_gain_ft": 100 * (i % 20),
+            "last_updated": "2025-01-15T10:30:00",
+            "latitude": 37.7 + (i % 100) * 0.003,
+            "longitude": -122.5 + (i // 100 % 100) * 0.003,
+        }
+        for i in range(size)
+    ]
+
+
+def change_set(
+    *changes: TrailChange | Trail,
+    removed: Sequence[str] = (),
+    when: datetime | None = None,
+) -> ChangeSet:
+    """A version 1 change set; bare trails become updates of that trail."""
+    entries = [
+        change
+        if isinstance(change, TrailChange)
+        else TrailChange(ChangeType.UPDATED, change.id, change)
+        for change in changes
+    ]
+    entries += [TrailChange(ChangeType.REMOVED, trail_id) for trail_id in removed]
+    if when is None:
+        return ChangeSet(version=1, changes=tuple(entries))
+    return ChangeSet(version=1, changes=tuple(entries), timestamp=when)
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """Create a test client for the API."""
+    return TestClient(app)
+
+
 @pytest.fixture
 def sample_trail_data() -> list[dict]:
     """Sample trail data for testing."""
@@ -23,6 +82,8 @@ def sample_trail_data() -> list[dict]:
             "elevation_gain_ft": 2200,
             "last_updated": "2025-01-15T10:30:00",
             "notes": "Popular trail, expect crowds on weekends",
+            "latitude": 37.8955,
+            "longitude": -122.537,
         },
         {
             "id": "trail-002",
@@ -34,6 +95,8 @@ def sample_trail_data() -> list[dict]:
             "elevation_gain_ft": 800,
             "last_updated": "2025-01-15T09:00:00",
             "notes": "",
+            "latitude": 37.788,
+            "longitude": -122.493,
         },
         {
             "id": "trail-003",
@@ -45,6 +108,8 @@ def sample_trail_data() -> list[dict]:
             "elevation_gain_ft": 1100,
             "last_updated": "2025-01-14T16:45:00",
             "notes": "Closed due to storm damage",
+            "latitude": 37.9038,
+            "longitude": -122.6045,
         },
         {
             "id": "trail-004",
@@ -56,6 +121,8 @@ def sample_trail_data() -> list[dict]:
             "elevation_gain_ft": 400,
             "last_updated": "2025-01-15T08:00:00",
             "notes": "Section near Mile Rock closed for maintenance",
+            "latitude": 37.78,
+            "longitude": -122.511,
         },
         {
             "id": "trail-005",
@@ -67,6 +134,8 @@ def sample_trail_data() -> list[dict]:
             "elevation_gain_ft": 300,
             "last_updated": "2025-01-15T07:30:00",
             "notes": "Ice on north-facing sections",
+            "latitude": 37.7382,
+            "longitude": -122.4541,
         },
     ]
 
@@ -1,15 +1,23 @@
 """Tests for the FastAPI API endpoints."""
 
+import asyncio
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
+from sftrails.api import dependencies
 from sftrails.api.main import app
-
-
-@pytest.fixture
-def client():
-    """Create a test client for the API."""
-    return TestClient(app)
+from sftrails.api.routes.trails import stream_trail_changes
+from sftrails.api.stream import ChangeBroadcaster
+from sftrails.client import InMemoryTrailSource
+from sftrails.models import TrailCondition
+from sftrails.tracing import (
+    InMemorySpanExporter,
+    RecordingTracer,
+    get_tracer,
+    set_tracer,
+)
 
 
 class TestHealthEndpoint:
@@ -23,6 +31,25 @@ class TestHealthEndpoint:
         assert data["status"] == "healthy"
         assert "version" in data
 
+    def test_lifespan_loads_snapshot(self, monkeypatch, sample_trail_data):
+        """Test the snapshot is loaded at startup and its age reported."""
+        monkeypatch.setenv("SFTRAILS_REFRESH_INTERVAL", "60")
+        source = InMemoryTrailSource(sample_trail_data)
+        dependencies.configure_data_source(source)
+        try:
+            with TestClient(app) as client:
+                data = client.get("/health").json()
+        finally:
+            dependencies.configure_data_source(None)
+
+        assert data["snapshot_version"] == 1
+        assert 0 <= data["staleness_seconds"] < 5
+
+    def test_refresher_disabled(self, monkeypatch):
+        """Test SFTRAILS_REFRESH_INTERVAL=0 turns off background refreshes."""
+        monkeypatch.setenv("SFTRAILS_REFRESH_INTERVAL", "0")
+        assert dependencies.create_refresher() is None
+
 
 class TestRootEndpoint:
     """Tests for the root endpoint."""
@@ -37,6 +64,114 @@ class TestRootEndpoint:
         assert "docs" in data
 
 
+class TestMetricsEndpoint:
+    """Tests for the metrics endpoint."""
+
+    def test_metrics(self, client):
+        """Test metrics are exposed with per-route latency."""
+        client.get("/api/v1/trails/trail-001")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'route="/api/v1/trails/{trail_id}"' in text
+        assert "sftrails_http_request_seconds_bucket" in text
+        assert "sftrails_cache_requests_total" in text
+        assert "sftrails_snapshot_trails" in text
+
+
+class TestProfiling:
+    """Tests for the admin profile endpoint and X-Profile requests."""
+
+    TOKEN = "secret-token"
+
+    @pytest.fixture
+    def admin(self, monkeypatch):
+        """Enable admin features and return the auth header."""
+        monkeypatch.setenv("SFTRAILS_ADMIN_TOKEN", self.TOKEN)
+        return {"Authorization": f"Bearer {self.TOKEN}"}
+
+    def test_admin_disabled_by_default(self, client, monkeypatch):
+        """Test that the endpoint is hidden without a configured token."""
+        monkeypatch.delenv("SFTRAILS_ADMIN_TOKEN", raising=False)
+        response = client.get("/admin/profile?seconds=0.01")
+        assert response.status_code == 404
+
+    def test_admin_requires_token(self, client, admin):
+        """Test that a wrong token is rejected."""
+        response = client.get(
+            "/admin/profile?seconds=0.01",
+            headers={"Authorization": "Bearer wrong"},
+        )
+        assert response.status_code == 401
+
+    def test_profile_process(self, client, admin):
+        """Test sampling the process returns collapsed stacks."""
+        response = client.get(
+            "/admin/profile?seconds=0.05&interval_ms=1", headers=admin
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert int(response.headers["x-profile-samples"]) > 0
+        assert ";" in response.text
+
+    def test_x_profile_ignored_when_disabled(self, client, monkeypatch):
+        """Test that X-Profile is a no-op while admin features are off."""
+        monkeypatch.delenv("SFTRAILS_ADMIN_TOKEN", raising=False)
+        response = client.get("/api/v1/trails", headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        assert "trails" in response.json()
+
+    def test_x_profile_requires_token(self, client, admin):
+        """Test that X-Profile with a wrong token is rejected."""
+        response = client.get(
+            "/api/v1/trails",
+            headers={"X-Profile": "1", "Authorization": "Bearer wrong"},
+        )
+        assert response.status_code == 401
+
+    def test_x_profile_returns_profile(self, client, admin):
+        """Test that a profiled request returns stacks instead of the body."""
+        response = client.get(
+            "/api/v1/trails/nonexistent", headers={**admin, "X-Profile": "1"}
+        )
+        assert response.status_code == 200
+        assert response.headers["x-profile-status"] == "404"
+        assert "x-profile-samples" in response.headers
+        assert float(response.headers["x-profile-duration-ms"]) >= 0
+
+    def test_x_profile_bypasses_response_cache(self, client, admin):
+        """Test that profiled requests neither hit nor fill the cache."""
+        client.get("/api/v1/trails")
+        profiled = client.get("/api/v1/trails", headers={**admin, "X-Profile": "1"})
+        assert profiled.headers["x-profile-status"] == "200"
+
+        response = client.get("/api/v1/trails")
+        assert "trails" in response.json()
+
+
+class TestTracing:
+    """Tests for request tracing."""
+
+    def test_request_spans(self, client):
+        """Test a search request produces nested route and service spans."""
+        exporter = InMemorySpanExporter()
+        previous = get_tracer()
+        set_tracer(RecordingTracer(exporter))
+        try:
+            response = client.get("/api/v1/trails/search?q=ravine&status=closed")
+        finally:
+            set_tracer(previous)
+
+        assert response.status_code == 200
+        (root,) = exporter.find("http.request")
+        assert root.attributes["http.route"] == "/api/v1/trails/search"
+        assert root.attributes["http.status_code"] == 200
+        (filter_span,) = exporter.find("service.filter")
+        assert filter_span.trace_id == root.trace_id
+        assert exporter.find("route.serialize")
+
+
 class TestTrailsEndpoint:
     """Tests for the trails endpoints."""
 
@@ -73,6 +208,15 @@ class TestTrailsEndpoint:
         for trail in data["trails"]:
             assert trail["park"] == "Mount Tamalpais State Park"
 
+    def test_list_trails_filter_by_park_slug(self, client):
+        """Test park filters accept the park's slug or another spelling."""
+        park = client.get("/api/v1/parks/mount-tamalpais-state-park").json()
+        for value in ("mount-tamalpais-state-park", "MOUNT TAMALPAIS state-park"):
+            response = client.get("/api/v1/trails", params={"park": value})
+            assert response.status_code == 200
+            ids = [trail["id"] for trail in response.json()["trails"]]
+            assert ids == park["trail_ids"]
+
     def test_list_trails_filter_by_max_length(self, client):
         """Test filtering trails by max length."""
         response = client.get("/api/v1/trails?max_length_miles=3.0")
@@ -90,6 +234,34 @@ class TestTrailsEndpoint:
             assert trail["status"] == "open"
             assert trail["condition"] == "dry"
 
+    def test_list_trails_repeated_filters(self, client):
+        """Test repeated filter parameters match any of their values."""
+        response = client.get("/api/v1/trails?status=closed&status=limited")
+        assert response.status_code == 200
+        data = response.json()
+        assert {t["status"] for t in data["trails"]} == {"closed", "limited"}
+        assert data["filters_applied"]["status"] == "closed,limited"
+
+    def test_list_trails_exclusions(self, client):
+        """Test exclude parameters drop matching trails."""
+        response = client.get(
+            "/api/v1/trails?exclude_status=closed&exclude_condition=icy"
+            "&exclude_park=golden%20gate%20national%20recreation%20area"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["trails"]
+        for trail in data["trails"]:
+            assert trail["status"] != "closed"
+            assert trail["condition"] != "icy"
+            assert trail["park"] != "Golden Gate National Recreation Area"
+        assert data["filters_applied"]["exclude_condition"] == "icy"
+
+    def test_list_trails_invalid_repeated_value(self, client):
+        """Test an invalid value among repeated filters is rejected."""
+        response = client.get("/api/v1/trails?status=open&status=bogus")
+        assert response.status_code == 422
+
     def test_get_trail_by_id(self, client):
         """Test getting a specific trail by ID."""
         response = client.get("/api/v1/trails/trail-001")
@@ -136,6 +308,77 @@ class TestTrailsEndpoint:
             data["open"] + data["closed"] + data["limited"] + data["unknown"]
         )
 
+    def test_list_trails_compressed(self, client):
+        """Test list responses are compressed when the client accepts it."""
+        response = client.get("/api/v1/trails", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["total"] > 0
+
+    def test_list_trails_fields(self, client):
+        """Test sparse fieldsets return only the requested fields."""
+        response = client.get("/api/v1/trails?fields=id,name,status&status=open")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == len(data["trails"])
+        for trail in data["trails"]:
+            assert set(trail) == {"id", "name", "status"}
+            assert trail["status"] == "open"
+
+    def test_search_trails_fields(self, client):
+        """Test sparse fieldsets on the search endpoint."""
+        response = client.get("/api/v1/trails/search?q=dipsea&fields=id")
+        assert response.status_code == 200
+        assert response.json()["trails"] == [{"id": "trail-001"}]
+
+    def test_get_trail_fields(self, client):
+        """Test sparse fieldsets on a single trail."""
+        response = client.get("/api/v1/trails/trail-001?fields=name,is_accessible")
+        assert response.status_code == 200
+        assert response.json() == {"name": "Dipsea Trail", "is_accessible": True}
+
+    def test_unknown_field_rejected(self, client):
+        """Test unknown fields return 400."""
+        response = client.get("/api/v1/trails?fields=id,secret")
+        assert response.status_code == 400
+
+
+class TestNearbyEndpoint:
+    """Tests for the nearby trails endpoint."""
+
+    def test_nearby_trails(self, client):
+        """Test nearby trails are ordered by distance."""
+        response = client.get("/api/v1/trails/nearby?lat=37.78&lon=-122.51&radius=3")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == len(data["trails"]) > 0
+        distances = [t["distance_miles"] for t in data["trails"]]
+        assert distances == sorted(distances)
+        assert data["trails"][0]["id"] == "trail-004"
+        assert data["trails"][0]["latitude"] is not None
+
+    def test_nearby_with_status_and_limit(self, client):
+        """Test nearby search combined with filters and limit."""
+        response = client.get(
+            "/api/v1/trails/nearby?lat=37.78&lon=-122.51&radius=50&status=open&limit=2"
+        )
+        data = response.json()
+        assert len(data["trails"]) == 2
+        assert all(t["status"] == "open" for t in data["trails"])
+
+    def test_nearby_with_fields(self, client):
+        """Test sparse fieldsets keep the distance."""
+        response = client.get(
+            "/api/v1/trails/nearby?lat=37.78&lon=-122.51&radius=3&fields=id"
+        )
+        trail = response.json()["trails"][0]
+        assert set(trail) == {"id", "distance_miles"}
+
+    def test_nearby_requires_coordinates(self, client):
+        """Test lat and lon are required."""
+        response = client.get("/api/v1/trails/nearby?lat=37.78")
+        assert response.status_code == 422
+
 
 class TestParksEndpoint:
     """Tests for the parks endpoints."""
@@ -149,6 +392,7 @@ class TestParksEndpoint:
         assert "total" in data
         for park in data["parks"]:
             assert "name" in park
+            assert "slug" in park
             assert "trail_count" in park
             assert park["trail_count"] > 0
 
@@ -161,6 +405,31 @@ class TestParksEndpoint:
         for trail in data["trails"]:
             assert trail["park"] == "Mount Tamalpais State Park"
 
+    def test_get_park_trails_by_slug(self, client):
+        """Test park trails can be looked up by slug."""
+        by_name = client.get("/api/v1/parks/Mount%20Tamalpais%20State%20Park/trails")
+        by_slug = client.get("/api/v1/parks/mount-tamalpais-state-park/trails")
+        assert by_slug.status_code == 200
+        assert by_slug.json()["trails"] == by_name.json()["trails"]
+
+    def test_get_park(self, client):
+        """Test the park detail endpoint."""
+        parks = client.get("/api/v1/parks").json()["parks"]
+        slug = parks[0]["slug"]
+
+        response = client.get(f"/api/v1/parks/{slug}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["name"] == parks[0]["name"]
+        assert len(data["trail_ids"]) == data["trail_count"]
+        assert sum(data["by_status"].values()) == data["trail_count"]
+        assert data["total_length_miles"] > 0
+
+    def test_get_park_not_found(self, client):
+        """Test the park detail endpoint for an unknown slug."""
+        response = client.get("/api/v1/parks/nonexistent-park")
+        assert response.status_code == 404
+
     def test_get_park_trails_not_found(self, client):
         """Test getting trails for non-existent park."""
         response = client.get("/api/v1/parks/Nonexistent%20Park/trails")
@@ -195,3 +464,399 @@ class TestTrailResponseFields:
         data = response.json()
         for trail in data["trails"]:
             assert trail["is_accessible"] is False
+
+
+class TestChangesEndpoint:
+    """Tests for the incremental changes endpoint."""
+
+    def test_list_changes(self, client):
+        """Test listing changes since the initial version."""
+        response = client.get("/api/v1/trails/changes?since=0")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["since"] == 0
+        assert data["version"] >= 1
+        assert data["change_sets"][0]["version"] == 1
+        assert data["change_sets"][0]["changes"][0]["type"] == "added"
+
+    def test_list_changes_up_to_date(self, client):
+        """Test that a current version returns no change sets."""
+        version = client.get("/api/v1/trails/changes").json()["version"]
+        response = client.get(f"/api/v1/trails/changes?since={version}")
+        assert response.status_code == 200
+        assert response.json()["change_sets"] == []
+
+    def test_list_changes_unknown_version(self, client):
+        """Test that an unknown future version returns 410."""
+        response = client.get("/api/v1/trails/changes?since=999999")
+        assert response.status_code == 410
+
+
+class TestExportEndpoint:
+    """Tests for the catalog export endpoint."""
+
+    def test_export_ndjson(self, client):
+        """Test exporting the catalog as NDJSON."""
+        response = client.get("/api/v1/trails/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        total = client.get("/api/v1/trails").json()["total"]
+        assert len(lines) == total
+        assert "id" in json.loads(lines[0])
+
+    def test_export_csv(self, client):
+        """Test exporting the catalog as CSV."""
+        response = client.get("/api/v1/trails/export?format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text.startswith("id,name,park")
+
+    def test_export_gzip(self, client):
+        """Test gzip-encoded export when the client accepts it."""
+        response = client.get(
+            "/api/v1/trails/export", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        # httpx transparently decodes the gzip body
+        assert len(response.text.splitlines()) > 0
+
+    def test_export_gzip_refused(self, client):
+        """Test gzip with q=0 is not used, as with other responses."""
+        response = client.get(
+            "/api/v1/trails/export", headers={"Accept-Encoding": "br, gzip;q=0"}
+        )
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    def test_export_invalid_format(self, client):
+        """Test unknown export formats are rejected."""
+        response = client.get("/api/v1/trails/export?format=xml")
+        assert response.status_code == 422
+
+
+class TestStreamEndpoint:
+    """Tests for the trail change stream endpoint."""
+
+    async def test_stream_replays_from_since(self, trail_service):
+        """Test replay after a version, with the initial load as a resync."""
+        broadcaster = ChangeBroadcaster()
+        trail_service.add_listener(broadcaster.publish)
+
+        response = await stream_trail_changes(
+            since=0,
+            last_event_id=None,
+            service=trail_service,
+            broadcaster=broadcaster,
+        )
+        assert response.media_type == "text/event-stream"
+        await trail_service.patch_trails(
+            {"trail-001": {"condition": TrailCondition.MUDDY}}
+        )
+
+        frames = response.body_iterator
+        assert (await frames.__anext__()).startswith(b"id: 1\nevent: resync\n")
+        frame = await frames.__anext__()
+        assert frame.startswith(b"id: 2\nevent: changes\n")
+        assert b"trail-001" in frame
+        await frames.aclose()
+
+    async def test_stream_resumes_from_last_event_id(self, trail_service):
+        """Test the Last-Event-ID header is used when since is omitted."""
+        broadcaster = ChangeBroadcaster()
+        trail_service.add_listener(broadcaster.publish)
+
+        response = await stream_trail_changes(
+            since=None,
+            last_event_id="0",
+            service=trail_service,
+            broadcaster=broadcaster,
+        )
+        frame = await response.body_iterator.__anext__()
+        assert frame.startswith(b"id: 1\nevent: resync\n")
+        await response.body_iterator.aclose()
+
+
+class TestBulkIngest:
+    """Tests for the admin bulk trail update endpoints."""
+
+    @pytest.fixture
+    def admin(self, monkeypatch):
+        """Enable admin features on a fresh service and return auth headers."""
+        monkeypatch.setenv("SFTRAILS_ADMIN_TOKEN", "ingest-token")
+        dependencies.configure_data_source(None)
+        yield {"Authorization": "Bearer ingest-token"}
+        dependencies.configure_data_source(None)
+
+    @staticmethod
+    def trail_record(trail_id: str, **overrides) -> dict:
+        """A full trail record for upserts."""
+        return {
+            "id": trail_id,
+            "name": "New Trail",
+            "park": "Presidio",
+            "status": "open",
+            "condition": "dry",
+            "length_miles": 1.5,
+            "elevation_gain_ft": 100,
+            "last_updated": "2025-02-01T08:00:00",
+            **overrides,
+        }
+
+    def test_requires_token(self, client, admin):
+        """Test that bulk updates need the admin token."""
+        response = client.put("/api/v1/admin/trails", json={"trails": []})
+        assert response.status_code == 401
+
+    def test_put_adds_and_replaces(self, client, admin):
+        """Test upserting new and existing trails in one batch."""
+        before = client.get("/api/v1/trails/summary").json()
+        response = client.put(
+            "/api/v1/admin/trails",
+            json={
+                "trails": [
+                    self.trail_record("new-001"),
+                    self.trail_record("trail-001", status="closed"),
+                ]
+            },
+            headers=admin,
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["received"] == 2
+        assert body["changed"] == 2
+
+        assert client.get("/api/v1/trails/new-001").status_code == 200
+        summary = client.get("/api/v1/trails/summary").json()
+        assert summary["total_trails"] == before["total_trails"] + 1
+        assert summary["closed"] == before["closed"] + 1
+
+    def test_put_invalid_batch_applies_nothing(self, client, admin):
+        """Test that one invalid record rejects the whole batch."""
+        response = client.put(
+            "/api/v1/admin/trails",
+            json={
+                "trails": [
+                    self.trail_record("new-002"),
+                    self.trail_record("new-003", length_miles=-1),
+                ]
+            },
+            headers=admin,
+        )
+        assert response.status_code == 422
+        assert client.get("/api/v1/trails/new-002").status_code == 404
+
+    def test_patch_updates_fields(self, client, admin):
+        """Test partial updates invalidate cached responses."""
+        client.get("/api/v1/trails?status=closed")
+        response = client.patch(
+            "/api/v1/admin/trails",
+            json={"updates": [{"id": "trail-001", "status": "closed"}]},
+            headers=admin,
+        )
+        assert response.status_code == 200
+        assert response.json()["changed"] == 1
+
+        closed = client.get("/api/v1/trails?status=closed").json()
+        assert "trail-001" in {t["id"] for t in closed["trails"]}
+
+    def test_patch_unknown_trail(self, client, admin):
+        """Test that unknown trails reject the batch with 404."""
+        response = client.patch(
+            "/api/v1/admin/trails",
+            json={
+                "updates": [
+                    {"id": "trail-001", "status": "closed"},
+                    {"id": "missing", "status": "closed"},
+                ]
+            },
+            headers=admin,
+        )
+        assert response.status_code == 404
+        trail = client.get("/api/v1/trails/trail-001").json()
+        assert trail["status"] == "open"
+
+    def test_aware_timestamp_converted(self, client, admin):
+        """Test a UTC-offset timestamp is stored as naive UTC."""
+        response = client.patch(
+            "/api/v1/admin/trails",
+            json={
+                "updates": [
+                    {"id": "trail-001", "last_updated": "2025-01-16T00:00:00Z"},
+                    {"id": "trail-002", "last_updated": "2025-01-16T09:00:00+09:00"},
+                ]
+            },
+            headers=admin,
+        )
+        assert response.status_code == 200
+
+        for path in (
+            "/api/v1/trails/recommended",
+            "/api/v1/parks",
+            "/api/v1/parks/mount-tamalpais-state-park",
+        ):
+            assert client.get(path).status_code == 200, path
+        for trail_id in ("trail-001", "trail-002"):
+            trail = client.get(f"/api/v1/trails/{trail_id}").json()
+            assert trail["last_updated"] == "2025-01-16T00:00:00"
+
+    def test_patch_null_clears_optional_fields(self, client, admin):
+        """Test null clears optional fields."""
+        response = client.patch(
+            "/api/v1/admin/trails",
+            json={"updates": [{"id": "trail-003", "latitude": None, "notes": None}]},
+            headers=admin,
+        )
+        assert response.json()["changed"] == 1
+        trail = client.get("/api/v1/trails/trail-003").json()
+        assert trail["latitude"] is None
+        assert trail["notes"] == ""
+
+    def test_patch_null_rejected_for_required_fields(self, client, admin):
+        """Test null is rejected for fields a trail always has."""
+        response = client.patch(
+            "/api/v1/admin/trails",
+            json={"updates": [{"id": "trail-001", "status": None}]},
+            headers=admin,
+        )
+        assert response.status_code == 422
+        assert "status" in response.text
+
+
+class TestHistory:
+    """Tests for the trail and park status history endpoints."""
+
+    @pytest.fixture
+    def source(self, monkeypatch, sample_trail_data):
+        """A fresh in-memory source and service with history kept in memory."""
+        monkeypatch.delenv("SFTRAILS_HISTORY_DIR", raising=False)
+        source = InMemoryTrailSource(sample_trail_data)
+        dependencies.configure_data_source(source)
+        yield source
+        dependencies.configure_data_source(None)
+
+    def test_trail_history(self, client, source, sample_trail_data):
+        """Test a trail's status changes are recorded and summarized."""
+        client.get("/api/v1/trails")
+        source.add_trail({**sample_trail_data[0], "status": "closed"})
+        asyncio.run(dependencies.get_trail_service().refresh())
+
+        response = client.get("/api/v1/trails/trail-001/history")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["trail_id"] == "trail-001"
+        assert [e["status"] for e in data["events"]] == ["open", "closed"]
+        assert data["entries_by_status"] == {"open": 1, "closed": 1}
+        assert set(data["seconds_by_status"]) == {"open", "closed"}
+        assert "from" in data and "to" in data
+        # Durations up to now change without a new snapshot
+        assert response.headers["cache-control"] == "no-store"
+
+    def test_trail_history_range(self, client, source):
+        """Test the range is validated and limits the events returned."""
+        response = client.get(
+            "/api/v1/trails/trail-001/history",
+            params={"from": "2020-01-01T00:00:00", "to": "2020-02-01T00:00:00"},
+        )
+        assert response.status_code == 200
+        assert response.json()["events"] == []
+        assert "cache-control" not in response.headers
+
+        response = client.get(
+            "/api/v1/trails/trail-001/history",
+            params={"from": "2020-02-01T00:00:00", "to": "2020-01-01T00:00:00"},
+        )
+        assert response.status_code == 422
+
+    def test_aware_range_bounds(self, client, source):
+        """Test bounds with a UTC offset are converted to naive UTC."""
+        for params in (
+            {"from": "2020-01-01T00:00:00Z", "to": "2020-02-01T00:00:00Z"},
+            {"from": "2020-01-01T01:00:00+01:00", "to": "2020-01-31T16:00:00-08:00"},
+        ):
+            response = client.get("/api/v1/trails/trail-001/history", params=params)
+            assert response.status_code == 200, params
+            data = response.json()
+            assert data["from"] == "2020-01-01T00:00:00"
+            assert data["to"] == "2020-02-01T00:00:00"
+
+        response = client.get(
+            "/api/v1/parks/mount tamalpais state park/history",
+            params={"from": "2020-01-01T00:00:00Z"},
+        )
+        assert response.status_code == 200
+        response = client.get(
+            "/api/v1/trails/trail-001/history", params={"to": "2999-01-01T00:00:00Z"}
+        )
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-store"
+
+    def test_unknown_trail_history(self, client, source):
+        """Test history for an unknown trail is a 404."""
+        response = client.get("/api/v1/trails/nonexistent/history")
+        assert response.status_code == 404
+
+    def test_park_history(self, client, source):
+        """Test park rollups sum the park's trails."""
+        response = client.get("/api/v1/parks/mount tamalpais state park/history")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["park"] == "Mount Tamalpais State Park"
+        assert data["trail_count"] == 2
+        assert data["entries_by_status"] == {"open": 1, "closed": 1}
+        assert [t["trail_id"] for t in data["trails"]] == ["trail-001", "trail-003"]
+
+    def test_park_history_matches_every_spelling(
+        self, client, source, sample_trail_data
+    ):
+        """Test trails recorded under another spelling count for the park."""
+        client.get("/api/v1/trails")
+        source.add_trail(
+            {
+                **sample_trail_data[0],
+                "id": "trail-010",
+                "park": "Mount Tamalpais - State Park",
+            }
+        )
+        asyncio.run(dependencies.get_trail_service().refresh())
+
+        for park in ("mount-tamalpais-state-park", "Mount Tamalpais State Park"):
+            data = client.get(f"/api/v1/parks/{park}/history").json()
+            assert data["park"] == "Mount Tamalpais State Park"
+            assert [t["trail_id"] for t in data["trails"]] == [
+                "trail-001",
+                "trail-003",
+                "trail-010",
+            ]
+
+    def test_unknown_park_history(self, client, source):
+        """Test history for an unknown park is a 404."""
+        response = client.get("/api/v1/parks/Nowhere/history")
+        assert response.status_code == 404
+
+
+class TestRecommended:
+    """Tests for the recommended trails endpoint."""
+
+    def test_recommended(self, client):
+        """Test safe trails are returned best first with scores."""
+        response = client.get("/api/v1/trails/recommended", params={"limit": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] >= len(data["trails"]) == 2
+        scores = [t["score"] for t in data["trails"]]
+        assert scores == sorted(scores, reverse=True)
+        assert all(t["is_safe_for_hiking"] for t in data["trails"])
+
+    def test_recommended_fields(self, client):
+        """Test recommendations can be projected to selected fields."""
+        response = client.get(
+            "/api/v1/trails/recommended", params={"fields": "id,name"}
+        )
+        assert set(response.json()["trails"][0]) == {"id", "name", "score"}
+
+    def test_recommended_limit_validated(self, client):
+        """Test the limit is bounded."""
+        response = client.get("/api/v1/trails/recommended", params={"limit": 0})
+        assert response.status_code == 422
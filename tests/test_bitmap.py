@@ -0,0 +1,90 @@
+"""Tests for bitmap filter postings."""
+
+import random
+from dataclasses import replace
+
+from sftrails.bitmap import FilterIndex, bit_positions
+from sftrails.models import TrailCondition, TrailStatus
+
+
+class TestBitPositions:
+    """Tests for decoding bitmaps into positions."""
+
+    def test_empty(self):
+        """Test an empty bitmap has no positions."""
+        assert bit_positions(0) == []
+
+    def test_sparse_and_dense(self):
+        """Test sparse and dense bitmaps decode to the same positions."""
+        rng = random.Random(7)
+        for density in (0.001, 0.5, 1.0):
+            expected = [i for i in range(5000) if rng.random() < density]
+            bits = sum(1 << i for i in expected)
+            assert bit_positions(bits) == expected
+
+
+class TestFilterIndex:
+    """Tests for selecting trails with set operations."""
+
+    def _trails(self, single_trail):
+        return [
+            replace(single_trail, id="a", status=TrailStatus.OPEN),
+            replace(
+                single_trail,
+                id="b",
+                status=TrailStatus.CLOSED,
+                condition=TrailCondition.MUDDY,
+            ),
+            replace(single_trail, id="c", status=TrailStatus.LIMITED, park="Other"),
+            replace(single_trail, id="d", condition=TrailCondition.WET),
+        ]
+
+    def _ids(self, index, bits):
+        return [t.id for t in index.trails(bits)]
+
+    def test_no_filters(self, single_trail):
+        """Test no filters select every trail in order."""
+        index = FilterIndex(self._trails(single_trail))
+        assert self._ids(index, index.select()) == ["a", "b", "c", "d"]
+
+    def test_union_within_filter(self, single_trail):
+        """Test repeated values of one filter match any of them."""
+        index = FilterIndex(self._trails(single_trail))
+        bits = index.select(statuses=[TrailStatus.CLOSED, TrailStatus.LIMITED])
+        assert self._ids(index, bits) == ["b", "c"]
+
+    def test_intersection_across_filters(self, single_trail):
+        """Test different filters must all match."""
+        index = FilterIndex(self._trails(single_trail))
+        bits = index.select(
+            statuses=[TrailStatus.OPEN], conditions=[TrailCondition.WET]
+        )
+        assert self._ids(index, bits) == ["d"]
+
+    def test_exclusions(self, single_trail):
+        """Test excluded values remove trails."""
+        index = FilterIndex(self._trails(single_trail))
+        bits = index.select(
+            exclude_statuses=[TrailStatus.CLOSED], exclude_parks=["OTHER"]
+        )
+        assert self._ids(index, bits) == ["a", "d"]
+
+    def test_unknown_and_empty_values(self, single_trail):
+        """Test unknown values match nothing, and so does an empty filter."""
+        index = FilterIndex(self._trails(single_trail))
+        assert index.select(parks=["Nowhere"]) == 0
+        assert index.select(statuses=[]) == 0
+        assert index.select(exclude_parks=["Nowhere"]) == index.all
+
+    def test_park_by_slug_or_spelling(self, single_trail):
+        """Test parks match by slug and by any spelling of their name."""
+        trails = [
+            replace(single_trail, id="a", park="Mount Davidson Park"),
+            replace(single_trail, id="b", park="Mt. Sutro"),
+            replace(single_trail, id="c", park="mount davidson park"),
+        ]
+        index = FilterIndex(trails)
+        for park in ("mount-davidson-park", "Mount Davidson Park."):
+            assert self._ids(index, index.select(parks=[park])) == ["a", "c"]
+        bits = index.select(exclude_parks=["mt-sutro"])
+        assert self._ids(index, bits) == ["a", "c"]
@@ -0,0 +1,102 @@
+"""Tests for chunked snapshot building."""
+
+import asyncio
+from dataclasses import replace
+
+from sftrails.builder import (
+    build_steps,
+    diff_steps,
+    run_cooperatively,
+    run_steps,
+)
+from sftrails.changes import diff_trails
+from sftrails.models import Trail, TrailStatus
+from tests.conftest import raw_catalog
+
+
+class TestBuildSteps:
+    """Tests for build_steps."""
+
+    def test_build_catalog(self):
+        """Test the built catalog matches decoding trails directly."""
+        raw = raw_catalog(1200, statuses=("open", "closed", "limited"))
+        catalog = run_steps(build_steps, raw, 500)
+
+        assert catalog.trails == {r["id"]: Trail.from_dict(r) for r in raw}
+        assert len(catalog.spatial_index) == 1200
+        assert catalog.status_counts[TrailStatus.OPEN] == 400
+        assert catalog.decode_seconds > 0
+
+    def test_yields_per_chunk(self):
+        """Test the steps yield once per chunk of decoding and indexing."""
+        steps = build_steps(raw_catalog(1200), chunk_size=500)
+        assert sum(1 for _ in steps) == 6
+
+    def test_to_snapshot(self):
+        """Test wrapping a catalog in a versioned snapshot."""
+        catalog = run_steps(build_steps, raw_catalog(10))
+        snapshot = catalog.to_snapshot(7)
+
+        assert snapshot.version == 7
+        assert len(snapshot) == 10
+        assert snapshot.trails["trail-00003"] is catalog.trails["trail-00003"]
+        assert snapshot.status_counts == catalog.status_counts
+
+
+class TestDiffSteps:
+    """Tests for diff_steps."""
+
+    def test_matches_diff_trails(self):
+        """Test chunked diffing gives the same changes as diff_trails."""
+        old = run_steps(build_steps, raw_catalog(1200)).trails
+        new = dict(old)
+        del new["trail-00001"]
+        new["trail-00699"] = replace(new["trail-00699"], status=TrailStatus.CLOSED)
+        new["trail-09999"] = replace(new["trail-00002"], id="trail-09999")
+
+        changes = run_steps(diff_steps, old, new, 100)
+        assert changes == diff_trails(old, new)
+        assert len(changes) == 3
+
+
+class TestRunCooperatively:
+    """Tests for run_cooperatively."""
+
+    async def test_yields_to_other_tasks(self):
+        """Test other tasks run during a build once the budget is used up."""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        catalog = await run_cooperatively(
+            build_steps(raw_catalog(2000), chunk_size=50), budget=0
+        )
+        task.cancel()
+
+        assert len(catalog.trails) == 2000
+        assert ticks > 10
+
+    async def test_no_budget_never_yields(self):
+        """Test steps run to completion when there is no budget."""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        started = ticks
+        await run_cooperatively(
+            build_steps(raw_catalog(2000), chunk_size=50), budget=None
+        )
+        task.cancel()
+
+        assert ticks == started
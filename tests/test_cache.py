@@ -0,0 +1,331 @@
+"""Tests for shared cache backends and the cached trail source."""
+
+import asyncio
+
+import pytest
+
+from sftrails.cache import (
+    CATALOG_LOCK_KEY,
+    INVALIDATE_CHANNEL,
+    CachedTrailSource,
+    InvalidationListener,
+    LRUCache,
+    RedisCache,
+    TieredCache,
+    create_cache,
+)
+from sftrails.client import InMemoryTrailSource
+from sftrails.exceptions import CacheError
+from sftrails.respserver import RespServer
+from sftrails.service import TrailService
+from tests.conftest import CountingSource
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _next_message(messages, timeout: float = 1.0) -> bytes:
+    return await asyncio.wait_for(messages.__anext__(), timeout)
+
+
+async def _wait_for(predicate, timeout: float = 1.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def resp_server():
+    """A local Redis-protocol server on a free port."""
+    async with RespServer() as server:
+        yield server
+
+
+class TestLRUCache:
+    """Tests for the in-process backend."""
+
+    async def test_get_set_delete(self):
+        """Test values round-trip and can be deleted."""
+        cache = LRUCache()
+        await cache.set("a", b"1")
+        assert await cache.get("a") == b"1"
+        await cache.delete("a")
+        assert await cache.get("a") is None
+
+    async def test_ttl_and_add(self):
+        """Test entries expire and add only stores absent keys."""
+        clock = FakeClock()
+        cache = LRUCache(clock=clock)
+        assert await cache.add("lock", b"1", ttl=5)
+        assert not await cache.add("lock", b"2", ttl=5)
+        clock.now += 5
+        assert await cache.get("lock") is None
+        assert await cache.add("lock", b"3")
+
+    async def test_eviction(self):
+        """Test the least recently used entry is evicted."""
+        cache = LRUCache(max_entries=2)
+        await cache.set("a", b"1")
+        await cache.set("b", b"2")
+        await cache.get("a")
+        await cache.set("c", b"3")
+        assert await cache.get("b") is None
+        assert len(cache) == 2
+
+    async def test_pubsub(self):
+        """Test subscribers receive messages published after subscribing."""
+        cache = LRUCache()
+        messages = cache.subscribe("news")
+        pending = asyncio.ensure_future(_next_message(messages))
+        await _wait_for(lambda: cache._subscribers.get("news"))
+        await cache.publish("news", b"hello")
+        assert await pending == b"hello"
+        await messages.aclose()
+
+
+class TestRedisCache:
+    """Tests for the Redis-protocol backend against the local stand-in."""
+
+    async def test_commands(self, resp_server):
+        """Test get, set with TTL, add and delete."""
+        cache = RedisCache.from_url(resp_server.url + "/1")
+        await cache.set("a", b"\x00binary\r\n")
+        assert await cache.get("a") == b"\x00binary\r\n"
+        assert not await cache.add("a", b"x")
+        assert await cache.add("b", b"x", ttl=0.05)
+        await asyncio.sleep(0.1)
+        assert await cache.get("b") is None
+        await cache.delete("a")
+        assert await cache.get("a") is None
+        await cache.close()
+
+    async def test_pubsub(self, resp_server):
+        """Test messages reach subscribers on their own connection."""
+        cache = RedisCache.from_url(resp_server.url)
+        messages = cache.subscribe("news")
+        pending = asyncio.ensure_future(_next_message(messages))
+        await _wait_for(lambda: resp_server._channels.get(b"news"))
+        await cache.publish("news", b"hello")
+        assert await pending == b"hello"
+        await messages.aclose()
+        await cache.close()
+
+    async def test_unreachable(self, resp_server):
+        """Test connection failures raise CacheError and are retried."""
+        cache = RedisCache("127.0.0.1", resp_server.port, timeout=1.0)
+        await resp_server.stop()
+        with pytest.raises(CacheError):
+            await cache.get("a")
+
+        await resp_server.start()
+        assert await cache.get("a") is None
+        await cache.close()
+
+    async def test_cancel_mid_reply_drops_connection(self):
+        """Test a command cancelled mid-reply leaves no bytes for the next."""
+        connections = 0
+        partial_sent = asyncio.Event()
+
+        async def handle(reader, writer):
+            nonlocal connections
+            connections += 1
+            if connections == 1:
+                # Stall partway through the first reply, finish it later
+                await reader.read(1024)
+                writer.write(b"$5\r\nhel")
+                partial_sent.set()
+                await reader.read(1024)
+                writer.write(b"lo\r\n$2\r\nok\r\n")
+            while await reader.read(1024):
+                writer.write(b"$2\r\nok\r\n")
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = RedisCache("127.0.0.1", port, timeout=1.0)
+
+        pending = asyncio.create_task(cache.get("a"))
+        await asyncio.wait_for(partial_sent.wait(), 1.0)
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+
+        assert await cache.get("b") == b"ok"
+        assert connections == 2
+        await cache.close()
+        server.close()
+        await server.wait_closed()
+
+    def test_from_url(self):
+        """Test URLs are parsed and other schemes rejected."""
+        cache = RedisCache.from_url("redis://cache:6380/2")
+        assert (cache.host, cache.port, cache.db) == ("cache", 6380, 2)
+        with pytest.raises(ValueError):
+            RedisCache.from_url("memcached://cache")
+
+
+class TestTieredCache:
+    """Tests for the L1/L2 lookup path."""
+
+    async def test_l2_hits_fill_l1(self):
+        """Test values found in L2 are served from L1 afterwards."""
+        l2 = LRUCache()
+        cache = TieredCache(l2)
+        await l2.set("a", b"1")
+        assert await cache.get("a") == b"1"
+        await l2.delete("a")
+        assert await cache.get("a") == b"1"
+
+    async def test_l1_ttl(self):
+        """Test L1 copies expire so changes in L2 are picked up."""
+        clock = FakeClock()
+        l2 = LRUCache()
+        cache = TieredCache(l2, LRUCache(clock=clock), l1_ttl=1.0)
+        await cache.set("a", b"1")
+        await l2.set("a", b"2")
+        assert await cache.get("a") == b"1"
+        clock.now += 1
+        assert await cache.get("a") == b"2"
+
+    def test_create_cache(self, resp_server):
+        """Test backends are chosen by URL."""
+        assert isinstance(create_cache("memory://"), LRUCache)
+        cache = create_cache(resp_server.url)
+        assert isinstance(cache, TieredCache)
+        assert isinstance(cache.l2, RedisCache)
+
+
+class TestCachedTrailSource:
+    """Tests for sharing catalog fetches between instances."""
+
+    async def test_instances_share_one_upstream_fetch(
+        self, resp_server, sample_trail_data
+    ):
+        """Test a second instance gets the catalog from the cache."""
+        upstream = CountingSource(sample_trail_data)
+        first = CachedTrailSource(upstream, create_cache(resp_server.url))
+        second = CachedTrailSource(upstream, create_cache(resp_server.url))
+
+        assert await first.fetch_trails() == sample_trail_data
+        assert await second.fetch_trails() == sample_trail_data
+        assert upstream.fetches == 1
+        assert first.digest == second.digest
+
+    async def test_stale_catalog_refetched(self, sample_trail_data):
+        """Test catalogs older than max_age are fetched again."""
+        clock = FakeClock()
+        upstream = CountingSource(sample_trail_data)
+        source = CachedTrailSource(upstream, LRUCache(), max_age=30, clock=clock)
+
+        await source.fetch_trails()
+        clock.now += 29
+        await source.fetch_trails()
+        assert upstream.fetches == 1
+        clock.now += 1
+        await source.fetch_trails()
+        assert upstream.fetches == 2
+
+    async def test_stale_catalog_served_while_locked(self, sample_trail_data):
+        """Test other instances serve the stale catalog during a fetch."""
+        clock = FakeClock()
+        cache = LRUCache()
+        upstream = CountingSource(sample_trail_data)
+        source = CachedTrailSource(upstream, cache, max_age=30, clock=clock)
+        await source.fetch_trails()
+
+        clock.now += 60
+        await cache.add(CATALOG_LOCK_KEY, b"1")
+        assert await source.fetch_trails() == sample_trail_data
+        assert upstream.fetches == 1
+
+    async def test_new_catalog_announced(self, sample_trail_data):
+        """Test only catalogs with new content are announced."""
+        clock = FakeClock()
+        cache = LRUCache()
+        upstream = CountingSource(sample_trail_data)
+        source = CachedTrailSource(upstream, cache, max_age=30, clock=clock)
+        messages = cache.subscribe(INVALIDATE_CHANNEL)
+        pending = asyncio.ensure_future(_next_message(messages))
+        await _wait_for(lambda: cache._subscribers.get(INVALIDATE_CHANNEL))
+
+        await source.fetch_trails()
+        assert (await pending).decode() == source.digest
+
+        clock.now += 60
+        await source.fetch_trails()
+        upstream.add_trail({**sample_trail_data[0], "status": "closed"})
+        clock.now += 60
+        await source.fetch_trails()
+        assert (await _next_message(messages)).decode() == source.digest
+        await messages.aclose()
+
+    async def test_cache_down_falls_back_to_upstream(self, sample_trail_data):
+        """Test an unreachable cache does not break fetches."""
+        upstream = CountingSource(sample_trail_data)
+        cache = RedisCache("127.0.0.1", 1, timeout=0.5)
+        source = CachedTrailSource(upstream, cache)
+        assert await source.fetch_trails() == sample_trail_data
+        assert upstream.fetches == 1
+
+
+class TestInvalidationListener:
+    """Tests for refreshing when another instance caches a catalog."""
+
+    async def test_refreshes_from_cache(self, resp_server, sample_trail_data):
+        """Test a new catalog from one instance reaches the other's snapshot."""
+        upstream = CountingSource(sample_trail_data)
+        clock = FakeClock()
+        sources = [
+            CachedTrailSource(upstream, create_cache(resp_server.url), clock=clock)
+            for _ in range(2)
+        ]
+        services = [TrailService(source) for source in sources]
+        for service in services:
+            await service.refresh()
+
+        listener = InvalidationListener(sources[1], services[1].refresh)
+        await listener.start()
+        await _wait_for(lambda: resp_server._channels.get(b"sftrails:invalidate"))
+
+        upstream.add_trail({**sample_trail_data[0], "status": "closed"})
+        clock.now += 60
+        await services[0].refresh()
+        await _wait_for(lambda: services[1].version == services[0].version)
+
+        trail = services[1].snapshot.trails[sample_trail_data[0]["id"]]
+        assert trail.status.value == "closed"
+        assert upstream.fetches == 2
+        await listener.stop()
+        assert not listener.running
+
+    async def test_resubscribes_after_unexpected_error(self, sample_trail_data):
+        """Test an unexpected error is logged and the listener resubscribes."""
+        cache = LRUCache()
+        source = CachedTrailSource(CountingSource(sample_trail_data), cache)
+        invalidations = []
+
+        async def on_invalidate():
+            invalidations.append(source._announced)
+
+        listener = InvalidationListener(source, on_invalidate, retry_delay=0.01)
+        await listener.start()
+        await _wait_for(lambda: cache._subscribers.get(INVALIDATE_CHANNEL))
+        first = set(cache._subscribers[INVALIDATE_CHANNEL])
+        await cache.publish(INVALIDATE_CHANNEL, b"\xff")  # Not UTF-8
+
+        subscribers = cache._subscribers[INVALIDATE_CHANNEL]
+        await _wait_for(lambda: subscribers and subscribers != first)
+        await cache.publish(INVALIDATE_CHANNEL, b"digest-2")
+        await _wait_for(lambda: invalidations)
+        assert invalidations == ["digest-2"]
+        assert listener.running
+        await listener.stop()
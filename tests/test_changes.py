@@ -0,0 +1,132 @@
+"""Tests for snapshot change tracking."""
+
+from dataclasses import replace
+
+import pytest
+
+from sftrails.changes import ChangeLog, ChangeType, diff_trails, diff_updates
+from sftrails.exceptions import ChangeHistoryExpiredError
+from sftrails.models import TrailCondition, TrailStatus
+
+
+class TestDiffTrails:
+    """Tests for diff_trails."""
+
+    def test_identical_snapshots_have_no_changes(self, sample_trails):
+        """Test that identical snapshots produce no changes."""
+        snapshot = {t.id: t for t in sample_trails}
+        assert diff_trails(snapshot, dict(snapshot)) == []
+
+    def test_added_trails(self, sample_trails):
+        """Test that new trails are reported as added."""
+        changes = diff_trails({}, {t.id: t for t in sample_trails})
+        assert len(changes) == len(sample_trails)
+        assert all(c.type == ChangeType.ADDED for c in changes)
+
+    def test_removed_trail(self, sample_trails):
+        """Test that missing trails are reported as removed."""
+        old = {t.id: t for t in sample_trails}
+        new = {t.id: t for t in sample_trails[1:]}
+        changes = diff_trails(old, new)
+        assert len(changes) == 1
+        assert changes[0].type == ChangeType.REMOVED
+        assert changes[0].trail_id == "trail-001"
+        assert changes[0].trail is None
+        assert changes[0].previous_status == TrailStatus.OPEN
+
+    def test_status_transition(self, sample_trails):
+        """Test that a status change records the previous status."""
+        old = {t.id: t for t in sample_trails}
+        new = dict(old)
+        new["trail-001"] = replace(
+            old["trail-001"], status=TrailStatus.CLOSED, condition=TrailCondition.MUDDY
+        )
+        changes = diff_trails(old, new)
+        assert len(changes) == 1
+        change = changes[0]
+        assert change.type == ChangeType.UPDATED
+        assert change.trail.status == TrailStatus.CLOSED
+        assert change.previous_status == TrailStatus.OPEN
+        assert change.previous_condition == TrailCondition.DRY
+
+    def test_changed_fields(self, sample_trails):
+        """Test that updates list exactly the fields that differ."""
+        old = {t.id: t for t in sample_trails}
+        new = dict(old)
+        new["trail-002"] = replace(
+            old["trail-002"], notes="Washed out", status=TrailStatus.CLOSED
+        )
+        (change,) = diff_trails(old, new)
+        assert change.changed_fields == ("status", "notes")
+        assert change.status_changed
+
+
+class TestDiffUpdates:
+    """Tests for diff_updates."""
+
+    def test_only_updated_trails_compared(self, sample_trails):
+        """Test that trails missing from the batch are not treated as removed."""
+        old = {t.id: t for t in sample_trails}
+        updated = replace(old["trail-001"], status=TrailStatus.CLOSED)
+        (change,) = diff_updates(old, [updated])
+        assert change.type == ChangeType.UPDATED
+        assert change.changed_fields == ("status",)
+
+    def test_unchanged_and_new(self, sample_trails, single_trail):
+        """Test that identical trails are skipped and new ones added."""
+        old = {t.id: t for t in sample_trails}
+        changes = diff_updates(old, [old["trail-002"], single_trail])
+        assert [(c.type, c.trail_id) for c in changes] == [
+            (ChangeType.ADDED, single_trail.id)
+        ]
+
+    def test_last_update_wins(self, sample_trails):
+        """Test that repeated updates to one trail collapse to the last."""
+        old = {t.id: t for t in sample_trails}
+        first = replace(old["trail-001"], notes="first")
+        second = replace(old["trail-001"], notes="second")
+        (change,) = diff_updates(old, [first, second])
+        assert change.trail.notes == "second"
+
+
+class TestChangeLog:
+    """Tests for ChangeLog."""
+
+    def test_record_assigns_consecutive_versions(self):
+        """Test that each recorded change set gets the next version."""
+        log = ChangeLog()
+        assert log.record([]).version == 1
+        assert log.record([]).version == 2
+        assert log.version == 2
+
+    def test_since_returns_newer_change_sets(self):
+        """Test that since() returns only newer change sets in order."""
+        log = ChangeLog()
+        for _ in range(4):
+            log.record([])
+        assert [cs.version for cs in log.since(2)] == [3, 4]
+        assert log.since(4) == []
+
+    def test_ring_buffer_is_bounded(self):
+        """Test that old change sets are evicted."""
+        log = ChangeLog(max_size=3)
+        for _ in range(5):
+            log.record([])
+        assert len(log) == 3
+        assert log.oldest_version == 2
+        assert [cs.version for cs in log.since(2)] == [3, 4, 5]
+
+    def test_since_expired_version_raises(self):
+        """Test that evicted versions raise ChangeHistoryExpiredError."""
+        log = ChangeLog(max_size=2)
+        for _ in range(4):
+            log.record([])
+        with pytest.raises(ChangeHistoryExpiredError) as exc_info:
+            log.since(1)
+        assert exc_info.value.oldest_version == 2
+
+    def test_since_future_version_raises(self):
+        """Test that versions ahead of the log raise."""
+        log = ChangeLog()
+        with pytest.raises(ChangeHistoryExpiredError):
+            log.since(5)
@@ -0,0 +1,155 @@
+"""Tests for the sftrails command-line tool."""
+
+import csv
+import io
+import json
+
+import pytest
+
+from sftrails.cli import main
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, sample_trail_data) -> str:
+    """Snapshot file built with ``sftrails fetch`` from a JSON input file."""
+    raw = tmp_path / "trails.json"
+    raw.write_text(json.dumps(sample_trail_data))
+    path = str(tmp_path / "trails.snapshot")
+    assert main(["fetch", "--input", str(raw), "-o", path]) == 0
+    return path
+
+
+def run(*argv: str) -> str:
+    """Run the CLI and return its standard output."""
+    out = io.StringIO()
+    assert main(list(argv), out=out) == 0
+    return out.getvalue()
+
+
+class TestQuery:
+    """Tests for ``sftrails query``."""
+
+    def test_json(self, snapshot_path):
+        """Test filtered trails are printed as a JSON array."""
+        records = json.loads(
+            run("query", snapshot_path, "--status", "open", "--status", "limited")
+        )
+        assert [r["id"] for r in records] == [
+            "trail-001",
+            "trail-002",
+            "trail-004",
+            "trail-005",
+        ]
+        assert records[0]["is_accessible"] is True
+
+    def test_csv_fields_and_limit(self, snapshot_path):
+        """Test CSV output with selected fields and a limit."""
+        output = run(
+            "query",
+            snapshot_path,
+            "--park",
+            "Mount Tamalpais State Park",
+            "--fields",
+            "id,status",
+            "--format",
+            "csv",
+            "--limit",
+            "1",
+        )
+        rows = list(csv.reader(io.StringIO(output)))
+        assert rows == [["id", "status"], ["trail-001", "open"]]
+
+    def test_ndjson_range(self, snapshot_path):
+        """Test NDJSON output with a length range."""
+        output = run(
+            "query",
+            snapshot_path,
+            "--min-length",
+            "2",
+            "--max-length",
+            "4",
+            "--format",
+            "ndjson",
+        )
+        ids = [json.loads(line)["id"] for line in output.splitlines()]
+        assert ids == ["trail-003", "trail-004"]
+
+    def test_unknown_field(self, snapshot_path, capsys):
+        """Test unknown fields fail with exit status 1."""
+        assert main(["query", snapshot_path, "--fields", "id,bogus"]) == 1
+        assert "bogus" in capsys.readouterr().err
+
+
+class TestSummary:
+    """Tests for ``sftrails summary``."""
+
+    def test_json(self, snapshot_path):
+        """Test the summary matches the API's summary shape."""
+        summary = json.loads(run("summary", snapshot_path))
+        assert summary["total_trails"] == 5
+        assert summary["open"] == 3
+        assert summary["closed"] == 1
+        assert summary["by_condition"]["dry"] == 2
+
+    def test_filtered_csv(self, snapshot_path):
+        """Test a filtered summary as CSV rows."""
+        output = run(
+            "summary",
+            snapshot_path,
+            "--name",
+            "trail",
+            "--park",
+            "Mount Davidson Park",
+            "--format",
+            "csv",
+        )
+        rows = {
+            (r["group"], r["value"]): int(r["count"])
+            for r in csv.DictReader(io.StringIO(output))
+        }
+        assert rows[("status", "open")] == 1
+        assert rows[("status", "closed")] == 0
+        assert rows[("condition", "icy")] == 1
+
+
+    @pytest.mark.parametrize("flag", ["--max-length", "--max-elevation"])
+    def test_zero_bound(self, snapshot_path, flag):
+        """Test a zero upper bound filters the summary rather than being ignored."""
+        summary = json.loads(run("summary", snapshot_path, flag, "0"))
+        assert summary["total_trails"] == 0
+        assert summary["by_condition"] == {}
+
+
+class TestFetch:
+    """Tests for ``sftrails fetch``."""
+
+    def test_requires_source(self, tmp_path, monkeypatch, capsys):
+        """Test fetching without a URL or input file fails."""
+        monkeypatch.delenv("SFTRAILS_UPSTREAM_URL", raising=False)
+        assert main(["fetch", "-o", str(tmp_path / "out.snapshot")]) == 1
+        assert "--url" in capsys.readouterr().err
+
+    @pytest.mark.parametrize(
+        "field, value, message",
+        [
+            ("name", None, "Invalid trail record 1 (trail-002): missing field 'name'"),
+            ("status", "flooded", "Invalid trail record 1 (trail-002): 'flooded'"),
+            ("length_miles", [], "Invalid trail record 1 (trail-002): float()"),
+        ],
+    )
+    def test_malformed_record(
+        self, tmp_path, sample_trail_data, capsys, field, value, message
+    ):
+        """Test a bad input record is reported without writing a snapshot."""
+        record = dict(sample_trail_data[1])
+        if value is None:
+            del record[field]
+        else:
+            record[field] = value
+        raw = tmp_path / "trails.json"
+        raw.write_text(json.dumps([sample_trail_data[0], record]))
+        output = tmp_path / "out.snapshot"
+
+        assert main(["fetch", "--input", str(raw), "-o", str(output)]) == 1
+        assert message in capsys.readouterr().err
+        assert not output.exists()
@@ -1,8 +1,10 @@
 """Tests for trail data clients."""
 
+import httpx
 import pytest
 
-from sftrails.client import InMemoryTrailSource
+from sftrails.client import UPSTREAM_ERRORS, HTTPTrailClient, InMemoryTrailSource
+from sftrails.exceptions import DataFetchError
 
 
 class TestInMemoryTrailSource:
@@ -73,3 +75,40 @@ class TestInMemoryTrailSource:
         trails = await empty_source.fetch_trails()
         assert len(trails) == 1
         assert trails[0]["name"] == "Updated Trail"
+
+
+class TestHTTPTrailClient:
+    """Tests for HTTPTrailClient against a mock transport."""
+
+    @staticmethod
+    def make_client(handler) -> HTTPTrailClient:
+        """Client whose requests are answered by ``handler``."""
+        return HTTPTrailClient(
+            "http://upstream/", transport=httpx.MockTransport(handler)
+        )
+
+    async def test_fetch_trails(self, sample_trail_data):
+        """Test fetching all trails from the upstream."""
+        paths = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            paths.append(request.url.path)
+            return httpx.Response(200, json=sample_trail_data)
+
+        async with self.make_client(handler) as client:
+            trails = await client.fetch_trails()
+        assert paths == ["/trails"]
+        assert len(trails) == len(sample_trail_data)
+
+    async def test_fetch_trail_not_found(self):
+        """Test that an upstream 404 maps to None."""
+        async with self.make_client(lambda r: httpx.Response(404)) as client:
+            assert await client.fetch_trail("missing") is None
+
+    async def test_upstream_error_raises(self):
+        """Test that upstream errors raise DataFetchError and are counted."""
+        before = UPSTREAM_ERRORS.value(operation="fetch_trails")
+        async with self.make_client(lambda r: httpx.Response(503)) as client:
+            with pytest.raises(DataFetchError):
+                await client.fetch_trails()
+        assert UPSTREAM_ERRORS.value(operation="fetch_trails") == before + 1
@@ -0,0 +1,225 @@
+"""Tests for response compression and cached variants."""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from sftrails.api.compression import (
+    CachedResponse,
+    CompressionMiddleware,
+    ResponseCache,
+    negotiate_encoding,
+)
+
+
+class TestNegotiateEncoding:
+    """Tests for Accept-Encoding negotiation."""
+
+    def test_empty_header(self):
+        """Test no encoding without an Accept-Encoding header."""
+        assert negotiate_encoding("") is None
+
+    def test_gzip(self):
+        """Test gzip is selected when accepted."""
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+
+    def test_zero_quality_rejected(self):
+        """Test encodings with q=0 are never chosen."""
+        assert negotiate_encoding("gzip;q=0") is None
+
+    def test_wildcard(self):
+        """Test the wildcard matches supported encodings."""
+        assert negotiate_encoding("*") is not None
+
+    def test_unsupported_only(self):
+        """Test unsupported encodings are ignored."""
+        assert negotiate_encoding("compress, deflate") is None
+
+    def test_restricted_candidates(self):
+        """Test only the given encodings are considered."""
+        assert negotiate_encoding("br, gzip;q=0.5", ("gzip",)) == "gzip"
+        assert negotiate_encoding("br, gzip;q=0", ("gzip",)) is None
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_hit_for_same_version(self):
+        """Test a response is returned for the version it was stored with."""
+        cache = ResponseCache()
+        response = CachedResponse(200, [], b"body")
+        cache.put(("/a", b""), 1, response)
+        assert cache.get(("/a", b""), 1) is response
+        assert cache.hits == 1
+
+    def test_miss_for_new_version(self):
+        """Test a stale version is evicted on lookup."""
+        cache = ResponseCache()
+        cache.put(("/a", b""), 1, CachedResponse(200, [], b"body"))
+        assert cache.get(("/a", b""), 2) is None
+        assert len(cache) == 0
+        assert cache.misses == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted."""
+        cache = ResponseCache(max_entries=2)
+        for path in ("/a", "/b", "/c"):
+            cache.put((path, b""), 1, CachedResponse(200, [], b""))
+        assert cache.get(("/a", b""), 1) is None
+        assert cache.get(("/c", b""), 1) is not None
+
+    def test_bounded_by_bytes(self):
+        """Test the oldest entries are evicted once the byte limit is passed."""
+        cache = ResponseCache(max_bytes=250, max_entry_bytes=100)
+        for path in ("/a", "/b", "/c"):
+            cache.put((path, b""), 1, CachedResponse(200, [], b"x" * 100))
+        assert cache.size == 200
+        assert cache.get(("/a", b""), 1) is None
+        assert cache.get(("/c", b""), 1) is not None
+
+    def test_large_response_not_stored(self):
+        """Test a response over the per-entry limit is not cached."""
+        cache = ResponseCache(max_entry_bytes=100)
+        cache.put(("/a", b""), 1, CachedResponse(200, [], b"x" * 101))
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    def test_variants_count_towards_size(self):
+        """Test compressed variants are charged to the cache and evicted."""
+        cache = ResponseCache(max_bytes=1100)
+        first = CachedResponse(200, [], bytes(range(256)) * 2)
+        second = CachedResponse(200, [], bytes(range(256)) * 2)
+        cache.put(("/a", b""), 1, first)
+        cache.put(("/b", b""), 1, second)
+        assert cache.size == 1024
+
+        variant = second.encoded("gzip")
+        assert cache.size == 1024 + len(variant) - len(first.body)
+        assert cache.get(("/a", b""), 1) is None
+        assert first.on_grow is None
+
+    def test_variant_compressed_once(self):
+        """Test each encoding is computed once and reused."""
+        response = CachedResponse(200, [], b"x" * 1000)
+        first = response.encoded("gzip")
+        assert response.encoded("gzip") is first
+        assert gzip.decompress(first) == b"x" * 1000
+
+
+class TestCompressionMiddleware:
+    """Tests for CompressionMiddleware."""
+
+    @pytest.fixture
+    def state(self) -> dict:
+        """Mutable version and call counter shared with the app."""
+        return {"version": 1, "calls": 0}
+
+    @pytest.fixture
+    def client(self, state) -> TestClient:
+        """Client for a small app wrapped in the middleware."""
+        app = FastAPI()
+
+        @app.get("/api/big")
+        async def big():
+            state["calls"] += 1
+            return PlainTextResponse("trail " * 500)
+
+        @app.get("/api/live")
+        async def live():
+            state["calls"] += 1
+            return PlainTextResponse(
+                "trail " * 500, headers={"Cache-Control": "no-store"}
+            )
+
+        @app.post("/api/big")
+        async def big_post():
+            state["calls"] += 1
+            return PlainTextResponse("trail " * 500)
+
+        @app.get("/api/small")
+        async def small():
+            return PlainTextResponse("ok")
+
+        @app.get("/api/stream")
+        async def stream():
+            async def chunks():
+                yield b"a"
+                yield b"b"
+
+            return StreamingResponse(chunks())
+
+        app.add_middleware(
+            CompressionMiddleware,
+            version_provider=lambda: state["version"],
+        )
+        return TestClient(app)
+
+    def test_gzip_response(self, client):
+        """Test large responses are gzip-compressed when accepted."""
+        response = client.get("/api/big", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.text == "trail " * 500
+
+    def test_identity_response(self, client):
+        """Test responses are uncompressed without Accept-Encoding."""
+        response = client.get("/api/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert int(response.headers["content-length"]) == len("trail " * 500)
+
+    def test_non_get_compressed_not_cached(self, client, state):
+        """Test POST responses are compressed but never served from the cache."""
+        for _ in range(2):
+            response = client.post("/api/big", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.text == "trail " * 500
+        assert state["calls"] == 2
+
+    def test_small_response_not_compressed(self, client):
+        """Test responses under the minimum size are sent as-is."""
+        response = client.get("/api/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_cached_per_version(self, client, state):
+        """Test repeated requests reuse the cached response until version changes."""
+        client.get("/api/big", headers={"Accept-Encoding": "gzip"})
+        client.get("/api/big", headers={"Accept-Encoding": "identity"})
+        assert state["calls"] == 1
+
+        state["version"] = 2
+        client.get("/api/big", headers={"Accept-Encoding": "gzip"})
+        assert state["calls"] == 2
+
+    def test_no_store_not_cached(self, client, state):
+        """Test responses marked no-store run the route every time."""
+        client.get("/api/live", headers={"Accept-Encoding": "gzip"})
+        response = client.get("/api/live", headers={"Accept-Encoding": "gzip"})
+        assert state["calls"] == 2
+        assert response.headers["content-encoding"] == "gzip"
+
+    def test_junk_query_strings_stay_bounded(self, state):
+        """Test distinct query strings cannot grow the cache past its limit."""
+        app = FastAPI()
+
+        @app.get("/api/big")
+        async def big():
+            return PlainTextResponse("trail " * 500)
+
+        middleware = CompressionMiddleware(
+            app, version_provider=lambda: state["version"], max_bytes=10_000
+        )
+        client = TestClient(middleware)
+        for i in range(20):
+            client.get(f"/api/big?x={i}", headers={"Accept-Encoding": "gzip"})
+
+        assert 0 < len(middleware.cache) < 20
+        assert middleware.cache.size <= 10_000
+
+    def test_streaming_passthrough(self, client):
+        """Test streaming responses are forwarded without buffering."""
+        response = client.get("/api/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.text == "ab"
+        assert "content-encoding" not in response.headers
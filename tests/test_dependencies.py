@@ -0,0 +1,115 @@
+"""Tests for API dependency wiring."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sftrails.api import dependencies
+from sftrails.cache import CachedTrailSource, LRUCache
+from sftrails.client import HTTPTrailClient, InMemoryTrailSource
+
+
+@pytest.fixture(autouse=True)
+def reset_data_source():
+    """Restore the default data source after each test."""
+    yield
+    dependencies.configure_data_source(None)
+
+
+class TestDataSourceConfiguration:
+    """Tests for selecting the API's data source."""
+
+    def test_default_is_sample_data(self, monkeypatch):
+        """Test that the sample data is used without configuration."""
+        monkeypatch.delenv("SFTRAILS_UPSTREAM_URL", raising=False)
+        dependencies.configure_data_source(None)
+        assert isinstance(dependencies.get_data_source(), InMemoryTrailSource)
+
+    def test_upstream_url_from_environment(self, monkeypatch):
+        """Test that SFTRAILS_UPSTREAM_URL selects an HTTP client."""
+        monkeypatch.setenv("SFTRAILS_UPSTREAM_URL", "http://upstream:9000/")
+        monkeypatch.setenv("SFTRAILS_UPSTREAM_TIMEOUT", "5")
+        dependencies.configure_data_source(None)
+
+        source = dependencies.get_data_source()
+        assert isinstance(source, HTTPTrailClient)
+        assert source.base_url == "http://upstream:9000"
+        assert source.timeout == 5.0
+
+    async def test_configure_data_source_resets_service(self, sample_trail_data):
+        """Test that configuring a source replaces the shared service."""
+        previous = dependencies.get_trail_service()
+        dependencies.configure_data_source(InMemoryTrailSource(sample_trail_data[:2]))
+
+        service = dependencies.get_trail_service()
+        assert service is not previous
+        assert len(await service.get_all_trails()) == 2
+
+
+class TestCacheConfiguration:
+    """Tests for configuring the shared cache."""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test no cache or invalidation listener without configuration."""
+        monkeypatch.delenv("SFTRAILS_CACHE_URL", raising=False)
+        dependencies.configure_data_source(None)
+        assert dependencies.get_cache() is None
+        assert dependencies.create_invalidation_listener(None) is None
+
+    def test_cached_source(self, monkeypatch):
+        """Test SFTRAILS_CACHE_URL routes catalog fetches through the cache."""
+        monkeypatch.setenv("SFTRAILS_CACHE_URL", "memory://")
+        monkeypatch.setenv("SFTRAILS_CACHE_MAX_AGE", "12")
+        dependencies.configure_data_source(None)
+
+        source = dependencies.get_data_source()
+        assert isinstance(source, CachedTrailSource)
+        assert isinstance(source.source, InMemoryTrailSource)
+        assert isinstance(source.cache, LRUCache)
+        assert source.max_age == 12.0
+        assert dependencies.create_invalidation_listener(None) is not None
+
+
+class TestLoadSheddingConfiguration:
+    """Tests for configuring load shedding."""
+
+    def test_default_capacity(self, monkeypatch):
+        """Test load shedding is on with the default capacity."""
+        monkeypatch.delenv("SFTRAILS_LOAD_CAPACITY", raising=False)
+        assert dependencies.load_capacity() == 64
+
+    def test_capacity_from_environment(self, monkeypatch):
+        """Test SFTRAILS_LOAD_CAPACITY sets the capacity; 0 disables it."""
+        monkeypatch.setenv("SFTRAILS_LOAD_CAPACITY", "0")
+        assert dependencies.load_capacity() == 0
+
+
+class TestSnapshotBuildConfiguration:
+    """Tests for configuring where snapshots are built."""
+
+    def test_inline_by_default(self, monkeypatch):
+        """Test snapshots are built on the event loop without configuration."""
+        monkeypatch.delenv("SFTRAILS_BUILD_EXECUTOR", raising=False)
+        monkeypatch.delenv("SFTRAILS_STALL_BUDGET_MS", raising=False)
+        assert dependencies.build_executor() is None
+        assert dependencies.stall_budget() == 0.02
+
+    def test_thread_executor(self, monkeypatch):
+        """Test SFTRAILS_BUILD_EXECUTOR=thread selects a shared thread pool."""
+        monkeypatch.setenv("SFTRAILS_BUILD_EXECUTOR", "thread")
+        executor = dependencies.build_executor()
+        assert isinstance(executor, ThreadPoolExecutor)
+        assert dependencies.build_executor() is executor
+
+    def test_unknown_executor(self, monkeypatch):
+        """Test an unknown executor kind is rejected."""
+        monkeypatch.setenv("SFTRAILS_BUILD_EXECUTOR", "gpu")
+        with pytest.raises(ValueError):
+            dependencies.build_executor()
+
+    def test_stall_budget(self, monkeypatch):
+        """Test the stall budget is read in milliseconds and can be disabled."""
+        monkeypatch.setenv("SFTRAILS_STALL_BUDGET_MS", "5")
+        assert dependencies.stall_budget() == 0.005
+        monkeypatch.setenv("SFTRAILS_STALL_BUDGET_MS", "none")
+        assert dependencies.stall_budget() is None
@@ -2,7 +2,12 @@
 
 import pytest
 
-from sftrails.exceptions import DataFetchError, SFTrailsError, TrailNotFoundError
+from sftrails.exceptions import (
+    ChangeHistoryExpiredError,
+    DataFetchError,
+    SFTrailsError,
+    TrailNotFoundError,
+)
 
 
 class TestSFTrailsError:
@@ -56,3 +61,18 @@ class TestDataFetchError:
         """Test it's a subclass of SFTrailsError."""
         error = DataFetchError("Fetch failed")
         assert isinstance(error, SFTrailsError)
+
+
+class TestChangeHistoryExpiredError:
+    """Tests for ChangeHistoryExpiredError."""
+
+    def test_attributes(self):
+        """Test since and oldest_version attributes are set."""
+        error = ChangeHistoryExpiredError(3, 10)
+        assert error.since == 3
+        assert error.oldest_version == 10
+        assert "3" in str(error)
+
+    def test_is_sftrails_error(self):
+        """Test it's a subclass of SFTrailsError."""
+        assert isinstance(ChangeHistoryExpiredError(0, 1), SFTrailsError)
@@ -0,0 +1,58 @@
+"""Tests for streaming catalog export encoders."""
+
+import csv
+import gzip
+import io
+import json
+
+from sftrails.api.export import gzip_chunks, iter_csv, iter_ndjson
+
+
+class TestIterNdjson:
+    """Tests for NDJSON export."""
+
+    def test_one_line_per_trail(self, sample_trails):
+        """Test each trail is encoded as one JSON line."""
+        body = b"".join(iter_ndjson(sample_trails))
+        lines = body.decode().splitlines()
+        assert len(lines) == len(sample_trails)
+        record = json.loads(lines[0])
+        assert record["id"] == "trail-001"
+        assert record["is_accessible"] is True
+
+    def test_chunked_by_batch(self, sample_trails):
+        """Test output is split into chunks of chunk_size trails."""
+        chunks = list(iter_ndjson(sample_trails, chunk_size=2))
+        assert len(chunks) == 3
+        assert chunks[0].count(b"\n") == 2
+
+    def test_empty_catalog(self):
+        """Test empty catalog produces no output."""
+        assert list(iter_ndjson([])) == []
+
+
+class TestIterCsv:
+    """Tests for CSV export."""
+
+    def test_header_and_rows(self, sample_trails):
+        """Test CSV output has a header and one row per trail."""
+        body = b"".join(iter_csv(sample_trails, chunk_size=2)).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert len(rows) == len(sample_trails)
+        assert rows[2]["name"] == "Steep Ravine Trail"
+        assert rows[2]["is_accessible"] == "False"
+
+    def test_empty_catalog_has_header(self):
+        """Test empty catalog still produces a header row."""
+        body = b"".join(iter_csv([])).decode()
+        assert body.startswith("id,name,park,status")
+
+
+class TestGzipChunks:
+    """Tests for incremental gzip compression."""
+
+    def test_round_trip(self, sample_trails):
+        """Test compressed stream decompresses to the original bytes."""
+        raw = b"".join(iter_ndjson(sample_trails, chunk_size=1))
+        compressed = b"".join(gzip_chunks(iter_ndjson(sample_trails, chunk_size=1)))
+        assert gzip.decompress(compressed) == raw
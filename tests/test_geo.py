@@ -0,0 +1,76 @@
+"""Tests for geospatial helpers and the spatial index."""
+
+from dataclasses import replace
+
+import pytest
+
+from sftrails.geo import SpatialIndex, haversine_miles
+
+
+class TestHaversine:
+    """Tests for haversine_miles."""
+
+    def test_same_point(self):
+        """Test distance from a point to itself is zero."""
+        assert haversine_miles(37.77, -122.42, 37.77, -122.42) == 0
+
+    def test_known_distance(self):
+        """Test a known distance (SF to Oakland, about 8.4 miles)."""
+        distance = haversine_miles(37.7749, -122.4194, 37.8044, -122.2712)
+        assert distance == pytest.approx(8.4, abs=0.2)
+
+
+class TestSpatialIndex:
+    """Tests for SpatialIndex."""
+
+    def test_skips_trails_without_location(self, sample_trails):
+        """Test trails without coordinates are not indexed."""
+        trails = sample_trails + [
+            replace(sample_trails[0], id="no-loc", latitude=None, longitude=None)
+        ]
+        index = SpatialIndex(trails)
+        assert len(index) == len(sample_trails)
+
+    def test_nearby_ordered_by_distance(self, sample_trails):
+        """Test results are within radius and nearest first."""
+        index = SpatialIndex(sample_trails)
+        # Near Lands End
+        results = index.nearby(37.7800, -122.5100, 3.0)
+        ids = [t.id for t, _ in results]
+        assert ids[0] == "trail-004"
+        assert "trail-002" in ids
+        assert "trail-001" not in ids
+        distances = [d for _, d in results]
+        assert distances == sorted(distances)
+        assert all(d <= 3.0 for d in distances)
+
+    def test_matches_full_scan(self, sample_trails):
+        """Test the grid returns the same trails as a brute-force scan."""
+        index = SpatialIndex(sample_trails, cell_degrees=0.01)
+        lat, lon, radius = 37.80, -122.50, 8.0
+        expected = {
+            t.id
+            for t in sample_trails
+            if haversine_miles(lat, lon, t.latitude, t.longitude) <= radius
+        }
+        assert {t.id for t, _ in index.nearby(lat, lon, radius)} == expected
+
+    def test_large_radius(self, sample_trails):
+        """Test a radius spanning every cell returns everything."""
+        index = SpatialIndex(sample_trails, cell_degrees=0.001)
+        assert len(index.nearby(37.8, -122.5, 500)) == len(sample_trails)
+
+    def test_updated_copy_on_write(self, sample_trails):
+        """Test an updated copy matches a rebuilt index and leaves the original."""
+        index = SpatialIndex(sample_trails)
+        before = [t.id for t, _ in index.nearby(37.78, -122.51, 1.0)]
+        moved = replace(sample_trails[0], latitude=37.7800, longitude=-122.5100)
+        updated = index.updated([sample_trails[0]], [moved])
+
+        rebuilt = SpatialIndex([moved] + sample_trails[1:])
+        assert len(updated) == len(rebuilt)
+        assert [t.id for t, _ in updated.nearby(37.78, -122.51, 1.0)] == [
+            t.id for t, _ in rebuilt.nearby(37.78, -122.51, 1.0)
+        ]
+        assert updated.nearby(37.78, -122.51, 1.0)[0][0] is moved
+        assert [t.id for t, _ in index.nearby(37.78, -122.51, 1.0)] == before
@@ -0,0 +1,242 @@
+"""Tests for the trail status history store."""
+
+import asyncio
+import threading
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from sftrails import history
+from sftrails.history import HistoryStore
+from sftrails.models import TrailCondition, TrailStatus
+from tests.conftest import change_set
+
+JAN_1 = datetime(2025, 1, 1, 10, 0)
+DAY = timedelta(days=1)
+
+
+@pytest.fixture
+def storm(single_trail):
+    """A trail that closes on Jan 3 and reopens muddy on Jan 4."""
+    open_trail = single_trail
+    closed = replace(single_trail, status=TrailStatus.CLOSED)
+    reopened = replace(single_trail, condition=TrailCondition.MUDDY)
+    return [
+        change_set(open_trail, when=JAN_1),
+        change_set(closed, when=JAN_1 + 2 * DAY),
+        change_set(reopened, when=JAN_1 + 3 * DAY),
+    ]
+
+
+class TestRecording:
+    """Tests for recording change sets."""
+
+    def test_record_events(self, storm):
+        """Test each status-relevant change is recorded in order."""
+        store = HistoryStore()
+        assert [store.record(cs) for cs in storm] == [1, 1, 1]
+
+        events = store.events(JAN_1, JAN_1 + 10 * DAY)
+        assert [e.status for e in events] == [
+            TrailStatus.OPEN,
+            TrailStatus.CLOSED,
+            TrailStatus.OPEN,
+        ]
+        assert events[2].condition == TrailCondition.MUDDY
+        assert events[1].timestamp == JAN_1 + 2 * DAY
+
+    def test_irrelevant_changes_skipped(self, single_trail):
+        """Test changes that keep status, condition and park are not recorded."""
+        store = HistoryStore()
+        store.record(change_set(single_trail, when=JAN_1))
+        renamed = replace(single_trail, notes="New notes", name="Renamed")
+        assert store.record(change_set(renamed, when=JAN_1 + DAY)) == 0
+
+    def test_removal(self, single_trail):
+        """Test a removed trail gets an event without a status."""
+        store = HistoryStore()
+        store.record(change_set(single_trail, when=JAN_1))
+        store.record(change_set(removed=(single_trail.id,), when=JAN_1 + DAY))
+        removal = change_set(removed=(single_trail.id,), when=JAN_1 + DAY)
+        assert store.record(removal) == 0
+
+        (event,) = store.events(JAN_1 + DAY, JAN_1 + 2 * DAY)
+        assert event.status is None
+        assert event.park == single_trail.park
+
+    def test_clock_going_backwards(self, storm):
+        """Test events stay in time order if the clock goes backwards."""
+        store = HistoryStore()
+        store.record(storm[1])
+        store.record(replace(storm[2], timestamp=JAN_1))
+
+        events = store.events(JAN_1, JAN_1 + 10 * DAY)
+        assert [e.timestamp for e in events] == [JAN_1 + 2 * DAY] * 2
+
+
+class TestQueries:
+    """Tests for range queries and rollups."""
+
+    def test_events_for_trail(self, storm, single_trail):
+        """Test range queries for one trail use the half-open range."""
+        store = HistoryStore()
+        other = replace(single_trail, id="other-001", park="Other Park")
+        store.record(change_set(other, when=JAN_1))
+        for changes in storm:
+            store.record(changes)
+
+        events = store.events(JAN_1 + DAY, JAN_1 + 3 * DAY, trail_id=single_trail.id)
+        assert [e.status for e in events] == [TrailStatus.CLOSED]
+        assert store.events(JAN_1, JAN_1 + DAY, park="other park")[0].trail_id == (
+            "other-001"
+        )
+
+    def test_state_at(self, storm, single_trail):
+        """Test rebuilding every trail's state at a moment."""
+        store = HistoryStore()
+        for changes in storm:
+            store.record(changes)
+
+        assert store.state_at(JAN_1 - DAY) == {}
+        state = store.state_at(JAN_1 + 2.5 * DAY)
+        assert state[single_trail.id].status == TrailStatus.CLOSED
+
+    def test_summarize(self, storm, single_trail):
+        """Test time per status is clipped to the range."""
+        store = HistoryStore()
+        for changes in storm:
+            store.record(changes)
+
+        (summary,) = store.summarize(
+            JAN_1 + DAY, JAN_1 + 5 * DAY, now=JAN_1 + 10 * DAY
+        )
+        assert summary.trail_id == single_trail.id
+        assert summary.seconds_by_status[TrailStatus.OPEN] == 3 * DAY.total_seconds()
+        assert summary.seconds_by_status[TrailStatus.CLOSED] == DAY.total_seconds()
+        assert summary.entries_by_status == {
+            TrailStatus.CLOSED: 1,
+            TrailStatus.OPEN: 1,
+        }
+
+    def test_summarize_stops_at_now(self, storm):
+        """Test time in the future is not counted."""
+        store = HistoryStore()
+        store.record(storm[0])
+        (summary,) = store.summarize(JAN_1, JAN_1 + 10 * DAY, now=JAN_1 + DAY)
+        assert summary.seconds_by_status[TrailStatus.OPEN] == DAY.total_seconds()
+
+    def test_summarize_park(self, storm, single_trail):
+        """Test park rollups only include the park's trails."""
+        store = HistoryStore()
+        other = replace(single_trail, id="other-001", park="Other Park")
+        store.record(change_set(other, when=JAN_1))
+        for changes in storm:
+            store.record(changes)
+
+        summaries = store.summarize(
+            JAN_1, JAN_1 + 5 * DAY, park="TEST PARK", now=JAN_1 + 5 * DAY
+        )
+        assert [s.trail_id for s in summaries] == [single_trail.id]
+
+    def test_park_spellings_match(self, single_trail):
+        """Test a park matches events under any spelling of its name or slug."""
+        store = HistoryStore()
+        respelled = replace(single_trail, id="test-002", park="Test-Park.")
+        store.record(change_set(single_trail, respelled, when=JAN_1))
+
+        for park in ("Test Park", "test-park"):
+            summaries = store.summarize(JAN_1, JAN_1 + DAY, park=park, now=JAN_1)
+            assert [s.trail_id for s in summaries] == ["test-001", "test-002"]
+            assert len(store.events(JAN_1, JAN_1 + DAY, park=park)) == 2
+
+
+class TestSegments:
+    """Tests for month segments on disk."""
+
+    def test_monthly_segments(self, tmp_path, single_trail):
+        """Test history is split into one file per month."""
+        store = HistoryStore(tmp_path)
+        store.record(change_set(single_trail, when=JAN_1))
+        closed = replace(single_trail, status=TrailStatus.CLOSED)
+        store.record(change_set(closed, when=datetime(2025, 3, 5)))
+
+        assert store.segment_keys == ["2025-01", "2025-03"]
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "2025-01.jsonl",
+            "2025-03.jsonl",
+        ]
+
+    def test_reopen(self, tmp_path, storm, single_trail):
+        """Test a reopened store continues from the history on disk."""
+        store = HistoryStore(tmp_path)
+        store.record(storm[0])
+        store.record(storm[1])
+
+        reopened = HistoryStore(tmp_path)
+        assert len(reopened) == 1
+        assert reopened.record(storm[1]) == 0
+        assert reopened.record(storm[2]) == 1
+        assert len(reopened.events(JAN_1, JAN_1 + 10 * DAY)) == 3
+
+    def test_state_across_segments(self, tmp_path, single_trail):
+        """Test state carries into later months through segment baselines."""
+        store = HistoryStore(tmp_path, max_cached_segments=1)
+        closed = replace(single_trail, status=TrailStatus.CLOSED)
+        store.record(change_set(closed, when=JAN_1))
+        other = replace(single_trail, id="other-001")
+        store.record(change_set(other, when=datetime(2025, 2, 10)))
+        store.record(change_set(other, removed=(other.id,), when=datetime(2025, 4, 10)))
+
+        reopened = HistoryStore(tmp_path, max_cached_segments=1)
+        march = reopened.state_at(datetime(2025, 3, 15))
+        assert march[single_trail.id].status == TrailStatus.CLOSED
+        assert march["other-001"].status == TrailStatus.OPEN
+
+        summaries = reopened.summarize(
+            datetime(2025, 3, 1), datetime(2025, 4, 1), now=datetime(2025, 5, 1)
+        )
+        seconds = {s.trail_id: s.seconds_by_status for s in summaries}
+        month = (datetime(2025, 4, 1) - datetime(2025, 3, 1)).total_seconds()
+        assert seconds[single_trail.id][TrailStatus.CLOSED] == month
+        assert seconds["other-001"][TrailStatus.OPEN] == month
+
+    async def test_writes_in_background(self, tmp_path, storm):
+        """Test recording inside a loop leaves writing to a background task."""
+        store = HistoryStore(tmp_path)
+        assert store.record(storm[0]) == 1
+        # Recorded events are queryable before they reach the disk
+        assert len(store.events(JAN_1, JAN_1 + 10 * DAY)) == 1
+        store.record(storm[1])
+        store.record(storm[2])
+
+        await store.flush()
+        reopened = HistoryStore(tmp_path)
+        assert [e.status for e in reopened.events(JAN_1, JAN_1 + 10 * DAY)] == [
+            TrailStatus.OPEN,
+            TrailStatus.CLOSED,
+            TrailStatus.OPEN,
+        ]
+
+    async def test_rows_recorded_while_writing_are_kept(
+        self, tmp_path, monkeypatch, storm
+    ):
+        """Test rows recorded while the worker thread writes are not lost."""
+        store = HistoryStore(tmp_path)
+        writing, resume = threading.Event(), threading.Event()
+
+        def slow_open(*args, **kwargs):
+            writing.set()
+            resume.wait(5)
+            return open(*args, **kwargs)
+
+        monkeypatch.setattr(history, "open", slow_open, raising=False)
+        store.record(storm[0])
+        assert await asyncio.to_thread(writing.wait, 5)
+        store.record(storm[1])
+        store.record(storm[2])
+        resume.set()
+
+        await store.flush()
+        reopened = HistoryStore(tmp_path)
+        assert len(reopened.events(JAN_1, JAN_1 + 10 * DAY)) == 3
@@ -0,0 +1,213 @@
+"""Tests for concurrency limiting and load shedding."""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from sftrails.api.limits import (
+    CHEAP,
+    EXPENSIVE,
+    SHED_REQUESTS,
+    STANDARD,
+    ConcurrencyLimiter,
+    LoadShedError,
+    LoadSheddingMiddleware,
+    classify,
+)
+
+
+async def _settle() -> None:
+    """Let pending tasks run up to their next await."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestClassify:
+    """Tests for route classification."""
+
+    def test_exempt_routes(self):
+        """Test health, metrics and streams are not limited."""
+        assert classify("/health") is None
+        assert classify("/metrics") is None
+        assert classify("/api/v1/trails/stream") is None
+
+    def test_full_catalog_routes_are_expensive(self):
+        """Test list, search, export and batch queries are expensive."""
+        for path in ("/api/v1/trails", "/api/v1/trails/search", "/api/v1/query"):
+            assert classify(path) is EXPENSIVE
+
+    def test_lookups_are_cheap(self):
+        """Test single trail and park lookups are cheap."""
+        assert classify("/api/v1/trails/trail-001") is CHEAP
+        assert classify("/api/v1/parks/golden-gate-park") is CHEAP
+
+    def test_aggregates_are_standard(self):
+        """Test summaries and nested resources fall back to standard."""
+        assert classify("/api/v1/trails/summary") is STANDARD
+        assert classify("/api/v1/trails/trail-001/history") is STANDARD
+        assert classify("/api/v1/parks/golden-gate-park/trails") is STANDARD
+
+
+class TestConcurrencyLimiter:
+    """Tests for ConcurrencyLimiter."""
+
+    async def test_admits_within_capacity(self):
+        """Test requests are admitted immediately while cost fits."""
+        limiter = ConcurrencyLimiter(capacity=4, max_queue=4, max_wait=1)
+        await limiter.acquire(2)
+        await limiter.acquire(2)
+        assert limiter.in_flight == 4
+        limiter.release(2)
+        assert limiter.in_flight == 2
+
+    async def test_cheap_waiters_admitted_first(self):
+        """Test queued cheap requests go ahead of earlier expensive ones."""
+        limiter = ConcurrencyLimiter(capacity=4, max_queue=4, max_wait=1)
+        await limiter.acquire(4)
+        order = []
+
+        async def request(cost: int, name: str) -> None:
+            await limiter.acquire(cost)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(request(4, "expensive")),
+            asyncio.create_task(request(1, "cheap")),
+        ]
+        await _settle()
+        assert limiter.queue_depth == 2
+
+        limiter.release(4)
+        await _settle()
+        assert order == ["cheap"]  # The expensive request no longer fits
+        limiter.release(1)
+        await asyncio.gather(*tasks)
+        assert order == ["cheap", "expensive"]
+
+    async def test_queue_full_sheds_new_request(self):
+        """Test a request no cheaper than any waiter is shed when full."""
+        limiter = ConcurrencyLimiter(capacity=1, max_queue=1, max_wait=1)
+        await limiter.acquire(1)
+        waiter = asyncio.create_task(limiter.acquire(1))
+        await _settle()
+
+        with pytest.raises(LoadShedError) as exc_info:
+            await limiter.acquire(1)
+        assert exc_info.value.reason == "queue_full"
+
+        limiter.release(1)
+        await waiter
+
+    async def test_cheap_request_displaces_expensive_waiter(self):
+        """Test a cheap request takes the queue slot of an expensive one."""
+        limiter = ConcurrencyLimiter(capacity=4, max_queue=1, max_wait=1)
+        await limiter.acquire(4)
+        expensive = asyncio.create_task(limiter.acquire(4))
+        await _settle()
+        cheap = asyncio.create_task(limiter.acquire(1))
+        await _settle()
+
+        with pytest.raises(LoadShedError) as exc_info:
+            await expensive
+        assert exc_info.value.reason == "displaced"
+        limiter.release(4)
+        await cheap
+        assert limiter.in_flight == 1
+
+    async def test_waiter_times_out(self):
+        """Test waiters still queued after max_wait are shed."""
+        limiter = ConcurrencyLimiter(capacity=1, max_queue=4, max_wait=0.01)
+        await limiter.acquire(1)
+        with pytest.raises(LoadShedError) as exc_info:
+            await limiter.acquire(1)
+        assert exc_info.value.reason == "timeout"
+        assert limiter.queue_depth == 0
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test a cancelled request gives up its place without taking cost."""
+        limiter = ConcurrencyLimiter(capacity=1, max_queue=4, max_wait=1)
+        await limiter.acquire(1)
+        waiter = asyncio.create_task(limiter.acquire(1))
+        await _settle()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert limiter.queue_depth == 0
+        limiter.release(1)
+        assert limiter.in_flight == 0
+
+    async def test_cost_clamped_to_capacity(self):
+        """Test a request costlier than the capacity can still run alone."""
+        limiter = ConcurrencyLimiter(capacity=4, max_queue=4, max_wait=1)
+        await limiter.acquire(16)
+        assert limiter.in_flight == 4
+        limiter.release(16)
+        assert limiter.in_flight == 0
+
+
+class TestLoadSheddingMiddleware:
+    """Tests for LoadSheddingMiddleware."""
+
+    @pytest.fixture
+    def gate(self) -> asyncio.Event:
+        """Event that blocked handlers wait on."""
+        return asyncio.Event()
+
+    @pytest.fixture
+    def client(self, gate) -> httpx.AsyncClient:
+        """Client for an app whose catalog listing blocks until the gate opens."""
+        app = FastAPI()
+
+        @app.get("/api/v1/trails")
+        async def trails():
+            await gate.wait()
+            return {"trails": []}
+
+        @app.get("/api/v1/trails/{trail_id}")
+        async def trail(trail_id: str):
+            return {"id": trail_id}
+
+        @app.get("/health")
+        async def health():
+            return {"status": "healthy"}
+
+        app.add_middleware(
+            LoadSheddingMiddleware,
+            capacity=EXPENSIVE.cost + CHEAP.cost,
+            max_queue=1,
+            max_wait=5,
+            retry_after=3,
+        )
+        transport = httpx.ASGITransport(app=app)
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+    async def test_sheds_with_retry_after(self, client, gate):
+        """Test requests beyond the queue get 503 with Retry-After."""
+        before = SHED_REQUESTS.value(route_class="expensive", reason="queue_full")
+        running = asyncio.create_task(client.get("/api/v1/trails"))
+        queued = asyncio.create_task(client.get("/api/v1/trails"))
+        await _settle()
+
+        response = await client.get("/api/v1/trails")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        after = SHED_REQUESTS.value(route_class="expensive", reason="queue_full")
+        assert after == before + 1
+
+        gate.set()
+        assert (await running).status_code == 200
+        assert (await queued).status_code == 200
+
+    async def test_cheap_requests_served_during_overload(self, client, gate):
+        """Test cheap lookups and exempt routes still answer under load."""
+        running = asyncio.create_task(client.get("/api/v1/trails"))
+        await _settle()
+
+        assert (await client.get("/api/v1/trails/trail-001")).status_code == 200
+        assert (await client.get("/health")).status_code == 200
+
+        gate.set()
+        await running
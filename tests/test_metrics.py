@@ -0,0 +1,95 @@
+"""Tests for in-process metrics collectors."""
+
+import pytest
+
+from sftrails.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    """Fresh metrics registry."""
+    return MetricsRegistry()
+
+
+class TestCounter:
+    """Tests for Counter."""
+
+    def test_inc_with_labels(self, registry):
+        """Test counters track values per label set."""
+        counter = registry.counter("c_total", "help", labels=("result",))
+        counter.inc(result="hit")
+        counter.inc(2, result="hit")
+        counter.inc(result="miss")
+        assert counter.value(result="hit") == 3
+        assert counter.value(result="miss") == 1
+
+    def test_render(self, registry):
+        """Test Prometheus text rendering."""
+        registry.counter("c_total", "Things counted", labels=("kind",)).inc(kind="a")
+        text = registry.render()
+        assert "# HELP c_total Things counted" in text
+        assert "# TYPE c_total counter" in text
+        assert 'c_total{kind="a"} 1' in text
+
+    def test_label_escaping(self, registry):
+        """Test label values are escaped."""
+        registry.counter("c_total", "help", labels=("path",)).inc(path='a"b')
+        assert 'c_total{path="a\\"b"} 1' in registry.render()
+
+
+class TestGauge:
+    """Tests for Gauge."""
+
+    def test_set(self, registry):
+        """Test gauges hold the last value set."""
+        gauge = registry.gauge("g", "help")
+        gauge.set(5)
+        gauge.set(3)
+        assert gauge.value() == 3
+
+    def test_function(self, registry):
+        """Test function gauges are evaluated on scrape."""
+        state = {"n": 1}
+        gauge = registry.gauge("g", "help")
+        gauge.set_function(lambda: state["n"])
+        state["n"] = 7
+        assert "g 7" in registry.render()
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_observe(self, registry):
+        """Test count and sum of observations."""
+        histogram = registry.histogram("h_seconds", "help", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+        assert histogram.count() == 3
+        assert histogram.sum() == pytest.approx(5.55)
+
+    def test_render_cumulative_buckets(self, registry):
+        """Test buckets are rendered cumulatively with +Inf."""
+        histogram = registry.histogram("h_seconds", "help", buckets=(0.1, 1.0))
+        histogram.observe(0.1)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+        text = registry.render()
+        assert 'h_seconds_bucket{le="0.1"} 1' in text
+        assert 'h_seconds_bucket{le="1"} 2' in text
+        assert 'h_seconds_bucket{le="+Inf"} 3' in text
+        assert "h_seconds_count 3" in text
+
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry."""
+
+    def test_get_or_create(self, registry):
+        """Test registering the same name returns the existing metric."""
+        assert registry.counter("c", "help") is registry.counter("c", "help")
+
+    def test_conflicting_type_raises(self, registry):
+        """Test registering a name with a different type raises."""
+        registry.counter("m", "help")
+        with pytest.raises(ValueError):
+            registry.gauge("m", "help")
@@ -201,3 +201,35 @@ class TestTrail:
         assert restored.name == single_trail.name
         assert restored.status == single_trail.status
         assert restored.condition == single_trail.condition
+
+    def test_from_dict_with_location(self):
+        """Test creation from dictionary with coordinates and geometry."""
+        data = {
+            "id": "t1",
+            "name": "Geo Trail",
+            "park": "Park",
+            "status": "open",
+            "condition": "dry",
+            "length_miles": 1.0,
+            "elevation_gain_ft": 100,
+            "last_updated": "2025-01-15T12:00:00",
+            "latitude": "37.8",
+            "longitude": -122.5,
+            "geometry": [[37.8, -122.5], [37.81, -122.51]],
+        }
+        trail = Trail.from_dict(data)
+        assert trail.latitude == 37.8
+        assert trail.longitude == -122.5
+        assert trail.geometry == [(37.8, -122.5), (37.81, -122.51)]
+        assert trail.has_location
+
+    def test_location_optional(self, single_trail: Trail):
+        """Test trails without coordinates have no location."""
+        assert single_trail.latitude is None
+        assert single_trail.geometry is None
+        assert not single_trail.has_location
+
+    def test_roundtrip_with_location(self, sample_trails):
+        """Test coordinates survive a dict round trip."""
+        trail = sample_trails[0]
+        assert Trail.from_dict(trail.to_dict()) == trail
@@ -0,0 +1,47 @@
+"""Tests for lazily loaded package exports."""
+
+import subprocess
+import sys
+
+import pytest
+
+import sftrails
+from sftrails.models import Trail
+from sftrails.service import TrailService
+
+
+def _imported_after(statement: str) -> set[str]:
+    """Modules loaded by ``statement`` in a fresh interpreter."""
+    script = f"import sys\n{statement}\nprint(' '.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return set(output.split())
+
+
+class TestLazyExports:
+    """Tests for the package's lazy ``__getattr__`` exports."""
+
+    def test_exports_resolve(self):
+        """Test exported names resolve to the defining modules' objects."""
+        assert sftrails.Trail is Trail
+        assert sftrails.TrailService is TrailService
+        assert set(sftrails.__all__) <= set(dir(sftrails))
+
+    def test_unknown_attribute(self):
+        """Test unknown names raise AttributeError."""
+        with pytest.raises(AttributeError):
+            sftrails.Nonexistent
+
+    def test_import_is_light(self):
+        """Test importing the package or the service loads no web stack."""
+        modules = _imported_after("import sftrails")
+        assert "sftrails.service" not in modules
+        modules = _imported_after("from sftrails import TrailService")
+        assert not modules & {"httpx", "fastapi", "pydantic", "sftrails.api"}
+
+    def test_api_package_defers_app(self):
+        """Test importing from sftrails.api does not build the app."""
+        modules = _imported_after("import sftrails.api.limits")
+        assert "sftrails.api.main" not in modules
+        assert "fastapi" not in modules
@@ -0,0 +1,63 @@
+"""Tests for parks derived from trails."""
+
+from dataclasses import replace
+from datetime import datetime
+
+from sftrails.models import TrailCondition, TrailStatus
+from sftrails.parks import build_parks, slugify
+
+
+class TestSlugify:
+    """Tests for park slugs."""
+
+    def test_slugify(self):
+        """Test names become lowercase, hyphenated ASCII."""
+        assert slugify("Mount Davidson Park") == "mount-davidson-park"
+        assert slugify("  Land's End / Lincoln Park ") == "land-s-end-lincoln-park"
+        assert slugify("Parque Peñasco") == "parque-penasco"
+
+    def test_slug_is_stable(self):
+        """Test slugifying a slug returns it unchanged."""
+        slug = slugify("Golden Gate National Recreation Area")
+        assert slugify(slug) == slug
+
+
+class TestBuildParks:
+    """Tests for grouping trails into parks."""
+
+    def test_aggregates(self, single_trail):
+        """Test each park gets its trail IDs, counts and totals."""
+        trails = [
+            single_trail,
+            replace(
+                single_trail,
+                id="test-002",
+                status=TrailStatus.CLOSED,
+                condition=TrailCondition.MUDDY,
+                length_miles=1.25,
+                last_updated=datetime(2025, 2, 1),
+            ),
+            replace(single_trail, id="other-001", park="Other Park"),
+        ]
+        parks = build_parks(trails)
+
+        assert list(parks) == ["test-park", "other-park"]
+        park = parks["test-park"]
+        assert park.name == "Test Park"
+        assert park.trail_ids == ("test-001", "test-002")
+        assert park.trail_count == 2
+        assert park.status_counts == {TrailStatus.OPEN: 1, TrailStatus.CLOSED: 1}
+        assert park.condition_counts[TrailCondition.MUDDY] == 1
+        assert park.total_length_miles == 3.75
+        assert park.last_updated == datetime(2025, 2, 1)
+
+    def test_spellings_merged(self, single_trail):
+        """Test spellings of one park merge under the most common name."""
+        trails = [
+            replace(single_trail, id="a", park="test park"),
+            replace(single_trail, id="b", park="Test Park"),
+            replace(single_trail, id="c", park="Test Park"),
+        ]
+        (park,) = build_parks(trails).values()
+        assert park.name == "Test Park"
+        assert park.trail_ids == ("a", "b", "c")
@@ -0,0 +1,52 @@
+"""Tests for the sampling profiler."""
+
+import threading
+import time
+
+from sftrails.profiling import SamplingProfiler, profile_for
+
+
+def busy_wait(seconds: float) -> None:
+    """Spin on the CPU for a while."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestSamplingProfiler:
+    """Tests for SamplingProfiler."""
+
+    def test_samples_current_thread(self):
+        """Test that a busy function shows up in collapsed stacks."""
+        profiler = SamplingProfiler(interval=0.001, thread_id=threading.get_ident())
+        with profiler:
+            busy_wait(0.1)
+
+        assert profiler.samples > 0
+        assert "tests.test_profiling:busy_wait" in profiler.collapsed()
+        assert not profiler.running
+
+    def test_collapsed_format(self):
+        """Test each line is a semicolon-joined stack and a count."""
+        profiler = SamplingProfiler(thread_id=threading.get_ident())
+        profiler.sample()
+        profiler.sample()
+
+        lines = profiler.collapsed().splitlines()
+        assert len(lines) == 1
+        stack, count = lines[0].rsplit(" ", 1)
+        assert count == "2"
+        assert stack.endswith("SamplingProfiler.sample")
+
+    def test_all_threads_rooted_at_thread_name(self):
+        """Test that stacks are prefixed with the thread name."""
+        profiler = SamplingProfiler()
+        profiler.sample()
+        roots = {line.split(";", 1)[0] for line in profiler.collapsed().splitlines()}
+        assert threading.current_thread().name in roots
+
+    async def test_profile_for(self):
+        """Test profiling for a fixed duration."""
+        profiler = await profile_for(0.05, interval=0.001)
+        assert profiler.samples > 0
+        assert not profiler.running
@@ -0,0 +1,118 @@
+"""Tests for the batched query endpoint."""
+
+from unittest.mock import patch
+
+from sftrails.api.routes import query as query_routes
+
+
+class TestBatchQuery:
+    """Tests for POST /api/v1/query."""
+
+    def test_matches_individual_endpoints(self, client):
+        """Test sub-query results match the standalone endpoints."""
+        response = client.post(
+            "/api/v1/query",
+            json={
+                "queries": {
+                    "summary": {"type": "summary"},
+                    "parks": {"type": "parks"},
+                    "open": {"type": "trails", "status": ["open"]},
+                }
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        results = data["results"]
+        assert isinstance(data["version"], int)
+
+        assert results["summary"] == client.get("/api/v1/trails/summary").json()
+        assert results["parks"] == client.get("/api/v1/parks").json()
+        trails = client.get("/api/v1/trails?status=open").json()
+        assert results["open"]["trails"] == trails["trails"]
+        assert results["open"]["total"] == trails["total"]
+
+    def test_fields_limit_and_offset(self, client):
+        """Test trail sub-queries page and project their results."""
+        response = client.post(
+            "/api/v1/query",
+            json={
+                "queries": {
+                    "all": {"type": "trails", "fields": "id"},
+                    "page": {
+                        "type": "trails",
+                        "fields": "id,status",
+                        "limit": 2,
+                        "offset": 1,
+                    },
+                }
+            },
+        )
+        results = response.json()["results"]
+        ids = [t["id"] for t in results["all"]["trails"]]
+        page = results["page"]["trails"]
+        assert [t["id"] for t in page] == ids[1:3]
+        assert all(set(t) == {"id", "status"} for t in page)
+        assert results["page"]["total"] == len(ids)
+
+    def test_shared_filter_evaluation(self, client):
+        """Test sub-queries with the same filters are evaluated once."""
+        queries = {
+            "a": {"type": "trails", "status": ["open", "limited"], "limit": 1},
+            "b": {"type": "trails", "status": ["limited", "open"], "fields": "id"},
+            "c": {"type": "trails", "status": ["closed"]},
+        }
+        with patch.object(
+            query_routes, "_select_trails", wraps=query_routes._select_trails
+        ) as select:
+            response = client.post("/api/v1/query", json={"queries": queries})
+        assert response.status_code == 200
+        assert select.call_count == 2
+        results = response.json()["results"]
+        assert results["a"]["total"] == results["b"]["total"]
+
+    def test_name_search_and_exclusions(self, client):
+        """Test name search and exclude filters in a sub-query."""
+        response = client.post(
+            "/api/v1/query",
+            json={
+                "queries": {
+                    "trails": {
+                        "type": "trails",
+                        "q": "trail",
+                        "exclude_status": ["closed"],
+                    }
+                }
+            },
+        )
+        for trail in response.json()["results"]["trails"]["trails"]:
+            assert "trail" in trail["name"].lower()
+            assert trail["status"] != "closed"
+
+    def test_unknown_field(self, client):
+        """Test an unknown field names the offending sub-query."""
+        response = client.post(
+            "/api/v1/query",
+            json={"queries": {"list": {"type": "trails", "fields": "id,bogus"}}},
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("list:")
+
+    def test_invalid_requests(self, client):
+        """Test unknown sub-query types and empty batches are rejected."""
+        unknown = client.post(
+            "/api/v1/query", json={"queries": {"x": {"type": "weather"}}}
+        )
+        assert unknown.status_code == 422
+        empty = client.post("/api/v1/query", json={"queries": {}})
+        assert empty.status_code == 422
+
+    def test_response_compressed(self, client):
+        """Test batch responses are compressed like GET responses."""
+        response = client.post(
+            "/api/v1/query",
+            json={"queries": {"all": {"type": "trails"}}},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["results"]["all"]["total"] > 0
@@ -0,0 +1,72 @@
+"""Tests for trail recommendation ranking."""
+
+from dataclasses import replace
+from datetime import timedelta
+
+import pytest
+
+from sftrails.models import TrailCondition, TrailStatus
+from sftrails.ranking import (
+    FRESHNESS_HALF_LIFE,
+    length_score,
+    rank_trails,
+    recommendation_score,
+)
+
+
+class TestRecommendationScore:
+    """Tests for recommendation_score."""
+
+    def test_unsafe_trails_not_scored(self, single_trail):
+        """Test closed and icy trails are never recommended."""
+        now = single_trail.last_updated
+        closed = replace(single_trail, status=TrailStatus.CLOSED)
+        icy = replace(single_trail, condition=TrailCondition.ICY)
+        assert recommendation_score(closed, now) is None
+        assert recommendation_score(icy, now) is None
+
+    def test_best_possible_score(self, single_trail):
+        """Test a fresh, dry, open, moderate trail scores 1."""
+        score = recommendation_score(single_trail, single_trail.last_updated)
+        assert score == pytest.approx(1.0)
+
+    def test_freshness_decays(self, single_trail):
+        """Test older reports score lower, halving freshness per half-life."""
+        now = single_trail.last_updated
+        stale = replace(single_trail, last_updated=now - FRESHNESS_HALF_LIFE)
+        fresh_score = recommendation_score(single_trail, now)
+        assert recommendation_score(stale, now) == pytest.approx(fresh_score - 0.125)
+
+    def test_condition_outweighs_freshness(self, single_trail):
+        """Test a dry trail from yesterday beats a muddy trail from today."""
+        now = single_trail.last_updated
+        dry = replace(single_trail, last_updated=now - timedelta(days=1))
+        muddy = replace(single_trail, condition=TrailCondition.MUDDY)
+        assert recommendation_score(dry, now) > recommendation_score(muddy, now)
+
+    def test_length_buckets(self):
+        """Test moderate lengths score highest."""
+        assert length_score(1.0) == 0.7
+        assert length_score(4.0) == 1.0
+        assert length_score(8.0) == 0.6
+        assert length_score(25.0) == 0.3
+
+
+class TestRankTrails:
+    """Tests for rank_trails."""
+
+    def test_rank_sample_trails(self, sample_trails):
+        """Test safe trails are ranked best first."""
+        ranking = rank_trails(sample_trails)
+        assert [t.id for t, _ in ranking] == ["trail-001", "trail-004", "trail-002"]
+        scores = [score for _, score in ranking]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_ties_broken_by_id(self, single_trail):
+        """Test equal scores are ordered by trail ID."""
+        trails = [replace(single_trail, id=f"t-{i}") for i in (3, 1, 2)]
+        assert [t.id for t, _ in rank_trails(trails)] == ["t-1", "t-2", "t-3"]
+
+    def test_empty(self):
+        """Test ranking an empty catalog."""
+        assert rank_trails([]) == ()
@@ -0,0 +1,126 @@
+"""Tests for the background refresher."""
+
+import asyncio
+import random
+
+from sftrails.changes import ChangeType, TrailChange
+from sftrails.client import InMemoryTrailSource
+from sftrails.refresher import REFRESH_FAILURES, BackgroundRefresher
+from sftrails.service import TrailService
+from tests.conftest import change_set
+
+
+class FailingSource(InMemoryTrailSource):
+    """Source whose fetches fail until told otherwise."""
+
+    def __init__(self, trails: list[dict]) -> None:
+        super().__init__(trails)
+        self.failing = True
+
+    async def fetch_trails(self) -> list[dict]:
+        if self.failing:
+            raise ConnectionError("upstream unavailable")
+        return await super().fetch_trails()
+
+
+class TestAdaptiveInterval:
+    """Tests for adapting the refresh interval."""
+
+    def test_quiet_refreshes_slow_down(self, trail_service):
+        """Test refreshes without changes grow the interval up to the maximum."""
+        refresher = BackgroundRefresher(trail_service, interval=60)
+        refresher.adapt(None)
+        assert refresher.interval == 90
+        for _ in range(10):
+            refresher.adapt(None)
+        assert refresher.interval == 240
+
+    def test_status_flips_speed_up(self, trail_service):
+        """Test status changes halve the interval down to the minimum."""
+        refresher = BackgroundRefresher(trail_service, interval=60)
+        flip = TrailChange(
+            ChangeType.UPDATED, "trail-001", changed_fields=("status",)
+        )
+        refresher.adapt(change_set(flip))
+        assert refresher.interval == 30
+        for _ in range(10):
+            refresher.adapt(change_set(flip))
+        assert refresher.interval == 15
+
+    def test_minor_changes_keep_interval(self, trail_service):
+        """Test changes that leave status and condition alone keep the pace."""
+        refresher = BackgroundRefresher(trail_service, interval=60)
+        refresher.adapt(
+            change_set(
+                TrailChange(ChangeType.UPDATED, "trail-001", changed_fields=("notes",))
+            )
+        )
+        assert refresher.interval == 60
+
+    def test_jitter(self, trail_service):
+        """Test delays are spread around the interval by the jitter fraction."""
+        refresher = BackgroundRefresher(
+            trail_service, interval=100, jitter=0.2, rng=random.Random(1)
+        )
+        delays = [refresher.next_delay() for _ in range(200)]
+        assert all(80 <= delay <= 120 for delay in delays)
+        assert len(set(delays)) > 1
+
+    def test_failures_back_off(self, trail_service):
+        """Test consecutive failures retry with exponential backoff."""
+        refresher = BackgroundRefresher(trail_service, interval=60, jitter=0)
+        refresher.failures = 1
+        assert refresher.next_delay() == 15
+        refresher.failures = 3
+        assert refresher.next_delay() == 60
+        refresher.failures = 10
+        assert refresher.next_delay() == 240
+
+
+class TestBackgroundRefresher:
+    """Tests for running the refresher."""
+
+    async def test_start_loads_snapshot(self, trail_service, sample_trail_data):
+        """Test starting the refresher loads the catalog before returning."""
+        refresher = BackgroundRefresher(trail_service, interval=60)
+        await refresher.start()
+        try:
+            assert refresher.running
+            assert len(trail_service.snapshot) == len(sample_trail_data)
+            assert trail_service.staleness < 1
+        finally:
+            await refresher.stop()
+        assert not refresher.running
+
+    async def test_refreshes_in_background(
+        self, trail_service, in_memory_source, sample_trail_data
+    ):
+        """Test upstream changes are picked up without any request."""
+        refresher = BackgroundRefresher(trail_service, interval=0.01)
+        await refresher.start()
+        try:
+            in_memory_source.add_trail({**sample_trail_data[0], "status": "closed"})
+            for _ in range(100):
+                if trail_service.version == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await refresher.stop()
+        assert trail_service.version == 2
+
+    async def test_failures_keep_snapshot(self, sample_trail_data):
+        """Test a failing upstream is counted and does not stop the refresher."""
+        source = FailingSource(sample_trail_data)
+        service = TrailService(source)
+        refresher = BackgroundRefresher(service, interval=60)
+        failures = REFRESH_FAILURES.value()
+
+        assert await refresher.refresh_once() is None
+        assert refresher.failures == 1
+        assert REFRESH_FAILURES.value() == failures + 1
+        assert service.staleness is None
+
+        source.failing = False
+        await refresher.refresh_once()
+        assert refresher.failures == 0
+        assert service.staleness is not None
@@ -0,0 +1,96 @@
+"""Tests for API serializers."""
+
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from sftrails.api.serializers import (
+    TRAIL_FIELD_GETTERS,
+    parse_fields,
+    patch_to_fields,
+    project_trail,
+    trail_to_response,
+    upsert_to_trail,
+)
+from sftrails.api.schemas import TrailPatchRequest, TrailUpsertRequest
+from sftrails.models import TrailCondition, TrailStatus
+
+
+class TestParseFields:
+    """Tests for parse_fields."""
+
+    def test_none_means_all_fields(self):
+        """Test that a missing parameter selects every field."""
+        assert parse_fields(None) is None
+        assert parse_fields("") is None
+
+    def test_parses_and_dedupes(self):
+        """Test that fields are stripped and deduplicated in order."""
+        assert parse_fields("id, name,id,status") == ("id", "name", "status")
+
+    def test_unknown_field_raises(self):
+        """Test that unknown fields raise ValueError."""
+        with pytest.raises(ValueError, match="bogus"):
+            parse_fields("id,bogus")
+
+
+class TestProjectTrail:
+    """Tests for project_trail."""
+
+    def test_only_requested_fields(self, single_trail):
+        """Test that only requested fields are serialized."""
+        data = project_trail(single_trail, ("id", "status", "is_accessible"))
+        assert data == {"id": "test-001", "status": "open", "is_accessible": True}
+
+    def test_matches_full_response(self, single_trail):
+        """Test projecting every field matches the full response."""
+        full = trail_to_response(single_trail).model_dump(mode="json")
+        assert project_trail(single_trail, tuple(TRAIL_FIELD_GETTERS)) == full
+
+    def test_omitted_fields_not_computed(self, single_trail, monkeypatch):
+        """Test that omitted computed fields are never evaluated."""
+        def fail(trail):
+            raise AssertionError("computed field evaluated")
+
+        monkeypatch.setitem(TRAIL_FIELD_GETTERS, "is_safe_for_hiking", fail)
+        assert project_trail(single_trail, ("id",)) == {"id": "test-001"}
+
+
+class TestRequestConversion:
+    """Tests for converting admin request items to models."""
+
+    def test_upsert_round_trip(self, single_trail):
+        """Test a full record converts back to an equal Trail."""
+        item = TrailUpsertRequest.model_validate(single_trail.to_dict())
+        assert upsert_to_trail(item) == single_trail
+
+    def test_patch_fields(self):
+        """Test set fields are returned as model types and nulls clear."""
+        item = TrailPatchRequest.model_validate(
+            {
+                "id": "trail-001",
+                "status": "closed",
+                "condition": "icy",
+                "notes": None,
+                "latitude": None,
+            }
+        )
+        assert patch_to_fields(item) == {
+            "status": TrailStatus.CLOSED,
+            "condition": TrailCondition.ICY,
+            "notes": "",
+            "latitude": None,
+        }
+
+    def test_patch_rejects_null_required_field(self):
+        """Test null is rejected for fields a trail always has."""
+        with pytest.raises(ValidationError):
+            TrailPatchRequest.model_validate({"id": "trail-001", "name": None})
+
+    def test_aware_timestamps_become_naive_utc(self):
+        """Test pushed timestamps with an offset are converted to naive UTC."""
+        item = TrailPatchRequest.model_validate(
+            {"id": "trail-001", "last_updated": "2025-01-16T01:00:00+01:00"}
+        )
+        assert patch_to_fields(item) == {"last_updated": datetime(2025, 1, 16)}
@@ -1,11 +1,23 @@
 """Tests for trail service."""
 
+import asyncio
+import gc
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timedelta
+
 import pytest
 
 from sftrails.client import InMemoryTrailSource
-from sftrails.exceptions import TrailNotFoundError
+from sftrails.exceptions import (
+    ChangeHistoryExpiredError,
+    ParkNotFoundError,
+    TrailNotFoundError,
+)
 from sftrails.models import TrailCondition, TrailStatus
-from sftrails.service import TrailService
+from sftrails.service import CACHE_REQUESTS, SNAPSHOT_TRAILS, TrailService
+from tests.conftest import CountingSource, raw_catalog
 
 
 class TestTrailService:
@@ -72,6 +84,18 @@ class TestTrailService:
         for trail in safe_trails:
             assert trail.is_safe_for_hiking()
 
+    async def test_get_nearby_trails(self, trail_service):
+        """Test radius search returns nearest trails first."""
+        results = await trail_service.get_nearby_trails(37.7800, -122.5100, 3.0)
+        assert [t.id for t, _ in results] == ["trail-004", "trail-002"]
+
+    async def test_get_nearby_trails_with_filters(self, trail_service):
+        """Test radius search combined with status filter."""
+        results = await trail_service.get_nearby_trails(
+            37.7800, -122.5100, 3.0, status=TrailStatus.OPEN
+        )
+        assert [t.id for t, _ in results] == ["trail-002"]
+
     async def test_search_by_status(self, trail_service):
         """Test searching trails by status."""
         results = await trail_service.search_trails(status=TrailStatus.CLOSED)
@@ -116,6 +140,58 @@ class TestTrailService:
         )
         assert results == []
 
+    async def test_search_multiple_values(self, trail_service):
+        """Test repeated filter values match any of them."""
+        results = await trail_service.search_trails(
+            status=[TrailStatus.CLOSED, TrailStatus.LIMITED],
+            park=["mount tamalpais state park", "Golden Gate National Recreation Area"],
+        )
+        assert [t.id for t in results] == ["trail-003", "trail-004"]
+
+    async def test_search_exclusions(self, trail_service):
+        """Test excluded values drop matching trails."""
+        results = await trail_service.search_trails(
+            exclude_status=TrailStatus.CLOSED,
+            exclude_condition=[TrailCondition.ICY, TrailCondition.WET],
+        )
+        assert [t.id for t in results] == ["trail-001", "trail-004"]
+
+    async def test_search_matches_linear_scan(self, trail_service):
+        """Test bitmap filters agree with filtering each trail."""
+        trails = await trail_service.get_all_trails()
+        statuses = [TrailStatus.OPEN, TrailStatus.LIMITED]
+        results = await trail_service.search_trails(
+            status=statuses,
+            exclude_park="Mount Davidson Park",
+            max_length_miles=5.0,
+        )
+        assert results == [
+            t
+            for t in trails
+            if t.status in statuses
+            and t.park != "Mount Davidson Park"
+            and t.length_miles <= 5.0
+        ]
+
+    async def test_parks(self, trail_service):
+        """Test parks are listed by name and looked up by slug or name."""
+        parks = await trail_service.get_parks()
+        assert [p.name for p in parks] == sorted(p.name for p in parks)
+
+        park = await trail_service.get_park("mount-tamalpais-state-park")
+        assert park.trail_ids == ("trail-001", "trail-003")
+        assert await trail_service.get_park("MOUNT TAMALPAIS STATE PARK") is park
+
+        trails = await trail_service.get_park_trails(park.slug)
+        assert [t.id for t in trails] == ["trail-001", "trail-003"]
+
+    async def test_park_not_found(self, trail_service):
+        """Test unknown parks raise ParkNotFoundError."""
+        with pytest.raises(ParkNotFoundError):
+            await trail_service.get_park("nowhere")
+        with pytest.raises(ParkNotFoundError):
+            await trail_service.get_park_trails("nowhere")
+
     async def test_caching(self, in_memory_source, sample_trail_data):
         """Test that service caches results."""
         service = TrailService(in_memory_source)
@@ -157,3 +233,481 @@ class TestTrailService:
         # Should now return empty
         trails = await trail_service.get_all_trails()
         assert trails == []
+
+    async def test_initial_load_bumps_version(self, trail_service):
+        """Test that the first load publishes version 1."""
+        assert trail_service.version == 0
+        await trail_service.get_all_trails()
+        assert trail_service.version == 1
+
+    async def test_refresh_without_changes(self, trail_service):
+        """Test that an unchanged refresh keeps the version."""
+        await trail_service.get_all_trails()
+        assert await trail_service.refresh() is None
+        assert trail_service.version == 1
+
+    async def test_refresh_notifies_listeners(
+        self, trail_service, in_memory_source, sample_trail_data
+    ):
+        """Test that listeners receive change sets from refreshes."""
+        received = []
+        trail_service.add_listener(received.append)
+        await trail_service.get_all_trails()
+
+        in_memory_source.add_trail({**sample_trail_data[2], "status": "open"})
+        change_set = await trail_service.refresh()
+
+        assert [cs.version for cs in received] == [1, 2]
+        assert received[-1] is change_set
+        assert [c.trail_id for c in change_set.changes] == ["trail-003"]
+
+    async def test_changes_since(
+        self, trail_service, in_memory_source, sample_trail_data
+    ):
+        """Test that changes_since returns change sets after a version."""
+        await trail_service.get_all_trails()
+        in_memory_source.add_trail({**sample_trail_data[0], "condition": "muddy"})
+        await trail_service.refresh()
+
+        change_sets = trail_service.changes_since(1)
+        assert [cs.version for cs in change_sets] == [2]
+        assert change_sets[0].changes[0].previous_condition == TrailCondition.DRY
+
+    async def test_changes_since_bounded_history(
+        self, in_memory_source, sample_trail_data
+    ):
+        """Test that change sets beyond the log size are unavailable."""
+        service = TrailService(in_memory_source, change_log_size=1)
+        await service.get_all_trails()
+        in_memory_source.add_trail({**sample_trail_data[0], "status": "closed"})
+        await service.refresh()
+
+        with pytest.raises(ChangeHistoryExpiredError):
+            service.changes_since(0)
+
+    async def test_cache_metrics(self, trail_service, sample_trail_data):
+        """Test cache hits, misses and snapshot size are recorded."""
+        hits = CACHE_REQUESTS.value(result="hit")
+        misses = CACHE_REQUESTS.value(result="miss")
+
+        await trail_service.get_all_trails()
+        await trail_service.get_all_trails()
+
+        assert CACHE_REQUESTS.value(result="miss") == misses + 1
+        assert CACHE_REQUESTS.value(result="hit") == hits + 1
+        assert SNAPSHOT_TRAILS.value() == len(sample_trail_data)
+
+    async def test_get_trail_before_full_load(
+        self, trail_service, sample_trail_data
+    ):
+        """Test fetching one trail does not hide the rest of the catalog."""
+        await trail_service.get_trail("trail-001")
+        trails = await trail_service.get_all_trails()
+        assert len(trails) == len(sample_trail_data)
+
+
+class TestApplyUpdates:
+    """Tests for pushing updates into the service snapshot."""
+
+    async def test_apply_updates(self, trail_service, single_trail):
+        """Test that changed and new trails are applied and published."""
+        published = []
+        trail_service.add_listener(published.append)
+        await trail_service.get_all_trails()
+        current = await trail_service.get_trail("trail-001")
+        version = trail_service.version
+
+        closed = replace(current, status=TrailStatus.CLOSED)
+        change_set = await trail_service.apply_updates([closed, single_trail])
+
+        assert trail_service.version == version + 1
+        assert published[-1] == change_set
+        assert {c.trail_id for c in change_set.changes} == {"trail-001", "test-001"}
+        assert (await trail_service.get_trail("trail-001")).status == TrailStatus.CLOSED
+        assert len(await trail_service.get_all_trails()) == 6
+
+    async def test_unchanged_updates_keep_version(self, trail_service):
+        """Test that a batch without differences publishes nothing."""
+        trails = await trail_service.get_all_trails()
+        version = trail_service.version
+        assert await trail_service.apply_updates(trails) is None
+        assert trail_service.version == version
+
+    async def test_status_counts_maintained(self, trail_service):
+        """Test aggregate counts follow incremental updates."""
+        statuses, conditions = await trail_service.get_status_counts()
+        assert statuses[TrailStatus.OPEN] == 3
+
+        current = await trail_service.get_trail("trail-001")
+        await trail_service.apply_updates(
+            [replace(current, status=TrailStatus.CLOSED, condition=TrailCondition.ICY)]
+        )
+        statuses, conditions = await trail_service.get_status_counts()
+        trails = await trail_service.get_all_trails()
+        assert statuses[TrailStatus.OPEN] == 2
+        assert statuses[TrailStatus.CLOSED] == sum(
+            t.status == TrailStatus.CLOSED for t in trails
+        )
+        assert conditions[TrailCondition.ICY] == sum(
+            t.condition == TrailCondition.ICY for t in trails
+        )
+
+    async def test_spatial_index_maintained(self, trail_service):
+        """Test nearby lookups see moved trails."""
+        current = await trail_service.get_trail("trail-001")
+        await trail_service.apply_updates(
+            [replace(current, latitude=10.0, longitude=10.0)]
+        )
+        nearby = await trail_service.get_nearby_trails(10.0, 10.0, 1.0)
+        assert [t.id for t, _ in nearby] == ["trail-001"]
+
+    async def test_patch_trails(self, trail_service):
+        """Test partial updates stamp last_updated only when something changed."""
+        stamp = datetime(2030, 1, 1)
+        change_set = await trail_service.patch_trails(
+            {
+                "trail-001": {"status": TrailStatus.CLOSED},
+                "trail-002": {},
+            },
+            updated_at=stamp,
+        )
+        (change,) = change_set.changes
+        assert change.trail_id == "trail-001"
+        assert change.trail.last_updated == stamp
+        assert (await trail_service.get_trail("trail-002")).last_updated != stamp
+
+    async def test_patch_unknown_trail_applies_nothing(self, trail_service):
+        """Test that a batch with an unknown trail is rejected as a whole."""
+        await trail_service.get_all_trails()
+        version = trail_service.version
+        with pytest.raises(TrailNotFoundError):
+            await trail_service.patch_trails(
+                {
+                    "trail-001": {"status": TrailStatus.CLOSED},
+                    "missing": {"status": TrailStatus.CLOSED},
+                }
+            )
+        assert trail_service.version == version
+        assert (await trail_service.get_trail("trail-001")).status == TrailStatus.OPEN
+
+    async def test_pushed_updates_survive_refresh(
+        self, trail_service, in_memory_source, single_trail
+    ):
+        """Test a refresh keeps pushed trails that upstream has not updated."""
+        await trail_service.patch_trails(
+            {"trail-001": {"status": TrailStatus.CLOSED}},
+            updated_at=datetime(2030, 1, 1),
+        )
+        await trail_service.apply_updates([single_trail])
+        published = []
+        trail_service.add_listener(published.append)
+
+        assert await trail_service.refresh() is None
+        assert not published
+        snapshot = trail_service.snapshot
+        assert snapshot.trails["trail-001"].status == TrailStatus.CLOSED
+        assert "test-001" in snapshot.trails
+        assert snapshot.status_counts[TrailStatus.CLOSED] == 2
+
+    async def test_newer_upstream_replaces_pushed_update(
+        self, trail_service, in_memory_source, sample_trail_data
+    ):
+        """Test upstream wins once it reports a newer last_updated."""
+        await trail_service.patch_trails(
+            {"trail-001": {"status": TrailStatus.CLOSED}},
+            updated_at=datetime(2030, 1, 1),
+        )
+        in_memory_source.add_trail(
+            {**sample_trail_data[0], "last_updated": "2030-01-02T00:00:00"}
+        )
+
+        change_set = await trail_service.refresh()
+        (change,) = change_set.changes
+        assert change.trail.status == TrailStatus.OPEN
+
+        # Forgotten once superseded: later upstream values apply as usual
+        in_memory_source.add_trail(
+            {**sample_trail_data[0], "status": "limited", "last_updated": "2029-01-01"}
+        )
+        await trail_service.refresh()
+        trail = trail_service.snapshot.trails["trail-001"]
+        assert trail.status == TrailStatus.LIMITED
+
+
+class TestRecommendations:
+    """Tests for recommended trails."""
+
+    async def test_top_k(self, trail_service):
+        """Test the best trails are returned with the recommendable total."""
+        results, total = await trail_service.get_recommended_trails(2)
+        assert [t.id for t, _ in results] == ["trail-001", "trail-004"]
+        assert total == 3
+
+    async def test_ranked_once_per_snapshot(self, trail_service):
+        """Test the ranking is reused until the snapshot changes."""
+        await trail_service.get_recommended_trails(1)
+        ranking = trail_service.snapshot.recommended
+        await trail_service.get_recommended_trails(3)
+        assert trail_service.snapshot.recommended is ranking
+
+        await trail_service.patch_trails({"trail-001": {"status": TrailStatus.CLOSED}})
+        results, total = await trail_service.get_recommended_trails(3)
+        assert [t.id for t, _ in results] == ["trail-004", "trail-002"]
+        assert total == 2
+
+
+class TestSnapshots:
+    """Tests for snapshot publication by the service."""
+
+    async def test_get_all_trails_returns_own_list(self, trail_service):
+        """Test callers get their own list of the snapshot's trails."""
+        first = await trail_service.get_all_trails()
+        first.clear()
+        second = await trail_service.get_all_trails()
+        assert len(second) == len(trail_service.snapshot)
+        assert second[0] is trail_service.snapshot.trail_list[0]
+
+    async def test_readers_keep_their_snapshot(
+        self, trail_service, in_memory_source, sample_trail_data
+    ):
+        """Test a held snapshot is unaffected by later refreshes and updates."""
+        held = await trail_service.get_snapshot()
+        in_memory_source.add_trail({**sample_trail_data[0], "status": "closed"})
+        await trail_service.refresh()
+        await trail_service.patch_trails({"trail-002": {"notes": "patched"}})
+
+        assert held.version == 1
+        assert held.trails["trail-001"].status == TrailStatus.OPEN
+        assert held.trails["trail-002"].notes != "patched"
+        assert trail_service.snapshot.version == 3
+        assert trail_service.version == 3
+
+    async def test_published_snapshots_are_indexed(self, trail_service):
+        """Test refreshes and updates publish snapshots with indexes built."""
+        indexes = {"filter_index", "parks", "recommended"}
+        snapshot = await trail_service.get_snapshot()
+        assert indexes <= vars(snapshot).keys()
+
+        await trail_service.patch_trails({"trail-002": {"notes": "patched"}})
+        assert indexes <= vars(trail_service.snapshot).keys()
+
+    async def test_updates_adjust_indexes_in_place(self, trail_service):
+        """Test an update re-aggregates only the parks it touches."""
+        snapshot = await trail_service.get_snapshot()
+        closed = replace(snapshot.trails["trail-002"], status=TrailStatus.CLOSED)
+        await trail_service.apply_updates([closed])
+
+        updated = trail_service.snapshot
+        slug = "mount-davidson-park"
+        assert updated.parks[slug] is snapshot.parks[slug]
+        park = updated.find_park(closed.park)
+        assert park.status_counts[TrailStatus.CLOSED] == (
+            snapshot.find_park(closed.park).status_counts[TrailStatus.CLOSED] + 1
+        )
+        assert closed in updated.search(status=TrailStatus.CLOSED)
+
+    async def test_unchanged_refresh_keeps_snapshot(self, trail_service):
+        """Test a refresh without changes does not rebuild the snapshot."""
+        snapshot = await trail_service.get_snapshot()
+        await trail_service.refresh()
+        assert trail_service.snapshot is snapshot
+
+    async def test_clear_cache_diffs_against_old_snapshot(
+        self, trail_service, in_memory_source, sample_trail_data
+    ):
+        """Test the reload after clearing publishes only real changes."""
+        await trail_service.get_all_trails()
+        published = []
+        trail_service.add_listener(published.append)
+        trail_service.clear_cache()
+        in_memory_source.add_trail({**sample_trail_data[0], "status": "closed"})
+
+        await trail_service.get_all_trails()
+        assert trail_service.version == 2
+        assert [c.trail_id for c in published[0].changes] == ["trail-001"]
+
+
+async def _max_loop_lag(awaitable, interval: float = 0.001) -> float:
+    """Run an awaitable and report the longest event loop stall seen.
+
+    The garbage collector is paused meanwhile: its full collections stall
+    the loop for tens of milliseconds once earlier tests fill the heap.
+    """
+    lag = 0.0
+
+    async def ticker():
+        nonlocal lag
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(lag, time.perf_counter() - start - interval)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    gc.disable()
+    try:
+        await awaitable
+        # Let the ticker observe a stall that lasted until the very end
+        await asyncio.sleep(interval * 5)
+    finally:
+        gc.enable()
+        task.cancel()
+    return lag
+
+
+class TestSnapshotBuild:
+    """Tests for building snapshots off the event loop."""
+
+    LARGE = 50_000
+
+    async def test_blocking_build_stalls_loop(self):
+        """Test the baseline: without a budget a large refresh stalls the loop."""
+        service = TrailService(
+            InMemoryTrailSource(raw_catalog(self.LARGE)), stall_budget=None
+        )
+        lag = await _max_loop_lag(service.refresh())
+        assert lag > 0.15
+
+    async def test_cooperative_build_bounds_loop_lag(self):
+        """Test a budgeted refresh keeps event loop stalls short."""
+        service = TrailService(
+            InMemoryTrailSource(raw_catalog(self.LARGE)), stall_budget=0.01
+        )
+        lag = await _max_loop_lag(service.refresh())
+        assert lag < 0.1
+        assert len(service.snapshot) == self.LARGE
+
+    async def test_thread_pool_build_bounds_loop_lag(self):
+        """Test building in a thread pool keeps event loop stalls short."""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            service = TrailService(
+                InMemoryTrailSource(raw_catalog(self.LARGE)),
+                build_executor=executor,
+            )
+            lag = await _max_loop_lag(service.refresh())
+        assert lag < 0.1
+        assert len(service.snapshot) == self.LARGE
+
+    async def _reranking_push(self, service: TrailService) -> float:
+        """Loop lag of pushing a trail with a newer report, which re-ranks."""
+        await service.refresh()
+        trail = service.snapshot.trails["trail-00000"]
+        newer = replace(trail, last_updated=trail.last_updated + timedelta(days=1))
+        lag = await _max_loop_lag(service.apply_updates([newer]))
+        assert service.snapshot.trails["trail-00000"] is newer
+        assert "recommended" in vars(service.snapshot)
+        return lag
+
+    async def test_blocking_push_stalls_loop(self):
+        """Test the baseline: without a budget re-ranking stalls the loop."""
+        service = TrailService(
+            InMemoryTrailSource(raw_catalog(self.LARGE)), stall_budget=None
+        )
+        assert await self._reranking_push(service) > 0.12
+
+    async def test_cooperative_push_bounds_loop_lag(self):
+        """Test a push that re-ranks the catalog keeps stalls within budget."""
+        service = TrailService(
+            InMemoryTrailSource(raw_catalog(self.LARGE)), stall_budget=0.01
+        )
+        assert await self._reranking_push(service) < 0.1
+
+    async def test_thread_pool_push_bounds_loop_lag(self):
+        """Test a push that re-ranks in a thread pool keeps stalls short."""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            service = TrailService(
+                InMemoryTrailSource(raw_catalog(self.LARGE)),
+                build_executor=executor,
+            )
+            assert await self._reranking_push(service) < 0.1
+
+    async def test_concurrent_pushes_apply_in_order(self):
+        """Test a batch pushed while another is indexing waits for it."""
+        service = TrailService(InMemoryTrailSource(raw_catalog(5000)), stall_budget=0)
+        await service.refresh()
+        trail = service.snapshot.trails["trail-00000"]
+        first = replace(trail, notes="first", last_updated=datetime(2026, 1, 1))
+        second = replace(trail, notes="second")
+
+        results = await asyncio.gather(
+            service.apply_updates([first]), service.apply_updates([second])
+        )
+
+        assert [r.version for r in results] == [2, 3]
+        assert service.snapshot.trails["trail-00000"] is second
+
+    async def test_process_pool_build(self, in_memory_source, sample_trail_data):
+        """Test building in a process pool gives the same snapshot."""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            service = TrailService(in_memory_source, build_executor=executor)
+            await service.refresh()
+            in_memory_source.add_trail({**sample_trail_data[0], "status": "closed"})
+            change_set = await service.refresh()
+
+        assert service.version == 2
+        assert [c.trail_id for c in change_set.changes] == ["trail-001"]
+        assert service.snapshot.status_counts[TrailStatus.CLOSED] == 2
+        assert len(service.snapshot.spatial_index) == len(sample_trail_data)
+
+    async def test_concurrent_refreshes_share_one_build(self):
+        """Test callers arriving during a refresh wait for it."""
+        source = CountingSource(raw_catalog(5000))
+        service = TrailService(source, stall_budget=0)
+
+        results = await asyncio.gather(
+            service.get_all_trails(),
+            service.get_all_trails(),
+            service.refresh(),
+        )
+
+        assert source.fetches == 1
+        assert results[0] == results[1]
+        assert results[2].version == 1
+
+    async def test_cancelled_caller_does_not_cancel_refresh(self):
+        """Test cancelling the caller that started a refresh spares the others."""
+        source = CountingSource(raw_catalog(5000))
+        service = TrailService(source, stall_budget=0)
+
+        first = asyncio.create_task(service.refresh())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(service.refresh())
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        change_set = await second
+        assert change_set.version == 1
+        assert len(service.snapshot) == 5000
+        assert source.fetches == 1
+
+    async def test_failed_refresh_is_not_shared(self, in_memory_source):
+        """Test a failed refresh raises and the next one starts afresh."""
+        service = TrailService(in_memory_source)
+        in_memory_source.add_trail({"id": "broken"})
+        with pytest.raises(KeyError):
+            await service.refresh()
+
+        in_memory_source.clear()
+        assert await service.refresh() is None
+
+    async def test_update_during_build_is_diffed(self):
+        """Test a refresh diffs against updates applied while it was building."""
+        source = InMemoryTrailSource(raw_catalog(2000))
+        service = TrailService(source, stall_budget=0)
+        await service.refresh()
+        source.add_trail({**raw_catalog(2)[1], "status": "closed"})
+
+        refresh = asyncio.create_task(service.refresh())
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        pushed = replace(service.snapshot.trails["trail-00000"], notes="pushed")
+        await service.apply_updates([pushed])
+        change_set = await refresh
+
+        assert not refresh.cancelled()
+        assert change_set.version == 3
+        # The pushed trail is kept rather than reverted to upstream's
+        assert [c.trail_id for c in change_set.changes] == ["trail-00001"]
+        assert service.snapshot.trails["trail-00000"].notes == "pushed"
@@ -0,0 +1,136 @@
+"""Tests for immutable catalog snapshots."""
+
+from dataclasses import FrozenInstanceError, replace
+from datetime import timedelta
+
+import pytest
+
+from sftrails.builder import run_steps
+from sftrails.models import TrailCondition, TrailStatus
+from sftrails.snapshot import Snapshot
+
+
+@pytest.fixture
+def snapshot(sample_trails) -> Snapshot:
+    """Snapshot of the sample trails at version 1."""
+    return Snapshot.from_trails({t.id: t for t in sample_trails}, version=1)
+
+
+class TestSnapshot:
+    """Tests for Snapshot."""
+
+    def test_from_trails(self, snapshot, sample_trails):
+        """Test trails, indexes and aggregates are built together."""
+        assert len(snapshot) == len(sample_trails)
+        assert snapshot.trail_list == tuple(sample_trails)
+        assert len(snapshot.spatial_index) == len(sample_trails)
+        assert snapshot.status_counts[TrailStatus.OPEN] == 3
+        assert sum(snapshot.condition_counts.values()) == len(sample_trails)
+
+    def test_empty(self):
+        """Test an empty snapshot keeps the given version."""
+        snapshot = Snapshot.empty(version=4)
+        assert len(snapshot) == 0
+        assert snapshot.version == 4
+
+    def test_read_only(self, snapshot, single_trail):
+        """Test that neither the snapshot nor its mappings can be modified."""
+        with pytest.raises(FrozenInstanceError):
+            snapshot.version = 2
+        with pytest.raises(TypeError):
+            snapshot.trails[single_trail.id] = single_trail
+        with pytest.raises(TypeError):
+            snapshot.status_counts[TrailStatus.OPEN] = 0
+
+    def test_with_updates_leaves_original(self, snapshot, single_trail):
+        """Test copy-on-write updates produce a new, consistent snapshot."""
+        closed = replace(
+            snapshot.trails["trail-001"],
+            status=TrailStatus.CLOSED,
+            condition=TrailCondition.ICY,
+            latitude=10.0,
+            longitude=10.0,
+        )
+        updated = snapshot.with_updates([closed, single_trail], version=2)
+
+        assert updated.version == 2
+        assert updated.trails["trail-001"] is closed
+        assert single_trail.id in updated.trails
+        assert updated.status_counts[TrailStatus.OPEN] == 3
+        assert updated.status_counts[TrailStatus.CLOSED] == (
+            snapshot.status_counts[TrailStatus.CLOSED] + 1
+        )
+        assert [t.id for t, _ in updated.spatial_index.nearby(10.0, 10.0, 1)] == [
+            "trail-001"
+        ]
+
+        assert snapshot.trails["trail-001"].status == TrailStatus.OPEN
+        assert single_trail.id not in snapshot.trails
+        assert snapshot.status_counts[TrailStatus.OPEN] == 3
+        assert snapshot.spatial_index.nearby(10.0, 10.0, 1) == []
+
+    def test_search(self, snapshot):
+        """Test searching accepts single values and collections alike."""
+        single = snapshot.search(status=TrailStatus.OPEN, max_length_miles=5.0)
+        many = snapshot.search(status=[TrailStatus.OPEN], max_length_miles=5.0)
+        assert single == many
+        assert all(t.status == TrailStatus.OPEN for t in single)
+        assert all(t.length_miles <= 5.0 for t in single)
+        assert snapshot.search(park="Nowhere") == []
+
+    def test_index_steps_match_lazy_indexes(self, snapshot, sample_trails):
+        """Test indexes built in chunks equal those built on first use."""
+        lazy = Snapshot.from_trails({t.id: t for t in sample_trails}, version=1)
+        seconds = run_steps(snapshot.index_steps, 2)
+        assert set(seconds) == {
+            "filter_index",
+            "parks",
+            "newest_update",
+            "recommended",
+        }
+        assert snapshot.newest_update == lazy.newest_update
+        assert snapshot.filter_index.by_park == lazy.filter_index.by_park
+        assert snapshot.filter_index.by_status == lazy.filter_index.by_status
+        assert dict(snapshot.parks) == dict(lazy.parks)
+        assert snapshot.recommended == lazy.recommended
+        # Already built indexes are not built again
+        assert run_steps(snapshot.index_steps, 2) == {}
+
+    def test_with_updates_maintains_indexes(self, snapshot, single_trail):
+        """Test built indexes are updated in place and match a full build."""
+        run_steps(snapshot.index_steps, 2)
+        updates = [
+            replace(snapshot.trails["trail-005"], park="Presidio"),
+            replace(snapshot.trails["trail-002"], status=TrailStatus.CLOSED),
+            single_trail,
+        ]
+        updated = snapshot.with_updates(updates, version=2)
+
+        assert {"filter_index", "parks", "recommended"} <= updated.__dict__.keys()
+        rebuilt = Snapshot.from_trails(dict(updated.trails), version=2)
+        for name in ("by_status", "by_condition", "by_park", "positions"):
+            assert getattr(updated.filter_index, name) == getattr(
+                rebuilt.filter_index, name
+            )
+        assert dict(updated.parks) == dict(rebuilt.parks)
+        assert "mount-davidson-park" not in updated.parks
+        assert updated.recommended == rebuilt.recommended
+        assert updated.search(park="Presidio") == [updates[0]]
+        # The original keeps its own indexes
+        assert snapshot.find_park("Mount Davidson Park") is not None
+        assert snapshot.search(park="Presidio") == []
+
+    def test_with_updates_reranks_when_newest_report_moves(self, snapshot):
+        """Test the ranking is left to be rebuilt once the reference moves."""
+        run_steps(snapshot.index_steps, 2)
+        newer = replace(
+            snapshot.trails["trail-004"],
+            last_updated=snapshot.newest_update + timedelta(hours=1),
+        )
+        updated = snapshot.with_updates([newer], version=2)
+
+        assert "recommended" not in updated.__dict__
+        assert updated.newest_update == newer.last_updated
+        assert run_steps(updated.index_steps, 2).keys() == {"recommended"}
+        rebuilt = Snapshot.from_trails(dict(updated.trails), version=2)
+        assert updated.recommended == rebuilt.recommended
@@ -0,0 +1,83 @@
+"""Tests for saved snapshot files."""
+
+import gzip
+import json
+
+import pytest
+
+from sftrails.exceptions import SnapshotFileError
+from sftrails.models import TrailCondition, TrailStatus
+from sftrails.snapshot_file import SnapshotFile, write_snapshot
+
+
+@pytest.fixture
+def snapshot_file(tmp_path, sample_trails) -> SnapshotFile:
+    """Snapshot file of the sample trails, written and loaded back."""
+    path = tmp_path / "trails.snapshot"
+    write_snapshot(path, sample_trails)
+    return SnapshotFile.load(path)
+
+
+class TestSnapshotFile:
+    """Tests for writing and querying snapshot files."""
+
+    def test_round_trip(self, snapshot_file, sample_trails):
+        """Test every trail decodes back to the saved trail."""
+        assert len(snapshot_file) == len(sample_trails)
+        assert list(snapshot_file.trails) == sample_trails
+
+    def test_select_decodes_only_matches(self, snapshot_file):
+        """Test indexed filters do not decode unselected trails."""
+        trails = snapshot_file.search(status=[TrailStatus.CLOSED])
+        assert [t.id for t in trails] == ["trail-003"]
+        decoded = [t for t in snapshot_file.trails._decoded if t is not None]
+        assert decoded == trails
+
+    def test_filters_combine(self, snapshot_file):
+        """Test bitmap, range and name filters all apply."""
+        ids = [
+            t.id
+            for t in snapshot_file.search(
+                park=["golden gate national recreation area"],
+                exclude_status=[TrailStatus.LIMITED],
+                min_length_miles=4,
+                name="coastal",
+            )
+        ]
+        assert ids == ["trail-002"]
+        assert snapshot_file.select(max_elevation_gain_ft=300) == [4]
+
+    def test_counts(self, snapshot_file):
+        """Test counts over all trails match counts over every position."""
+        everything = snapshot_file.counts()
+        assert everything == snapshot_file.counts(range(len(snapshot_file)))
+        statuses, conditions = everything
+        assert statuses[TrailStatus.OPEN] == 3
+        assert conditions[TrailCondition.DRY] == 2
+
+    def test_missing_file(self, tmp_path):
+        """Test a missing file raises SnapshotFileError."""
+        with pytest.raises(SnapshotFileError):
+            SnapshotFile.load(tmp_path / "missing.snapshot")
+
+    def test_not_a_snapshot(self, tmp_path):
+        """Test other files are rejected."""
+        plain = tmp_path / "plain.json"
+        plain.write_text("[]")
+        with pytest.raises(SnapshotFileError):
+            SnapshotFile.load(plain)
+
+        other = tmp_path / "other.snapshot"
+        other.write_bytes(gzip.compress(json.dumps({"format": "x"}).encode()))
+        with pytest.raises(SnapshotFileError):
+            SnapshotFile.load(other)
+
+    def test_unsupported_version(self, tmp_path, sample_trails):
+        """Test files from another format version are rejected."""
+        path = tmp_path / "trails.snapshot"
+        write_snapshot(path, sample_trails)
+        document = json.loads(gzip.decompress(path.read_bytes()))
+        document["format_version"] = 99
+        path.write_bytes(gzip.compress(json.dumps(document).encode()))
+        with pytest.raises(SnapshotFileError, match="version"):
+            SnapshotFile.load(path)
@@ -0,0 +1,105 @@
+"""Tests for the change stream broadcaster."""
+
+import asyncio
+
+from sftrails.api.stream import KEEPALIVE_FRAME, ChangeBroadcaster, format_event
+from sftrails.changes import ChangeSet, ChangeType, TrailChange
+
+
+def make_change_set(version: int, trail) -> ChangeSet:
+    """Build a single-change change set for a trail."""
+    return ChangeSet(
+        version=version,
+        changes=(TrailChange(ChangeType.UPDATED, trail.id, trail),),
+    )
+
+
+class TestFormatEvent:
+    """Tests for SSE frame encoding."""
+
+    def test_frame_with_id(self):
+        """Test frame includes id, event and data lines."""
+        frame = format_event("changes", '{"a": 1}', 3)
+        assert frame == b'id: 3\nevent: changes\ndata: {"a": 1}\n\n'
+
+
+class TestChangeBroadcaster:
+    """Tests for ChangeBroadcaster."""
+
+    async def test_subscriber_receives_published_change(self, single_trail):
+        """Test that a live subscriber receives new change sets."""
+        broadcaster = ChangeBroadcaster(version=1)
+        stream = broadcaster.subscribe()
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+
+        broadcaster.publish(make_change_set(2, single_trail))
+        frame = await asyncio.wait_for(pending, 1)
+        assert frame.startswith(b"id: 2\nevent: changes\n")
+        assert b"test-001" in frame
+        await stream.aclose()
+
+    async def test_frames_shared_across_subscribers(self, single_trail):
+        """Test that every subscriber receives the same encoded frame."""
+        broadcaster = ChangeBroadcaster(version=1)
+        streams = [broadcaster.subscribe(last_version=1) for _ in range(3)]
+        broadcaster.publish(make_change_set(2, single_trail))
+
+        frames = [await s.__anext__() for s in streams]
+        assert all(f is frames[0] for f in frames)
+        for stream in streams:
+            await stream.aclose()
+
+    async def test_initial_load_sent_as_resync(self, single_trail):
+        """Test that the initial catalog load is not broadcast as changes."""
+        broadcaster = ChangeBroadcaster()
+        stream = broadcaster.subscribe(last_version=0)
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+
+        broadcaster.publish(make_change_set(1, single_trail))
+        frame = await asyncio.wait_for(pending, 1)
+        assert frame == b'id: 1\nevent: resync\ndata: {"version": 1}\n\n'
+        assert broadcaster.version == 1
+
+        broadcaster.publish(make_change_set(2, single_trail))
+        assert (await stream.__anext__()).startswith(b"id: 2\nevent: changes\n")
+        await stream.aclose()
+
+    async def test_resume_from_last_version(self, single_trail):
+        """Test that reconnecting replays only missed change sets."""
+        broadcaster = ChangeBroadcaster()
+        for version in (1, 2, 3):
+            broadcaster.publish(make_change_set(version, single_trail))
+
+        stream = broadcaster.subscribe(last_version=1)
+        assert (await stream.__anext__()).startswith(b"id: 2\n")
+        assert (await stream.__anext__()).startswith(b"id: 3\n")
+        await stream.aclose()
+
+    async def test_resync_when_history_exhausted(self, single_trail):
+        """Test that a client too far behind is told to resync."""
+        broadcaster = ChangeBroadcaster(history_size=2)
+        for version in (1, 2, 3):
+            broadcaster.publish(make_change_set(version, single_trail))
+
+        stream = broadcaster.subscribe(last_version=0)
+        frame = await stream.__anext__()
+        assert frame.startswith(b"id: 3\nevent: resync\n")
+        await stream.aclose()
+
+    async def test_keepalive_when_idle(self):
+        """Test that idle streams emit keepalive comments."""
+        broadcaster = ChangeBroadcaster()
+        stream = broadcaster.subscribe(keepalive_seconds=0.01)
+        assert await stream.__anext__() == KEEPALIVE_FRAME
+        await stream.aclose()
+
+    async def test_unsubscribe_on_close(self):
+        """Test that closing a stream removes the subscriber."""
+        broadcaster = ChangeBroadcaster()
+        stream = broadcaster.subscribe(keepalive_seconds=0.01)
+        await stream.__anext__()
+        assert broadcaster.subscriber_count == 1
+        await stream.aclose()
+        assert broadcaster.subscriber_count == 0
@@ -0,0 +1,100 @@
+"""Tests for Server-Timing phase collection."""
+
+from sftrails.timing import (
+    ServerTiming,
+    annotate,
+    current_timing,
+    start_timing,
+    stop_timing,
+    timed,
+)
+
+
+class TestServerTiming:
+    """Tests for ServerTiming header rendering."""
+
+    def test_phases_accumulate(self):
+        """Test that repeated phases add up."""
+        timing = ServerTiming()
+        timing.add("filter", 0.001)
+        timing.add("filter", 0.002)
+        assert timing.header_value() == "filter;dur=3.000"
+
+    def test_header_with_description_and_total(self):
+        """Test descriptions and the total entry."""
+        timing = ServerTiming()
+        timing.describe("cache", "hit")
+        timing.add("serialize", 0.0005)
+        assert timing.header_value(total=0.002) == (
+            'serialize;dur=0.500, cache;desc="hit";dur=0.000, total;dur=2.000'
+        )
+
+
+class TestTimed:
+    """Tests for the timed and annotate helpers."""
+
+    def test_noop_without_collector(self):
+        """Test that timing outside a request records nothing."""
+        assert current_timing() is None
+        with timed("filter"):
+            pass
+        annotate("cache", "hit")
+        assert current_timing() is None
+
+    def test_records_into_current_collector(self):
+        """Test that phases are recorded while a collector is installed."""
+        timing, token = start_timing()
+        try:
+            with timed("filter"):
+                pass
+            annotate("cache", "miss")
+        finally:
+            stop_timing(token)
+
+        assert "filter" in timing.durations
+        assert timing.descriptions == {"cache": "miss"}
+        assert current_timing() is None
+
+
+class TestServerTimingHeader:
+    """Tests for the Server-Timing header on API responses."""
+
+    @staticmethod
+    def phases(response) -> dict[str, str]:
+        """Parse a Server-Timing header into {name: params}."""
+        header = response.headers["server-timing"]
+        return dict(
+            entry.strip().partition(";")[::2] for entry in header.split(",")
+        )
+
+    def test_list_trails_phases(self, client):
+        """Test that list responses break down cache, filter and serialize."""
+        response = client.get("/api/v1/trails?status=open&_=timing")
+        phases = self.phases(response)
+        assert {"cache", "filter", "serialize", "total"} <= phases.keys()
+
+    def test_cache_hit_described(self, client):
+        """Test that warm snapshot lookups are described as hits."""
+        client.get("/api/v1/trails")
+        response = client.get("/api/v1/trails?_=warm")
+        assert 'desc="hit"' in self.phases(response)["cache"]
+
+    def test_upstream_phase_on_miss(self, client):
+        """Test that lookups falling through to the source are timed."""
+        response = client.get("/api/v1/trails/nonexistent")
+        assert response.status_code == 404
+        phases = self.phases(response)
+        assert 'desc="miss"' in phases["cache"]
+        assert "upstream" in phases
+
+    def test_response_cache_hit(self, client):
+        """Test that responses served from the response cache say so."""
+        for _ in range(3):
+            response = client.get("/api/v1/trails/summary")
+        assert 'desc="hit"' in self.phases(response)["respcache"]
+
+    def test_timing_allow_origin(self, client):
+        """Test that the frontend origin may read timings."""
+        response = client.get("/health")
+        assert "total" in self.phases(response)
+        assert "http://localhost:3000" in response.headers["timing-allow-origin"]
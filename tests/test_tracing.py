@@ -0,0 +1,76 @@
+"""Tests for tracing spans."""
+
+import pytest
+
+from sftrails.tracing import (
+    InMemorySpanExporter,
+    NoopTracer,
+    RecordingTracer,
+    get_tracer,
+    set_tracer,
+    start_span,
+)
+
+
+@pytest.fixture
+def exporter():
+    """Install a recording tracer for the duration of a test."""
+    exporter = InMemorySpanExporter()
+    previous = get_tracer()
+    set_tracer(RecordingTracer(exporter))
+    yield exporter
+    set_tracer(previous)
+
+
+class TestNoopTracer:
+    """Tests for the default no-op tracer."""
+
+    def test_default_tracer_is_noop(self):
+        """Test tracing is disabled by default."""
+        assert isinstance(get_tracer(), NoopTracer)
+
+    def test_noop_span_accepts_attributes(self):
+        """Test no-op spans can be used like real spans."""
+        with start_span("noop", {"a": 1}) as span:
+            span.set_attribute("b", 2)
+
+
+class TestRecordingTracer:
+    """Tests for RecordingTracer."""
+
+    def test_records_span(self, exporter):
+        """Test a finished span is exported with its attributes."""
+        with start_span("work", {"size": 3}) as span:
+            span.set_attribute("done", True)
+
+        (recorded,) = exporter.spans
+        assert recorded.name == "work"
+        assert recorded.attributes == {"size": 3, "done": True}
+        assert recorded.duration >= 0
+        assert recorded.parent_id is None
+
+    def test_nested_spans(self, exporter):
+        """Test nested spans share a trace and link to their parent."""
+        with start_span("parent"):
+            with start_span("child"):
+                pass
+
+        child, parent = exporter.spans
+        assert child.parent_id == parent.span_id
+        assert child.trace_id == parent.trace_id
+
+    def test_error_recorded(self, exporter):
+        """Test exceptions are recorded on the span and re-raised."""
+        with pytest.raises(ValueError):
+            with start_span("failing"):
+                raise ValueError("boom")
+        assert "boom" in exporter.spans[0].error
+
+    async def test_service_spans(self, exporter, trail_service):
+        """Test service operations emit refresh, decode and filter spans."""
+        await trail_service.search_trails(park="McLaren Park")
+        names = {span.name for span in exporter.spans}
+        assert {"service.refresh", "service.decode", "service.filter"} <= names
+        (decode,) = exporter.find("service.decode")
+        (refresh,) = exporter.find("service.refresh")
+        assert decode.parent_id == refresh.span_id
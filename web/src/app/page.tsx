@@ -5,12 +5,8 @@ import { StatusSummary, TrailList } from "@/components";
 export const dynamic = "force-dynamic";
 
 export default async function HomePage() {
-  const [summary, trailsResponse] = await Promise.all([
-    trailsApi.getStatusSummary(),
-    trailsApi.getTrails({ status: "open" }),
-  ]);
-
-  const openTrails = trailsResponse.trails.slice(0, 6);
+  // One request for the summary and the first open trails
+  const { summary, openTrails } = await trailsApi.getHomePage(6);
 
   return (
     <div className="mx-auto max-w-7xl px-4 py-8 sm:px-6 lg:px-8">
@@ -43,7 +39,7 @@ export default async function HomePage() {
             View all open trails →
           </Link>
         </div>
-        <TrailList trails={openTrails} emptyMessage="No open trails at this time" />
+        <TrailList trails={openTrails.trails} emptyMessage="No open trails at this time" />
       </section>
 
       {/* Quick Links */}
@@ -3,6 +3,9 @@
  */
 
 import type {
+  BatchQueryResponse,
+  BatchSubQuery,
+  BatchTrailsResult,
   Trail,
   TrailListResponse,
   StatusSummary,
@@ -88,6 +91,32 @@ export const trailsApi = {
     return fetchApi<ParkListResponse>("/api/v1/parks");
   },
 
+  /**
+   * Run several sub-queries against one snapshot in a single request
+   */
+  async query(queries: Record<string, BatchSubQuery>): Promise<BatchQueryResponse> {
+    return fetchApi<BatchQueryResponse>("/api/v1/query", {
+      method: "POST",
+      body: JSON.stringify({ queries }),
+    });
+  },
+
+  /**
+   * Get the status summary and the first open trails in one round trip
+   */
+  async getHomePage(
+    openLimit: number
+  ): Promise<{ summary: StatusSummary; openTrails: BatchTrailsResult }> {
+    const { results } = await this.query({
+      summary: { type: "summary" },
+      openTrails: { type: "trails", status: ["open"], limit: openLimit },
+    });
+    return {
+      summary: results.summary as StatusSummary,
+      openTrails: results.openTrails as BatchTrailsResult,
+    };
+  },
+
   /**
    * Get trails for a specific park
    */
@@ -17,6 +17,9 @@ export interface Trail {
   notes: string;
   is_accessible: boolean;
   is_safe_for_hiking: boolean;
+  latitude?: number | null;
+  longitude?: number | null;
+  geometry?: [number, number][] | null;
 }
 
 export interface TrailListResponse {
@@ -35,6 +38,7 @@ export interface StatusSummary {
 }
 
 export interface Park {
+  slug: string;
   name: string;
   trail_count: number;
 }
@@ -51,4 +55,36 @@ export interface TrailFilters {
   max_length_miles?: number;
   max_elevation_gain_ft?: number;
   q?: string;
+  /** Comma-separated trail fields to return (sparse fieldset) */
+  fields?: string;
+}
+
+/** One sub-query of a batched query; trail filters take lists of values */
+export type BatchSubQuery =
+  | { type: "summary" }
+  | { type: "parks" }
+  | {
+      type: "trails";
+      q?: string;
+      status?: TrailStatus[];
+      condition?: TrailCondition[];
+      park?: string[];
+      exclude_status?: TrailStatus[];
+      exclude_condition?: TrailCondition[];
+      exclude_park?: string[];
+      max_length_miles?: number;
+      max_elevation_gain_ft?: number;
+      fields?: string;
+      limit?: number;
+      offset?: number;
+    };
+
+export interface BatchTrailsResult {
+  trails: Trail[];
+  total: number;
+}
+
+export interface BatchQueryResponse {
+  version: number;
+  results: Record<string, StatusSummary | ParkListResponse | BatchTrailsResult>;
 }